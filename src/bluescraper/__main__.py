@@ -0,0 +1,5 @@
+import sys
+
+from bluescraper.cli import main
+
+sys.exit(main())
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from itertools import islice
+from typing import Deque, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from bluescraper.config import Config
+from bluescraper.plan import ExtractionPlan
+from bluescraper.scraper import Scraper
+
+Document = Union[str, os.PathLike]
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of scraping one document of a batch.
+
+    ``index`` is the position of the document in the input, ``source`` the
+    file path for documents read from a file. ``results`` is None when the
+    document did not pass validation or reading, parsing, validating or
+    extracting it failed. ``error`` then holds the repr of the exception,
+    as not every exception can be sent back from a worker process.
+    """
+
+    index: int
+    valid: bool
+    results: Optional[List[Scraper.ScraperGroupData]] = None
+    source: Optional[str] = None
+    error: Optional[str] = None
+
+
+def is_path(document: Document, paths: bool = False) -> bool:
+    return paths or isinstance(document, os.PathLike)
+
+
+def read_document(
+    document: Document, paths: bool = False
+) -> Tuple[str, Optional[str]]:
+    """
+    Return the html of a document and its source path, if any.
+
+    Strings are html unless ``paths`` is set, path objects are always read
+    as files.
+    """
+    if is_path(document, paths):
+        with open(document, "r", encoding="utf-8") as f:
+            return f.read(), os.fspath(document)
+    return os.fspath(document), None
+
+
+def scrape_document(
+    index: int,
+    document: Document,
+    config: Config,
+    plan: ExtractionPlan,
+    parser: Optional[str] = None,
+    paths: bool = False,
+) -> BatchResult:
+    source = os.fspath(document) if is_path(document, paths) else None
+    valid = False
+    try:
+        html, source = read_document(document, paths)
+        scraper = Scraper.from_html(html, config, parser=parser, plan=plan)
+        if not scraper.can_scrape():
+            return BatchResult(index=index, valid=False, source=source)
+        valid = True
+        results = scraper.extract()
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return BatchResult(
+            index=index, valid=valid, source=source, error=repr(e)
+        )
+    return BatchResult(index=index, valid=True, results=results, source=source)
+
+
+# State of a worker process, set once by the pool initializer.
+_worker: dict = {}
+
+
+def init_worker(
+    config: Config, parser: Optional[str], paths: bool = False
+) -> None:
+    # The config is sent once per worker process, not once per document.
+    _worker["config"] = config
+    _worker["plan"] = ExtractionPlan(config.scraping)
+    _worker["parser"] = parser
+    _worker["paths"] = paths
+
+
+def scrape_chunk(chunk: List[Tuple[int, Document]]) -> List[BatchResult]:
+    return [
+        scrape_document(
+            index,
+            document,
+            _worker["config"],
+            _worker["plan"],
+            _worker["parser"],
+            _worker["paths"],
+        )
+        for index, document in chunk
+    ]
+
+
+def iter_chunks(
+    documents: Iterable[Document], chunksize: int
+) -> Iterator[List[Tuple[int, Document]]]:
+    iterator = enumerate(documents)
+    while chunk := list(islice(iterator, chunksize)):
+        yield chunk
+
+
+def scrape_batch(
+    documents: Iterable[Document],
+    config: Config,
+    max_workers: Optional[int] = None,
+    chunksize: int = 1,
+    ordered: bool = True,
+    parser: Optional[str] = None,
+    paths: bool = False,
+) -> Iterator[BatchResult]:
+    """
+    Parse, validate and extract documents on a pool of processes.
+
+    Parameters
+    ----------
+    documents : Iterable[Union[str, os.PathLike]]
+        Html strings or paths to html files. Files are read by the worker
+        processes. The iterable is consumed lazily.
+    config : Config
+        Configuration applied to every document.
+    max_workers : int, optional
+        Number of worker processes, by default the number of CPUs.
+    chunksize : int, optional
+        Number of documents sent to a worker at once, by default 1.
+    ordered : bool, optional
+        Yield results in input order, by default True. Otherwise results
+        are yielded as soon as their chunk is done.
+    parser : str, optional
+        Parser engine, by default the parser of the config.
+    paths : bool, optional
+        Read strings as file paths instead of html, by default False.
+        ``os.PathLike`` documents are always read as files.
+
+    Yields
+    ------
+    BatchResult
+        One result per document.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1.")
+    workers = max_workers or os.cpu_count() or 1
+    max_pending = 2 * workers
+    chunks = iter_chunks(documents, chunksize)
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(config, parser, paths),
+    )
+    in_order: Deque[Future] = deque()
+    unordered: Set[Future] = set()
+    try:
+        for chunk in chunks:
+            future = executor.submit(scrape_chunk, chunk)
+            if ordered:
+                in_order.append(future)
+                if len(in_order) >= max_pending:
+                    yield from in_order.popleft().result()
+            else:
+                unordered.add(future)
+                if len(unordered) >= max_pending:
+                    done, unordered = wait(
+                        unordered, return_when=FIRST_COMPLETED
+                    )
+                    for done_future in done:
+                        yield from done_future.result()
+        while in_order:
+            yield from in_order.popleft().result()
+        while unordered:
+            done, unordered = wait(unordered, return_when=FIRST_COMPLETED)
+            for done_future in done:
+                yield from done_future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
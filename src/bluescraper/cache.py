@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+from bluescraper.config import Config
+from bluescraper.plan import ExtractionPlan
+from bluescraper.scraper import Scraper
+from bluescraper.utils import get_hash_from_string
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_PLAN_CACHE_SIZE = 16
+CACHE_DB_NAME = "results.sqlite"
+# Part of every key, increased whenever the layout of cached results
+# changes, so entries stored on disk by older versions are not returned.
+CACHE_FORMAT_VERSION = 2
+
+# Validation result and extracted data of one document.
+CacheEntry = Tuple[bool, Optional[List[Scraper.ScraperGroupData]]]
+
+
+def get_config_hash(config: Config) -> str:
+    """Hash of a config, independent of the key order of its source."""
+    normalized = json.dumps(config.model_dump(), sort_keys=True)
+    return get_hash_from_string(normalized)
+
+
+def get_cache_key(
+    html: str, config_hash: str, parser: Optional[str] = None
+) -> str:
+    """
+    Key of a page scraped with a config and parser, as parsers may build
+    different trees from the same html.
+    """
+    return (
+        f"v{CACHE_FORMAT_VERSION}-{get_hash_from_string(html)}"
+        f"-{config_hash}-{parser or ''}"
+    )
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    disk_hits: int = 0
+
+
+class ResultCache:
+    """
+    Cache scraping results by the content of the page and the config.
+
+    Results are kept in an in-memory LRU of ``maxsize`` entries. With a
+    ``directory``, every result is also stored in a SQLite database in
+    that directory, which serves entries evicted from memory and survives
+    restarts. Unchanged pages are answered without parsing them.
+
+    Configs are identified by the hash of their content, so a config
+    changed in place gets new entries. The plans of the last
+    ``plan_cache_size`` configs are kept. Cached results are returned as
+    copies, so callers may change them.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_CACHE_SIZE,
+        directory: Optional[Union[str, os.PathLike]] = None,
+        plan_cache_size: int = DEFAULT_PLAN_CACHE_SIZE,
+    ) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1.")
+        if plan_cache_size < 1:
+            raise ValueError("plan_cache_size must be at least 1.")
+        self.maxsize = maxsize
+        self.plan_cache_size = plan_cache_size
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._plans: OrderedDict[str, ExtractionPlan] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(
+                os.path.join(directory, CACHE_DB_NAME),
+                check_same_thread=False,
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results"
+                " (key TEXT PRIMARY KEY, entry BLOB NOT NULL)"
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return copy.deepcopy(entry)
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT entry FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = pickle.loads(row[0])
+                    self._store(key, entry)
+                    self.stats.hits += 1
+                    self.stats.disk_hits += 1
+                    return copy.deepcopy(entry)
+            self.stats.misses += 1
+            return None
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._store(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, entry)"
+                    " VALUES (?, ?)",
+                    (key, pickle.dumps(entry)),
+                )
+                self._db.commit()
+
+    def _store(self, key: str, entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def get_plan(self, config: Config, config_hash: str) -> ExtractionPlan:
+        with self._lock:
+            plan = self._plans.get(config_hash)
+            if plan is not None:
+                self._plans.move_to_end(config_hash)
+                return plan
+        plan = ExtractionPlan(config.scraping)
+        with self._lock:
+            self._plans[config_hash] = plan
+            while len(self._plans) > self.plan_cache_size:
+                self._plans.popitem(last=False)
+        return plan
+
+    def scrape(
+        self, html: str, config: Config, parser: Optional[str] = None
+    ) -> CacheEntry:
+        """
+        Validate and extract a page, or return the cached result.
+
+        Returns a ``(valid, results)`` pair, results is None for pages
+        that did not pass validation.
+        """
+        config_hash = get_config_hash(config)
+        key = get_cache_key(html, config_hash, parser or config.parser)
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        scraper = Scraper.from_html(
+            html,
+            config,
+            parser=parser,
+            plan=self.get_plan(config, config_hash),
+        )
+        if scraper.can_scrape():
+            entry = (True, scraper.extract())
+        else:
+            entry = (False, None)
+        self.put(key, entry)
+        return copy.deepcopy(entry)
@@ -0,0 +1,200 @@
+"""
+Command line interface of bluescraper.
+
+    bluescraper scrape SOURCE --config CONFIG
+    bluescraper batch DIRECTORY --config CONFIG
+    bluescraper validate-config CONFIG
+
+``scrape`` reads a URL or html file, ``batch`` all html files of a
+directory on a pool of processes. Results are written as JSON, one line
+per document for ``batch``. The scraping modules, and with them bs4,
+requests and pydantic, are only imported by the subcommand that needs
+them, so ``bluescraper --help`` returns immediately.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Sequence, TextIO
+
+if TYPE_CHECKING:
+    from bluescraper.config import Config
+
+DEFAULT_PATTERN = "*.html"
+
+
+def is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def load_config(
+    config_file: Path, snapshot_dir: Optional[Path] = None
+) -> Config:
+    # pylint: disable=import-outside-toplevel
+    if snapshot_dir is not None:
+        from bluescraper import snapshot
+
+        return snapshot.load_config(config_file, snapshot_dir)
+    from bluescraper.config import ConfigReader
+
+    return ConfigReader(config_file).load()
+
+
+def open_output(output: Optional[Path]) -> TextIO:
+    if output is None:
+        return sys.stdout
+    return open(output, "w", encoding="utf-8")
+
+
+def scrape(args: argparse.Namespace) -> int:
+    # pylint: disable=import-outside-toplevel
+    from bluescraper.scraper import Scraper
+
+    config = load_config(args.config, args.snapshot_dir)
+    if is_url(args.source):
+        from bluescraper.utils import get_html
+
+        html = get_html(args.source)
+        if html is None:
+            print(f"Fetching {args.source} failed.", file=sys.stderr)
+            return 1
+    else:
+        html = Path(args.source).read_text(encoding="utf-8")
+    scraper = Scraper.from_html(html, config, parser=args.parser)
+    valid = scraper.can_scrape()
+    results = (
+        [result.to_dict() for result in scraper.extract()] if valid else None
+    )
+    output = open_output(args.output)
+    try:
+        json.dump(
+            {"source": args.source, "valid": valid, "results": results},
+            output,
+            ensure_ascii=False,
+        )
+        output.write("\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0 if valid else 1
+
+
+def batch(args: argparse.Namespace) -> int:
+    # pylint: disable=import-outside-toplevel
+    from bluescraper.batch import scrape_batch
+
+    config = load_config(args.config, args.snapshot_dir)
+    documents = sorted(args.directory.rglob(args.pattern))
+    failed = 0
+    output = open_output(args.output)
+    try:
+        for result in scrape_batch(
+            documents,
+            config,
+            max_workers=args.workers,
+            chunksize=args.chunksize,
+            parser=args.parser,
+        ):
+            if result.error is not None:
+                failed += 1
+            record = {
+                "source": result.source,
+                "valid": result.valid,
+                "results": (
+                    None
+                    if result.results is None
+                    else [group.to_dict() for group in result.results]
+                ),
+                "error": None if result.error is None else str(result.error),
+            }
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(
+        f"Scraped {len(documents)} documents, {failed} failed.",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+def validate_config(args: argparse.Namespace) -> int:
+    # pylint: disable=import-outside-toplevel
+    from pydantic import ValidationError
+
+    from bluescraper.config import ConfigReader
+
+    try:
+        config = ConfigReader(args.config).load()
+    except (OSError, ValueError, ValidationError) as e:
+        print(f"{args.config} is not a valid config:\n{e}", file=sys.stderr)
+        return 1
+    groups = config.scraping.groups or []
+    print(
+        f"{args.config} is valid: {len(config.scraping.tags)} tags,"
+        f" {len(groups)} groups."
+    )
+    return 0
+
+
+def get_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(
+        prog="bluescraper",
+        description="Extract content from html pages with a config file.",
+    )
+    subparsers = arg_parser.add_subparsers(dest="command", required=True)
+
+    scrape_parser = subparsers.add_parser(
+        "scrape", help="Scrape a single URL or html file."
+    )
+    scrape_parser.add_argument("source", help="URL or path of an html file.")
+    scrape_parser.set_defaults(handler=scrape)
+
+    batch_parser = subparsers.add_parser(
+        "batch", help="Scrape all html files of a directory."
+    )
+    batch_parser.add_argument("directory", type=Path)
+    batch_parser.add_argument(
+        "--pattern",
+        default=DEFAULT_PATTERN,
+        help=f"Glob pattern of the files, by default {DEFAULT_PATTERN}.",
+    )
+    batch_parser.add_argument(
+        "--workers", type=int, help="Number of worker processes."
+    )
+    batch_parser.add_argument("--chunksize", type=int, default=1)
+    batch_parser.set_defaults(handler=batch)
+
+    for subparser in (scrape_parser, batch_parser):
+        subparser.add_argument(
+            "--config", type=Path, required=True, help="Config file."
+        )
+        subparser.add_argument("--parser", help="Parser engine.")
+        subparser.add_argument(
+            "--output", type=Path, help="Write the results to this file."
+        )
+        subparser.add_argument(
+            "--snapshot-dir",
+            type=Path,
+            help="Load the config through a precompiled snapshot kept in"
+            " this directory.",
+        )
+
+    validate_parser = subparsers.add_parser(
+        "validate-config", help="Check a config file."
+    )
+    validate_parser.add_argument("config", type=Path)
+    validate_parser.set_defaults(handler=validate_config)
+    return arg_parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = get_arg_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
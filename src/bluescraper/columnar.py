@@ -0,0 +1,245 @@
+"""
+Column buffers for extracted records.
+
+Instead of one dict per record, the values of every tag are appended to
+a column in the Apache Arrow string layout: UTF-8 bytes in a single
+buffer, 64-bit offsets and a validity bitmap. The columns convert to Arrow
+record batches and Parquet files with a single copy per buffer, which
+requires the optional pyarrow package.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from array import array
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from bluescraper.config import ScrapingConfig
+from bluescraper.plan import GroupRecord, get_group_tags, get_tag_index
+
+if TYPE_CHECKING:
+    import pyarrow
+
+
+def import_pyarrow():
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel
+    except ImportError as e:
+        raise ImportError(
+            "Arrow and Parquet output require the pyarrow package."
+        ) from e
+    return pyarrow
+
+
+class StringColumn:
+    """Nullable string values in the Arrow large string layout."""
+
+    __slots__ = ("offsets", "data", "validity", "null_count", "length")
+
+    def __init__(self) -> None:
+        self.offsets = array("q", [0])
+        self.data = bytearray()
+        self.validity = bytearray()
+        self.null_count = 0
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, value: Optional[str]) -> None:
+        bit = self.length % 8
+        if bit == 0:
+            self.validity.append(0)
+        if value is None:
+            self.null_count += 1
+        else:
+            self.data += value.encode("utf-8")
+            self.validity[-1] |= 1 << bit
+        self.offsets.append(len(self.data))
+        self.length += 1
+
+    def is_valid(self, index: int) -> bool:
+        return bool(self.validity[index // 8] >> (index % 8) & 1)
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("column index out of range")
+        if not self.is_valid(index):
+            return None
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.data[start:end].decode("utf-8")
+
+    def __iter__(self) -> Iterator[Optional[str]]:
+        for index in range(self.length):
+            yield self[index]
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            len(self.data)
+            + self.offsets.itemsize * len(self.offsets)
+            + len(self.validity)
+        )
+
+    def to_arrow(self) -> pyarrow.Array:
+        pa = import_pyarrow()
+        offsets = array("q", self.offsets)
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        validity = None
+        if self.null_count:
+            validity = pa.py_buffer(bytes(self.validity))
+        return pa.Array.from_buffers(
+            pa.large_string(),
+            self.length,
+            [
+                validity,
+                pa.py_buffer(offsets.tobytes()),
+                pa.py_buffer(bytes(self.data)),
+            ],
+            null_count=self.null_count,
+        )
+
+
+class ColumnarResult:
+    """
+    Records of one group stored as one StringColumn per tag id.
+
+    The columnar counterpart of ``Scraper.ScraperGroupData``. Values of
+    records for tag ids that are not columns are ignored.
+    """
+
+    def __init__(
+        self, column_names: Iterable[str], group_id: Optional[str] = None
+    ) -> None:
+        self.group_id = group_id
+        self.columns: Dict[str, StringColumn] = {
+            name: StringColumn() for name in column_names
+        }
+        self.num_rows = 0
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.columns)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def append(self, record: dict) -> None:
+        for name, column in self.columns.items():
+            column.append(record.get(name))
+        self.num_rows += 1
+
+    def extend(self, records: Iterable[dict]) -> None:
+        for record in records:
+            self.append(record)
+
+    def to_pydict(self) -> Dict[str, List[Optional[str]]]:
+        return {name: list(column) for name, column in self.columns.items()}
+
+    def to_records(self) -> List[dict]:
+        """Convert back to the list of dicts of ``ScraperGroupData``."""
+        columns = self.to_pydict()
+        return [
+            {name: values[index] for name, values in columns.items()}
+            for index in range(self.num_rows)
+        ]
+
+    def to_record_batch(self) -> pyarrow.RecordBatch:
+        pa = import_pyarrow()
+        return pa.RecordBatch.from_arrays(
+            [column.to_arrow() for column in self.columns.values()],
+            names=self.column_names,
+        )
+
+    def write_parquet(
+        self, file_path: Union[str, os.PathLike], **kwargs
+    ) -> None:
+        """Write the records to a Parquet file, see pyarrow.parquet."""
+        import_pyarrow()
+        import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+
+        table = pyarrow.Table.from_batches([self.to_record_batch()])
+        pyarrow.parquet.write_table(table, file_path, **kwargs)
+
+
+class ColumnarResultBuilder:
+    """
+    Collect group records of any number of pages into column buffers.
+
+    One ColumnarResult is kept per group of the scraping config, with the
+    tags of the group as columns. Without groups, a single result with
+    all tags as columns is kept under the group id None. The records of
+    nested groups are not columns and are ignored.
+    """
+
+    def __init__(self, scraping_config: ScrapingConfig) -> None:
+        self.results: Dict[Optional[str], ColumnarResult] = {}
+        if scraping_config.groups:
+            tag_index = get_tag_index(scraping_config.tags)
+            for group in scraping_config.groups:
+                tags = get_group_tags(
+                    group.contains, scraping_config.tags, tag_index
+                )
+                self.results[group.id] = ColumnarResult(
+                    [tag.id for tag in tags], group_id=group.id
+                )
+        else:
+            self.results[None] = ColumnarResult(
+                [tag.id for tag in scraping_config.tags]
+            )
+
+    def __getitem__(self, group_id: Optional[str]) -> ColumnarResult:
+        return self.results[group_id]
+
+    @property
+    def num_rows(self) -> int:
+        return sum(len(result) for result in self.results.values())
+
+    def append(self, group_id: Optional[str], record: dict) -> None:
+        self.results[group_id].append(record)
+
+    def extend(self, group_records: Iterable[GroupRecord]) -> None:
+        for group_id, record in group_records:
+            self.results[group_id].append(record)
+
+    def to_record_batches(
+        self,
+    ) -> Iterator[Tuple[Optional[str], pyarrow.RecordBatch]]:
+        for group_id, result in self.results.items():
+            yield group_id, result.to_record_batch()
+
+    def write_parquet(
+        self, directory: Union[str, os.PathLike], **kwargs
+    ) -> List[str]:
+        """
+        Write one Parquet file per group to a directory.
+
+        Files are named after the group id, ``records.parquet`` without
+        groups. Returns the paths of the written files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        file_paths = []
+        for group_id, result in self.results.items():
+            file_path = os.path.join(
+                directory, f"{group_id or 'records'}.parquet"
+            )
+            result.write_parquet(file_path, **kwargs)
+            file_paths.append(file_path)
+        return file_paths
@@ -3,9 +3,10 @@ from io import TextIOWrapper
 from pathlib import Path
 from typing import List, Optional
 
-import yaml
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, PrivateAttr, field_validator
 
+from bluescraper.formatters import Formatter, FormatterStep, compile_formatter
+from bluescraper.nodes import PARSERS
 from bluescraper.utils import TagDefinition
 
 
@@ -17,27 +18,66 @@ def load_json(stream: TextIOWrapper) -> dict:
 
 
 def load_yaml(stream: TextIOWrapper) -> dict:
-    result = yaml.safe_load(stream)
+    import yaml  # pylint: disable=import-outside-toplevel
+
+    # The libyaml loader is much faster than the pure Python SafeLoader.
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    result = yaml.load(stream, Loader=loader)
     if isinstance(result, dict):
         return result
     raise ValueError
 
 
 class TagScrapingConfig(BaseModel):
+    """
+    Elements to extract and how to format their values.
+
+    The ``formatter`` steps are compiled once when the config is created,
+    see ``bluescraper.formatters``. Configs are immutable to keep the
+    compiled formatter in sync.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
     id: str
     tag: TagDefinition
     content_type: Optional[str] = None
+    formatter: Optional[List[FormatterStep]] = None
+    _formatter: Formatter = PrivateAttr()
+
+    @field_validator("formatter")
+    @classmethod
+    def check_formatter(
+        cls, steps: Optional[List[FormatterStep]]
+    ) -> Optional[List[FormatterStep]]:
+        compile_formatter(steps)
+        return steps
+
+    def model_post_init(self, __context) -> None:
+        self._formatter = compile_formatter(self.formatter)
+
+    @property
+    def compiled_formatter(self) -> Formatter:
+        return self._formatter
 
 
 class GroupScrapingConfig(BaseModel):
+    """
+    Elements grouping tags into records.
+
+    Nested ``groups`` are searched only within the elements of this group
+    and their records are added to its records under their group id.
+    """
+
     id: str
-    contains: List[str]
+    contains: List[str] = []
     tag: TagDefinition
+    groups: Optional[List["GroupScrapingConfig"]] = None
 
 
 class ScrapingConfig(BaseModel):
     tags: List[TagScrapingConfig]
-    groups: Optional[List[GroupScrapingConfig]] = None
+    groups: Optional[List["GroupScrapingConfig"]] = None
 
 
 class ExistingStringInTag(BaseModel):
@@ -53,6 +93,16 @@ class ValidationConfig(BaseModel):
 class Config(BaseModel):
     scraping: ScrapingConfig
     validation: Optional[ValidationConfig] = None
+    parser: Optional[str] = None
+
+    @field_validator("parser")
+    @classmethod
+    def check_parser(cls, parser: Optional[str]) -> Optional[str]:
+        if parser is not None and parser not in PARSERS:
+            raise ValueError(
+                f"Unknown parser {parser}, choose one of {', '.join(PARSERS)}."
+            )
+        return parser
 
 
 class ConfigReader:
@@ -1,6 +1,20 @@
 from pathlib import Path
 
 DEFAULT_TIMEOUT = None
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_MAX_PER_HOST = 4
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+DEFAULT_RATE_LIMIT = 5.0
+DEFAULT_BURST = 5
+DEFAULT_MIN_RATE = 0.1
+DEFAULT_MAX_BACKOFF = 300.0
+BACKOFF_STATUS_CODES = (429, 503)
 TEST_HTML_DIR = Path("tests/data/bluescraper/html/")
 TEST_CONFIG_DIR = Path("tests/data/bluescraper/config/")
 VALID_HTML_PATH = TEST_HTML_DIR.joinpath("valid.html")
@@ -0,0 +1,338 @@
+"""
+Crawl dated archive pages over a range of dates.
+
+Every date of the range is formatted into a URL template, fetched,
+validated and extracted on a pool of worker threads, and the records are
+written into the date directory layout with a RecordWriter. Progress is
+kept in a checkpoint file, so an interrupted crawl resumes with the dates
+that are not done yet.
+"""
+
+from __future__ import annotations
+
+import datetime
+import logging
+import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+import requests
+
+from bluescraper.config import Config
+from bluescraper.constants import DEFAULT_MAX_CONCURRENCY
+from bluescraper.fetch import Fetcher
+from bluescraper.plan import ExtractionPlan, GroupRecord
+from bluescraper.scraper import ErrorPolicy, Scraper
+from bluescraper.utils import get_date_range
+from bluescraper.writers import JsonlWriter, RecordWriter
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE_NAME = ".checkpoint"
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+
+
+class DateStatus(str, Enum):
+    """
+    Outcome of crawling the page of one date.
+
+    DONE and INVALID pages are not crawled again when a crawl resumes,
+    FAILED pages, e.g. after a network error, are. UNCHANGED pages were
+    answered with 304 Not Modified to a conditional request, which is
+    only sent for pages whose records were written before.
+    """
+
+    DONE = "done"
+    INVALID = "invalid"
+    UNCHANGED = "unchanged"
+    FAILED = "failed"
+
+
+FINAL_STATUSES = frozenset(
+    {DateStatus.DONE, DateStatus.INVALID, DateStatus.UNCHANGED}
+)
+# Statuses of dates whose records are on disk.
+WRITTEN_STATUSES = frozenset({DateStatus.DONE, DateStatus.UNCHANGED})
+
+
+class CrawlCheckpoint:
+    """
+    Append-only log of the status of crawled dates.
+
+    Each line holds an ISO date and its DateStatus, later lines take
+    precedence. A line cut off by a crash is ignored when reading.
+    """
+
+    def __init__(self, file_path: Union[str, os.PathLike]) -> None:
+        self.file_path = os.fspath(file_path)
+        self.statuses: Dict[datetime.date, DateStatus] = {}
+        if os.path.exists(self.file_path):
+            self._read()
+
+    def _read(self) -> None:
+        with open(self.file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    date_string, status = line.rstrip("\n").split("\t")
+                    date_ = datetime.date.fromisoformat(date_string)
+                    self.statuses[date_] = DateStatus(status)
+                except ValueError:
+                    continue
+
+    def is_final(self, date_: datetime.date) -> bool:
+        return self.statuses.get(date_) in FINAL_STATUSES
+
+    def is_written(self, date_: datetime.date) -> bool:
+        return self.statuses.get(date_) in WRITTEN_STATUSES
+
+    def record(self, statuses: Dict[datetime.date, DateStatus]) -> None:
+        if not statuses:
+            return
+        with open(self.file_path, "a", encoding="utf-8") as f:
+            f.writelines(
+                f"{date_.isoformat()}\t{status.value}\n"
+                for date_, status in statuses.items()
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        self.statuses.update(statuses)
+
+
+@dataclass
+class DateResult:
+    date: datetime.date
+    status: DateStatus
+    records: List[GroupRecord] = field(default_factory=list)
+    error: Optional[Exception] = None
+
+
+@dataclass
+class CrawlStats:
+    skipped: int = 0
+    done: int = 0
+    invalid: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    records: int = 0
+
+    def count(self, result: DateResult) -> None:
+        setattr(
+            self, result.status.value, getattr(self, result.status.value) + 1
+        )
+        self.records += len(result.records)
+
+
+class ArchiveCrawler:
+    """
+    Fetch, validate and extract the archive page of every date of a range.
+
+    ``url_template`` is formatted with the date, e.g.
+    ``"https://example.com/archiv?datum={date:%Y-%m-%d}"``. Dates are
+    processed by ``max_workers`` threads sharing the connection pool of
+    ``fetcher``, with at most ``queue_size`` dates scheduled at a time.
+    Records are written with ``writer`` into the partition of their date
+    and group.
+
+    Conditional requests are only sent for dates the checkpoint lists with
+    their records written, so a page that failed after it was fetched is
+    fetched in full again. With ``refresh``, such dates are crawled again
+    instead of being skipped, and only changed pages are extracted.
+
+    Every ``checkpoint_interval`` seconds, and at the end, the writer is
+    rotated, so all records are in completed files, before the dates are
+    marked in the checkpoint. Dates are therefore never marked done
+    without their records on disk, and a resumed crawl repeats at most
+    the dates of the last interval.
+    """
+
+    def __init__(
+        self,
+        url_template: str,
+        config: Config,
+        writer: RecordWriter,
+        checkpoint: Optional[CrawlCheckpoint] = None,
+        fetcher: Optional[Fetcher] = None,
+        max_workers: int = DEFAULT_MAX_CONCURRENCY,
+        queue_size: Optional[int] = None,
+        checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+        request_params: Optional[dict] = None,
+        parser: Optional[str] = None,
+        on_error: Union[ErrorPolicy, str] = ErrorPolicy.RAISE,
+        refresh: bool = False,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        self.url_template = url_template
+        self.config = config
+        self.plan = ExtractionPlan(config.scraping)
+        self.writer = writer
+        self.checkpoint = checkpoint
+        self._owns_fetcher = fetcher is None
+        self.fetcher = fetcher or Fetcher(
+            pool_connections=max_workers, pool_maxsize=max_workers
+        )
+        self.max_workers = max_workers
+        self.queue_size = queue_size or 2 * max_workers
+        self.checkpoint_interval = checkpoint_interval
+        self.request_params = request_params
+        self.parser = parser
+        self.on_error = ErrorPolicy(on_error)
+        self.refresh = refresh
+        self.stats = CrawlStats()
+
+    def get_url(self, date_: datetime.date) -> str:
+        return self.url_template.format(date=date_)
+
+    def crawl_date(
+        self, date_: datetime.date, conditional: bool = False
+    ) -> DateResult:
+        """
+        Fetch, validate and extract the page of one date, with a
+        conditional request if ``conditional``.
+        """
+        url = self.get_url(date_)
+        try:
+            result = self.fetcher.fetch(
+                url, self.request_params, conditional=conditional
+            )
+        except requests.RequestException as e:
+            logger.warning("Fetching %s failed: %s", url, e)
+            return DateResult(date_, DateStatus.FAILED, error=e)
+        if result.unchanged:
+            return DateResult(date_, DateStatus.UNCHANGED)
+        if result.html is None:
+            return DateResult(date_, DateStatus.FAILED)
+        try:
+            scraper = Scraper.from_html(
+                result.html, self.config, parser=self.parser, plan=self.plan
+            )
+            if not scraper.can_scrape():
+                return DateResult(date_, DateStatus.INVALID)
+            records = list(scraper.iter_extract(self.on_error))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning("Scraping %s failed: %s", url, e)
+            return DateResult(date_, DateStatus.FAILED, error=e)
+        return DateResult(date_, DateStatus.DONE, records=records)
+
+    def crawl(
+        self, start_date: datetime.date, end_date: datetime.date
+    ) -> CrawlStats:
+        """
+        Crawl all dates from ``start_date`` (inclusive) to ``end_date``
+        (exclusive) that are not final in the checkpoint yet.
+        """
+        return self.crawl_dates(get_date_range(start_date, end_date))
+
+    def crawl_dates(self, dates: Iterable[datetime.date]) -> CrawlStats:
+        pending: Set[Future] = set()
+        completed: Dict[datetime.date, DateStatus] = {}
+        last_checkpoint = time.monotonic()
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="bluescraper-crawler",
+        ) as executor:
+            try:
+                for date_ in dates:
+                    written = bool(
+                        self.checkpoint and self.checkpoint.is_written(date_)
+                    )
+                    if (
+                        self.checkpoint
+                        and self.checkpoint.is_final(date_)
+                        and not (self.refresh and written)
+                    ):
+                        self.stats.skipped += 1
+                        continue
+                    if len(pending) >= self.queue_size:
+                        done, pending = wait(
+                            pending, return_when=FIRST_COMPLETED
+                        )
+                        self._collect(done, completed)
+                    pending.add(
+                        executor.submit(self.crawl_date, date_, written)
+                    )
+                    if (
+                        time.monotonic() - last_checkpoint
+                        >= self.checkpoint_interval
+                    ):
+                        self._save_checkpoint(completed)
+                        last_checkpoint = time.monotonic()
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect(done, completed)
+            finally:
+                for future in pending:
+                    future.cancel()
+                self._save_checkpoint(completed)
+        return self.stats
+
+    def _collect(
+        self,
+        futures: Iterable[Future],
+        completed: Dict[datetime.date, DateStatus],
+    ) -> None:
+        for future in futures:
+            result: DateResult = future.result()
+            for group_id, record in result.records:
+                self.writer.write(record, result.date, group_id)
+            completed[result.date] = result.status
+            self.stats.count(result)
+
+    def _save_checkpoint(
+        self, completed: Dict[datetime.date, DateStatus]
+    ) -> None:
+        self.writer.rotate()
+        if self.checkpoint is not None:
+            self.checkpoint.record(completed)
+        completed.clear()
+
+    def close(self) -> None:
+        if self._owns_fetcher:
+            self.fetcher.close()
+
+    def __enter__(self) -> ArchiveCrawler:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def crawl_archive(
+    url_template: str,
+    start_date: datetime.date,
+    end_date: datetime.date,
+    config: Config,
+    root_dir: Union[str, os.PathLike],
+    writer: Optional[RecordWriter] = None,
+    checkpoint_path: Optional[Union[str, os.PathLike]] = None,
+    **crawler_options,
+) -> CrawlStats:
+    """
+    Crawl an archive into ``root_dir`` and resume where a previous crawl
+    stopped.
+
+    Records are written as JSON lines unless another ``writer`` is given.
+    The checkpoint is kept in ``root_dir`` unless ``checkpoint_path`` is
+    given. Further options are passed to ArchiveCrawler.
+    """
+    os.makedirs(root_dir, exist_ok=True)
+    if checkpoint_path is None:
+        checkpoint_path = os.path.join(root_dir, CHECKPOINT_FILE_NAME)
+    if writer is None:
+        writer = JsonlWriter(root_dir)
+    with writer, ArchiveCrawler(
+        url_template,
+        config,
+        writer,
+        checkpoint=CrawlCheckpoint(checkpoint_path),
+        **crawler_options,
+    ) as crawler:
+        return crawler.crawl(start_date, end_date)
@@ -0,0 +1,465 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+from bluescraper.config import Config
+from bluescraper.constants import (
+    BACKOFF_STATUS_CODES,
+    DEFAULT_BACKOFF_FACTOR,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_PER_HOST,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_READ_TIMEOUT,
+    RETRY_STATUS_CODES,
+)
+from bluescraper.instrumentation import stage_timer
+from bluescraper.plan import ExtractionPlan
+from bluescraper.ratelimit import HostRateLimiter, get_default_rate_limiter
+from bluescraper.scraper import Scraper
+
+logger = logging.getLogger(__name__)
+
+
+def get_host(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def get_request_url(url: str, request_params: Optional[dict] = None) -> str:
+    """Full URL of a GET request including its query parameters."""
+    request = requests.Request("GET", url, params=request_params)
+    return request.prepare().url or url
+
+
+@dataclass
+class FetchResult:
+    """
+    Outcome of a fetch.
+
+    ``unchanged`` is True when the server answered a conditional request
+    with 304 Not Modified; ``html`` is None then, as for failed requests.
+    """
+
+    url: str
+    html: Optional[str] = None
+    status_code: Optional[int] = None
+    unchanged: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.html is not None
+
+
+@dataclass
+class CacheValidators:
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class ValidatorStore:
+    """
+    Store of ETag and Last-Modified validators per request URL.
+
+    Validators are kept in a SQLite database, in memory by default or in
+    the file at ``path`` to persist them between polling cycles.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike] = ":memory:") -> None:
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.fspath(path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS validators"
+            " (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT)"
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def get(self, url: str) -> Optional[CacheValidators]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified FROM validators WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        return CacheValidators(etag=row[0], last_modified=row[1])
+
+    def set(self, url: str, validators: CacheValidators) -> None:
+        with self._lock:
+            if validators.etag is None and validators.last_modified is None:
+                self._db.execute(
+                    "DELETE FROM validators WHERE url = ?", (url,)
+                )
+            else:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO validators"
+                    " (url, etag, last_modified) VALUES (?, ?, ?)",
+                    (url, validators.etag, validators.last_modified),
+                )
+            self._db.commit()
+
+
+class Fetcher:
+    """
+    Fetch pages synchronously over a pooled ``requests.Session``.
+
+    Connections are kept alive and reused for repeated requests to the
+    same host. ``pool_connections`` is the number of hosts with a cached
+    connection pool and ``pool_maxsize`` the number of connections kept
+    per host; with ``pool_block`` the per host limit is enforced instead
+    of opening extra, non-pooled connections. Failed requests and
+    responses with a status in ``retry_status_codes`` are retried with
+    exponential backoff. Compressed responses are negotiated with every
+    encoding urllib3 can decode, which includes brotli when a brotli
+    package is installed.
+
+    With a ``validator_store``, ``fetch`` sends conditional requests based
+    on the ETag and Last-Modified headers of the previous response for
+    the same URL and reports 304 responses as unchanged.
+
+    Requests wait for the ``rate_limiter``, by default the one set with
+    ``ratelimit.set_default_rate_limiter`` when the fetcher is created.
+    With a limiter, responses with a status in ``BACKOFF_STATUS_CODES``
+    are retried after the limiter's backoff instead of urllib3's, so the
+    backoff applies to all requests to the host.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = False,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        retry_status_codes: Tuple[int, ...] = RETRY_STATUS_CODES,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        headers: Optional[Dict[str, str]] = None,
+        validator_store: Optional[ValidatorStore] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+    ) -> None:
+        self.timeout = (connect_timeout, read_timeout)
+        self.validator_store = validator_store
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
+        self.max_retries = max_retries
+        if self.rate_limiter is not None:
+            retry_status_codes = tuple(
+                status_code
+                for status_code in retry_status_codes
+                if status_code not in BACKOFF_STATUS_CODES
+            )
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=retry_status_codes,
+            allowed_methods=("GET", "HEAD"),
+            raise_on_status=False,
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(make_headers(accept_encoding=True))
+        if headers:
+            self.session.headers.update(headers)
+
+    def __enter__(self) -> Fetcher:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def get(
+        self,
+        url: str,
+        request_params: Optional[dict] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        """Send a GET request, paced and retried by the rate limiter."""
+        if self.rate_limiter is None:
+            return self.session.get(
+                url=url,
+                params=request_params,
+                headers=headers,
+                timeout=self.timeout,
+            )
+        for _ in range(self.max_retries + 1):
+            self.rate_limiter.wait(url)
+            response = self.session.get(
+                url=url,
+                params=request_params,
+                headers=headers,
+                timeout=self.timeout,
+            )
+            self.rate_limiter.record_response(
+                url, response.status_code, response.headers.get("Retry-After")
+            )
+            if response.status_code not in BACKOFF_STATUS_CODES:
+                break
+        return response
+
+    def get_html(
+        self, url: str, request_params: Optional[dict] = None
+    ) -> Optional[str]:
+        with stage_timer("fetch"):
+            response = self.get(url, request_params)
+            if response.ok:
+                return response.text
+        return None
+
+    def fetch(
+        self,
+        url: str,
+        request_params: Optional[dict] = None,
+        conditional: bool = True,
+    ) -> FetchResult:
+        """
+        Fetch a page, conditionally if a validator store is configured and
+        ``conditional`` is True. The validators of the response are stored
+        either way.
+        """
+        headers = {}
+        request_url = get_request_url(url, request_params)
+        if self.validator_store is not None and conditional:
+            validators = self.validator_store.get(request_url)
+            if validators is not None:
+                if validators.etag:
+                    headers["If-None-Match"] = validators.etag
+                if validators.last_modified:
+                    headers["If-Modified-Since"] = validators.last_modified
+        with stage_timer("fetch"):
+            response = self.get(url, request_params, headers)
+            html = response.text if response.ok else None
+        if response.status_code == 304:
+            return FetchResult(url=url, status_code=304, unchanged=True)
+        if not response.ok:
+            return FetchResult(url=url, status_code=response.status_code)
+        if self.validator_store is not None:
+            self.validator_store.set(
+                request_url,
+                CacheValidators(
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                ),
+            )
+        return FetchResult(
+            url=url, html=html, status_code=response.status_code
+        )
+
+
+class AsyncFetcher:
+    """
+    Fetch many URLs concurrently from asyncio code.
+
+    Requests are executed on a thread pool, so the blocking ``requests``
+    stack is reused while the event loop keeps scheduling. Concurrency is
+    bounded globally and per host, and every request has a connect and a
+    read timeout, so one slow host cannot stall a crawl. Without a
+    ``fetcher``, a pooled Fetcher sized for ``max_per_host`` connections
+    per host is created and closed together with the AsyncFetcher.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_per_host: int = DEFAULT_MAX_PER_HOST,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        fetcher: Optional[Fetcher] = None,
+    ) -> None:
+        if max_concurrency < 1 or max_per_host < 1:
+            raise ValueError("Concurrency limits must be at least 1.")
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self._owns_fetcher = fetcher is None
+        self.fetcher = fetcher or Fetcher(
+            pool_maxsize=max_per_host,
+            connect_timeout=connect_timeout,
+            read_timeout=read_timeout,
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self) -> AsyncFetcher:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._owns_fetcher:
+            self.fetcher.close()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="bluescraper-fetch",
+            )
+        return self._executor
+
+    def _get_semaphores(
+        self, url: str
+    ) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        # Semaphores are bound to the loop they are first used in.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._host_semaphores = {}
+        host = get_host(url)
+        if host not in self._host_semaphores:
+            self._host_semaphores[host] = asyncio.Semaphore(self.max_per_host)
+        return self._semaphore, self._host_semaphores[host]
+
+    async def fetch_result(
+        self, url: str, request_params: Optional[dict] = None
+    ) -> FetchResult:
+        """
+        Fetch a single URL with the Fetcher, see ``Fetcher.fetch``.
+
+        Failed requests, e.g. because a timeout was exceeded, result in a
+        FetchResult without html and status code.
+        """
+        semaphore, host_semaphore = self._get_semaphores(url)
+        loop = asyncio.get_running_loop()
+        async with host_semaphore, semaphore:
+            try:
+                return await loop.run_in_executor(
+                    self._get_executor(),
+                    self.fetcher.fetch,
+                    url,
+                    request_params,
+                )
+            except requests.RequestException as e:
+                logger.warning("Fetching %s failed: %s", url, e)
+                return FetchResult(url=url)
+
+    async def fetch(
+        self, url: str, request_params: Optional[dict] = None
+    ) -> Optional[str]:
+        """
+        Fetch a single URL.
+
+        Returns None when the response status is not ok, the page is
+        unchanged or the request failed.
+        """
+        result = await self.fetch_result(url, request_params)
+        return result.html
+
+    async def iter_fetch_results(
+        self,
+        urls: Iterable[str],
+        request_params: Optional[dict] = None,
+    ) -> AsyncIterator[FetchResult]:
+        """
+        Yield a FetchResult per URL in the order the responses complete.
+
+        URLs are consumed lazily, so at most a small multiple of
+        ``max_concurrency`` requests are scheduled at any time.
+        """
+        max_pending = 4 * self.max_concurrency
+        pending: Set[asyncio.Task] = set()
+        url_iterator = iter(urls)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    url = next(url_iterator, None)
+                    if url is None:
+                        exhausted = True
+                        break
+                    pending.add(
+                        asyncio.create_task(
+                            self.fetch_result(url, request_params)
+                        )
+                    )
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def iter_fetch(
+        self,
+        urls: Iterable[str],
+        request_params: Optional[dict] = None,
+    ) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """
+        Yield ``(url, html)`` pairs in the order the responses complete.
+        """
+        async for result in self.iter_fetch_results(urls, request_params):
+            yield result.url, result.html
+
+    async def iter_scrape(
+        self,
+        urls: Iterable[str],
+        config: Config,
+        request_params: Optional[dict] = None,
+        parser: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[str, Optional[List[Scraper.ScraperGroupData]]]]:
+        """
+        Fetch URLs concurrently and extract them with ``config``.
+
+        Yields ``(url, results)`` pairs, where results is None when the
+        page could not be fetched or did not pass validation. Pages
+        reported as unchanged by a conditional request are not scraped
+        and not yielded.
+        """
+        plan = ExtractionPlan(config.scraping)
+        async for result in self.iter_fetch_results(urls, request_params):
+            url, html = result.url, result.html
+            if result.unchanged:
+                continue
+            if html is None:
+                yield url, None
+                continue
+            scraper = Scraper.from_html(html, config, parser=parser, plan=plan)
+            if scraper.can_scrape():
+                yield url, scraper.extract()
+            else:
+                yield url, None
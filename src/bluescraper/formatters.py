@@ -0,0 +1,87 @@
+"""
+Formatting of extracted values, compiled once per config.
+
+A tag of a scraping config may list formatter steps, applied in order to
+every value extracted for it::
+
+    formatter:
+      - unescape
+      - strip
+      - truncate: 200
+
+``strip`` collapses runs of whitespace into single spaces and removes
+leading and trailing whitespace, ``unescape`` replaces html character
+references left in the text and ``truncate`` cuts values to a maximum
+length. Without steps, values are stripped.
+"""
+
+from __future__ import annotations
+
+import html
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+Formatter = Callable[[str], str]
+FormatterStep = Union[str, Dict[str, Any]]
+
+DEFAULT_FORMATTER_STEPS: List[FormatterStep] = ["strip"]
+
+
+def strip(value: str) -> str:
+    """Collapse whitespace, a single C-level split and join."""
+    return " ".join(value.split())
+
+
+def unescape(value: str) -> str:
+    if "&" not in value:
+        return value
+    return html.unescape(value)
+
+
+def get_truncate(length: Any) -> Formatter:
+    if not isinstance(length, int) or isinstance(length, bool) or length < 0:
+        raise ValueError(
+            f"truncate requires a non-negative length, got {length!r}."
+        )
+
+    def truncate(value: str) -> str:
+        return value[:length]
+
+    return truncate
+
+
+SIMPLE_STEPS: Dict[str, Formatter] = {"strip": strip, "unescape": unescape}
+PARAMETRIZED_STEPS: Dict[str, Callable[[Any], Formatter]] = {
+    "truncate": get_truncate
+}
+
+
+def compile_step(step: FormatterStep) -> Formatter:
+    if isinstance(step, str):
+        if step in SIMPLE_STEPS:
+            return SIMPLE_STEPS[step]
+    elif len(step) == 1:
+        ((name, argument),) = step.items()
+        if name in PARAMETRIZED_STEPS:
+            return PARAMETRIZED_STEPS[name](argument)
+    steps = ", ".join([*SIMPLE_STEPS, *PARAMETRIZED_STEPS])
+    raise ValueError(f"Unknown formatter step {step!r}, choose from {steps}.")
+
+
+def compile_formatter(
+    steps: Optional[Sequence[FormatterStep]] = None,
+) -> Formatter:
+    """Compile formatter steps into a single function."""
+    if steps is None:
+        steps = DEFAULT_FORMATTER_STEPS
+    functions = tuple(compile_step(step) for step in steps)
+    if not functions:
+        return str
+    if len(functions) == 1:
+        return functions[0]
+
+    def formatter(value: str) -> str:
+        for function in functions:
+            value = function(value)
+        return value
+
+    return formatter
@@ -0,0 +1,349 @@
+"""
+Emit only records that were not seen in earlier runs.
+
+Every record is reduced to a 64-bit fingerprint of its source, group id
+and values. Whitespace in values is collapsed first, so records differing
+only in whitespace count as duplicates, and a changed value results in a
+new fingerprint, so changed records are emitted again. Differences in case
+are ignored only with ``casefold``.
+
+Fingerprints are kept in a seen store with a time to live, which is
+refreshed whenever a record is seen again. Records still listed on a
+polled page therefore never expire, while the store stays bounded by the
+records seen within the time to live:
+
+- BloomFilterSeenStore keeps a few fixed-size Bloom filters in memory,
+  at the cost of a small rate of new records taken for seen ones.
+- SqliteSeenStore keeps exact fingerprints in an on-disk index.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import (
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from bluescraper.plan import GroupRecord
+from bluescraper.scraper import Scraper
+
+DEFAULT_TTL = 90 * 24 * 3600.0
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.001
+DEFAULT_GENERATIONS = 4
+SEEN_DB_NAME = "seen.sqlite"
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def normalize_value(value: object, casefold: bool = False) -> object:
+    if isinstance(value, str):
+        value = " ".join(value.split())
+        return value.casefold() if casefold else value
+    if isinstance(value, list):
+        # Records of nested groups.
+        return [
+            [
+                [field, normalize_value(record[field], casefold)]
+                for field in sorted(record)
+            ]
+            for record in value
+        ]
+    return value
+
+
+def get_record_fingerprint(
+    source: str,
+    group_id: Optional[str],
+    record: dict,
+    fields: Optional[Sequence[str]] = None,
+    casefold: bool = False,
+) -> int:
+    """
+    Signed 64-bit fingerprint of a record, fitting a SQLite integer.
+
+    Only ``fields`` are considered if given, e.g. to ignore a timestamp.
+    With ``casefold``, values differing only in case are equal. BLAKE2b is
+    used as it is faster than SHA-1 for short inputs.
+    """
+    if fields is None:
+        fields = sorted(record)
+    values = [normalize_value(record.get(field), casefold) for field in fields]
+    canonical = json.dumps(
+        [source, group_id, list(fields), values],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    digest = hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def mix64(value: int) -> int:
+    """Spread the bits of an integer, the finalizer of SplitMix64."""
+    value &= MASK64
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & MASK64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & MASK64
+    return value ^ (value >> 31)
+
+
+class SeenStore(ABC):
+    """Set of record fingerprints with a time to live."""
+
+    @abstractmethod
+    def add(self, fingerprint: int) -> bool:
+        """
+        Mark a fingerprint as seen now and return whether it was new,
+        i.e. not seen within the time to live.
+        """
+
+    def flush(self) -> None:
+        """Persist the fingerprints added so far, if the store can."""
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> SeenStore:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class BloomFilter:
+    """
+    Fixed-size set of integers with false positives but no false
+    negatives, sized for ``capacity`` items at ``error_rate``.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        error_rate: float = DEFAULT_ERROR_RATE,
+    ) -> None:
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError(
+                "capacity must be positive and error_rate between 0 and 1."
+            )
+        self.num_bits = max(
+            8,
+            math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2),
+        )
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, item: int) -> Iterator[int]:
+        # Double hashing with the halves of the mixed 64-bit item.
+        item = mix64(item)
+        first, second = item & 0xFFFFFFFF, (item >> 32) | 1
+        for index in range(self.num_hashes):
+            yield (first + index * second) % self.num_bits
+
+    def __contains__(self, item: int) -> bool:
+        bits = self.bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def add(self, item: int) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+
+class BloomFilterSeenStore(SeenStore):
+    """
+    Seen store of rotating Bloom filters, bounded in memory.
+
+    Time is split into ``generations`` periods per ``ttl``, each with its
+    own filter, sized for ``capacity`` records. Records are added to the
+    filter of the current period and filters are dropped once their
+    period ended more than ``ttl`` ago. With a ``file_path``, the filters
+    are loaded from and saved to that file.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_TTL,
+        capacity: int = DEFAULT_CAPACITY,
+        error_rate: float = DEFAULT_ERROR_RATE,
+        generations: int = DEFAULT_GENERATIONS,
+        file_path: Optional[Union[str, os.PathLike]] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if generations < 1:
+            raise ValueError("generations must be at least 1.")
+        self.ttl = ttl
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.period = ttl / generations
+        self.file_path = file_path
+        self.clock = clock
+        self.filters: Deque[Tuple[float, BloomFilter]] = deque()
+        self._lock = threading.Lock()
+        if file_path is not None and os.path.exists(file_path):
+            with open(file_path, "rb") as f:
+                self.filters = pickle.load(f)
+
+    def _rotate(self, now: float) -> BloomFilter:
+        while self.filters and self.filters[0][0] + self.period <= (
+            now - self.ttl
+        ):
+            self.filters.popleft()
+        if not self.filters or now - self.filters[-1][0] >= self.period:
+            self.filters.append(
+                (now, BloomFilter(self.capacity, self.error_rate))
+            )
+        return self.filters[-1][1]
+
+    def add(self, fingerprint: int) -> bool:
+        with self._lock:
+            current = self._rotate(self.clock())
+            new = not any(
+                fingerprint in bloom_filter for _, bloom_filter in self.filters
+            )
+            current.add(fingerprint)
+            return new
+
+    def flush(self) -> None:
+        if self.file_path is None:
+            return
+        with self._lock:
+            directory = os.path.dirname(os.fspath(self.file_path)) or "."
+            tmp_path = os.path.join(
+                directory, f".{os.path.basename(self.file_path)}.tmp"
+            )
+            with open(tmp_path, "wb") as f:
+                pickle.dump(self.filters, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.file_path)
+
+
+class SqliteSeenStore(SeenStore):
+    """
+    Exact seen store in a SQLite database, bounded by deleting
+    fingerprints not seen within ``ttl`` seconds on every flush.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, os.PathLike]] = None,
+        ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl = ttl
+        self.clock = clock
+        if directory is None:
+            db_path = ":memory:"
+        else:
+            os.makedirs(directory, exist_ok=True)
+            db_path = os.path.join(directory, SEEN_DB_NAME)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS seen"
+            " (fingerprint INTEGER PRIMARY KEY, seen_at REAL NOT NULL)"
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def add(self, fingerprint: int) -> bool:
+        now = self.clock()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT seen_at FROM seen WHERE fingerprint = ?",
+                (fingerprint,),
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO seen (fingerprint, seen_at)"
+                " VALUES (?, ?)",
+                (fingerprint, now),
+            )
+            return row is None or row[0] < now - self.ttl
+
+    def flush(self) -> None:
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM seen WHERE seen_at < ?",
+                (self.clock() - self.ttl,),
+            )
+            self._db.commit()
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+
+class NewRecordFilter:
+    """
+    Pass only the records of a source not seen before.
+
+    Parameters
+    ----------
+    seen_store : SeenStore
+        Fingerprints of the records seen so far.
+    fields : Sequence[str], optional
+        Fields identifying a record, by default all fields.
+    casefold : bool, optional
+        Take records differing only in case for seen ones, by default
+        False.
+    """
+
+    def __init__(
+        self,
+        seen_store: SeenStore,
+        fields: Optional[Sequence[str]] = None,
+        casefold: bool = False,
+    ) -> None:
+        self.seen_store = seen_store
+        self.fields = fields
+        self.casefold = casefold
+
+    def is_new(
+        self, source: str, group_id: Optional[str], record: dict
+    ) -> bool:
+        fingerprint = get_record_fingerprint(
+            source, group_id, record, self.fields, self.casefold
+        )
+        return self.seen_store.add(fingerprint)
+
+    def filter(
+        self, source: str, group_records: Iterable[GroupRecord]
+    ) -> Iterator[GroupRecord]:
+        """Filter the ``(group_id, record)`` pairs of iter_extract."""
+        for group_id, record in group_records:
+            if self.is_new(source, group_id, record):
+                yield group_id, record
+
+    def filter_results(
+        self, source: str, results: List[Scraper.ScraperGroupData]
+    ) -> List[Scraper.ScraperGroupData]:
+        """Filter the result of ``Scraper.extract``."""
+        return [
+            Scraper.ScraperGroupData(
+                group_id=group_data.group_id,
+                results=[
+                    record
+                    for record in group_data.results
+                    if self.is_new(source, group_data.group_id, record)
+                ],
+            )
+            for group_data in results
+        ]
@@ -0,0 +1,333 @@
+"""
+Timings and counts of the scraping hot paths.
+
+Fetching, parsing, validating and extracting report their duration as
+``stage_seconds`` observations labelled with the stage. Extraction also
+reports the duration per tag as ``tag_seconds`` and the number of matched
+elements per tag as ``tag_matches``.
+
+Measurements are passed to the sinks registered with ``add_sink``, e.g. a
+HistogramSink, which keeps them in memory, a PrometheusSink, which renders
+them in the Prometheus text format, or a LoggingSink. Without sinks,
+instrumentation is disabled and timers do not read the clock.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+STAGE_SECONDS = "stage_seconds"
+TAG_SECONDS = "tag_seconds"
+TAG_MATCHES = "tag_matches"
+# Upper bounds of the histogram buckets in seconds.
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+MetricKey = Tuple[str, Labels]
+
+
+class Sink(ABC):
+    """Receiver of the measurements of the instrumented code."""
+
+    @abstractmethod
+    def observe(self, metric: str, value: float, labels: Labels) -> None:
+        """Record a duration or other sampled value."""
+
+    @abstractmethod
+    def increment(self, metric: str, amount: float, labels: Labels) -> None:
+        """Add ``amount`` to a counter."""
+
+
+# Registered sinks, replaced as a whole so emitting needs no lock.
+_sinks: Tuple[Sink, ...] = ()
+_sinks_lock = threading.Lock()
+
+
+def add_sink(sink: Sink) -> None:
+    global _sinks  # pylint: disable=global-statement
+    with _sinks_lock:
+        _sinks = _sinks + (sink,)
+
+
+def remove_sink(sink: Sink) -> None:
+    global _sinks  # pylint: disable=global-statement
+    with _sinks_lock:
+        _sinks = tuple(s for s in _sinks if s is not sink)
+
+
+def is_enabled() -> bool:
+    return bool(_sinks)
+
+
+@contextmanager
+def instrumented(*sinks: Sink) -> Iterator[None]:
+    """Register sinks for the duration of a with block."""
+    for sink in sinks:
+        add_sink(sink)
+    try:
+        yield
+    finally:
+        for sink in sinks:
+            remove_sink(sink)
+
+
+def get_labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def observe(metric: str, value: float, **labels: str) -> None:
+    sinks = _sinks
+    if sinks:
+        label_items = get_labels(labels)
+        for sink in sinks:
+            sink.observe(metric, value, label_items)
+
+
+def increment(metric: str, amount: float = 1, **labels: str) -> None:
+    sinks = _sinks
+    if sinks:
+        label_items = get_labels(labels)
+        for sink in sinks:
+            sink.increment(metric, amount, label_items)
+
+
+class Timer:
+    """Context manager observing the duration of its with block."""
+
+    __slots__ = ("metric", "labels", "start")
+
+    def __init__(self, metric: str, labels: Dict[str, str]) -> None:
+        self.metric = metric
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> Timer:
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        observe(self.metric, time.perf_counter() - self.start, **self.labels)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> _NullTimer:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(metric: str, **labels: str) -> Union[Timer, _NullTimer]:
+    """Time a with block, a shared no-op when instrumentation is off."""
+    if not _sinks:
+        return _NULL_TIMER
+    return Timer(metric, labels)
+
+
+def stage_timer(stage: str) -> Union[Timer, _NullTimer]:
+    """Time a with block as one of the stages of scraping a page."""
+    if not _sinks:
+        return _NULL_TIMER
+    return Timer(STAGE_SECONDS, {"stage": stage})
+
+
+@dataclass
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets.
+
+    ``counts[i]`` is the number of values up to ``buckets[i]`` and above
+    the previous bucket, the last count is for values above all buckets.
+    """
+
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    counts: List[int] = field(default_factory=list)
+    count: int = 0
+    sum: float = 0.0
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def mean(self) -> Optional[float]:
+        if not self.count:
+            return None
+        return self.sum / self.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket containing the ``q`` quantile."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for bucket, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return bucket
+        return self.max
+
+
+class HistogramSink(Sink):
+    """Keep histograms and counters per metric and labels in memory."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.histograms: Dict[MetricKey, Histogram] = {}
+        self.counters: Dict[MetricKey, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, metric: str, value: float, labels: Labels) -> None:
+        with self._lock:
+            histogram = self.histograms.get((metric, labels))
+            if histogram is None:
+                histogram = Histogram(self.buckets)
+                self.histograms[(metric, labels)] = histogram
+            histogram.observe(value)
+
+    def increment(self, metric: str, amount: float, labels: Labels) -> None:
+        with self._lock:
+            key = (metric, labels)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def get_histogram(self, metric: str, **labels: str) -> Optional[Histogram]:
+        return self.histograms.get((metric, get_labels(labels)))
+
+    def get_counter(self, metric: str, **labels: str) -> float:
+        return self.counters.get((metric, get_labels(labels)), 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    formatted = (
+        f'{name}="{escape_label_value(value)}"' for name, value in labels
+    )
+    return "{" + ",".join(formatted) + "}"
+
+
+class PrometheusSink(HistogramSink):
+    """
+    In-memory histograms and counters in the Prometheus text format.
+
+    ``render`` returns the exposition text, e.g. to serve it on a metrics
+    endpoint, and ``write`` stores it in a file for the textfile collector
+    of the node exporter.
+    """
+
+    def __init__(
+        self,
+        namespace: str = "bluescraper",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(buckets)
+        self.namespace = namespace
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+        typed = set()
+        for (metric, labels), histogram in histograms:
+            name = f"{self.namespace}_{metric}"
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bucket, bucket_count in zip(
+                histogram.buckets, histogram.counts
+            ):
+                cumulative += bucket_count
+                bucket_labels = labels + (("le", repr(bucket)),)
+                lines.append(
+                    f"{name}_bucket{format_labels(bucket_labels)} {cumulative}"
+                )
+            inf_labels = labels + (("le", "+Inf"),)
+            lines.append(
+                f"{name}_bucket{format_labels(inf_labels)} {histogram.count}"
+            )
+            lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum}")
+            lines.append(
+                f"{name}_count{format_labels(labels)} {histogram.count}"
+            )
+        for (metric, labels), value in counters:
+            name = f"{self.namespace}_{metric}_total"
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, file_path: Union[str, os.PathLike]) -> None:
+        """Write the metrics to a file, replacing it atomically."""
+        directory = os.path.dirname(os.fspath(file_path)) or "."
+        with tempfile.NamedTemporaryFile(
+            "w", dir=directory, delete=False, encoding="utf-8"
+        ) as f:
+            f.write(self.render())
+        os.replace(f.name, file_path)
+
+
+class LoggingSink(Sink):
+    """Log every measurement, by default at debug level."""
+
+    def __init__(
+        self, logger: Optional[logging.Logger] = None, level=logging.DEBUG
+    ) -> None:
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def observe(self, metric: str, value: float, labels: Labels) -> None:
+        self.logger.log(
+            self.level, "%s%s %.6f", metric, format_labels(labels), value
+        )
+
+    def increment(self, metric: str, amount: float, labels: Labels) -> None:
+        self.logger.log(
+            self.level, "%s%s +%s", metric, format_labels(labels), amount
+        )
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+from bluescraper.nodes import MULTI_VALUED_ATTRIBUTES, Node
+
+
+@dataclass(frozen=True)
+class TagMatcher:
+    """
+    Predicate matching elements by tag name, compiled from a TagDefinition.
+
+    Matchers follow the rules of ``soup.find_all(name=..., attrs=...)``
+    but interpret the definition only once. Subclasses specialize in
+    common definitions; use ``compile_matcher`` to pick the right one.
+    """
+
+    name: Optional[str] = None
+
+    def __call__(self, node: Node) -> bool:
+        return self.name is None or node.name == self.name
+
+
+@dataclass(frozen=True)
+class ClassMatcher(TagMatcher):
+    """Matches elements carrying a single class, e.g. ``{"class": "a"}``."""
+
+    class_name: str = ""
+
+    def __call__(self, node: Node) -> bool:
+        if self.name is not None and node.name != self.name:
+            return False
+        return self.class_name in node.get_list("class")
+
+
+@dataclass(frozen=True)
+class AttributeMatcher(TagMatcher):
+    """
+    Matches elements by any combination of attributes.
+
+    ``attrs`` holds ``(attribute, expected value, multi-valued)`` triples.
+    Multi-valued attributes match on one of their values or on the whole
+    space separated value.
+    """
+
+    attrs: Tuple[Tuple[str, str, bool], ...] = ()
+
+    def __call__(self, node: Node) -> bool:
+        if self.name is not None and node.name != self.name:
+            return False
+        for attribute, expected, multi_valued in self.attrs:
+            value = node.get(attribute)
+            if value is None:
+                return False
+            if multi_valued:
+                if value != expected and expected not in value.split():
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+
+def compile_matcher(
+    name: Optional[str], attrs: Optional[Dict[str, str]]
+) -> TagMatcher:
+    if not attrs:
+        return TagMatcher(name=name)
+    if len(attrs) == 1 and "class" in attrs:
+        class_name = attrs["class"]
+        if class_name.split() == [class_name]:
+            return ClassMatcher(name=name, class_name=class_name)
+    return AttributeMatcher(
+        name=name,
+        attrs=tuple(
+            (attribute, expected, attribute in MULTI_VALUED_ATTRIBUTES)
+            for attribute, expected in attrs.items()
+        ),
+    )
+
+
+class MatcherIndex:
+    """
+    Find the matchers, out of many, matching an element.
+
+    Matchers are indexed by the class they require, else by tag name, so
+    an element is only checked against matchers that can match it. Equal
+    matchers, e.g. of the same tag definition in several configs, are
+    checked once.
+    """
+
+    def __init__(self) -> None:
+        self.by_class: Dict[str, Set[TagMatcher]] = {}
+        self.by_name: Dict[str, Set[TagMatcher]] = {}
+        self.any_element: Set[TagMatcher] = set()
+
+    def add(self, matcher: TagMatcher) -> None:
+        if isinstance(matcher, ClassMatcher):
+            self.by_class.setdefault(matcher.class_name, set()).add(matcher)
+        elif matcher.name is not None:
+            self.by_name.setdefault(matcher.name, set()).add(matcher)
+        else:
+            self.any_element.add(matcher)
+
+    def match(self, node: Node) -> Set[TagMatcher]:
+        matched = {matcher for matcher in self.any_element if matcher(node)}
+        candidates = self.by_name.get(node.name)
+        if candidates:
+            matched.update(matcher for matcher in candidates if matcher(node))
+        if self.by_class:
+            for class_name in node.get_list("class"):
+                candidates = self.by_class.get(class_name)
+                if candidates:
+                    matched.update(
+                        matcher for matcher in candidates if matcher(node)
+                    )
+        return matched
@@ -0,0 +1,197 @@
+"""
+Apply many configs to one parsed document.
+
+Sites with several page layouts need one config per layout. Instead of
+a Scraper per config, each traversing the document again, a MultiPlan
+indexes the tag definitions of all configs and dispatches every element
+only to the configs with a definition matching it. The validation config
+of every config decides whether it applies to the document, and the
+group matches of all applicable configs are collected in the same
+traversal.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, Union
+
+from bluescraper.config import Config
+from bluescraper.instrumentation import stage_timer
+from bluescraper.matchers import MatcherIndex, TagMatcher
+from bluescraper.nodes import START, Node, as_node, parse_html, walk
+from bluescraper.plan import ExtractionPlan, GroupMatch, sort_group_matches
+from bluescraper.scraper import ErrorPolicy, Scraper
+from bluescraper.validation import ValidationPlan
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+
+class MultiPlan:
+    """
+    Extraction and validation plans of many configs with a shared index
+    of their tag definitions.
+
+    An element is only checked against the definitions that can match
+    it, and only the configs using one of the matching definitions
+    process it, so the cost of a traversal grows with the number of
+    matches rather than with the number of configs.
+    """
+
+    def __init__(self, configs: Sequence[Config]) -> None:
+        self.configs = list(configs)
+        self.plans = [ExtractionPlan(config.scraping) for config in configs]
+        self.validation_plans: List[Optional[ValidationPlan]] = [
+            ValidationPlan(config.validation) if config.validation else None
+            for config in configs
+        ]
+        self.index = MatcherIndex()
+        self.config_indexes: Dict[TagMatcher, List[int]] = {}
+        for config_index, plan in enumerate(self.plans):
+            matchers = {matcher for _, matcher in plan.tag_matchers}
+            matchers.update(matcher for _, matcher in plan.group_matchers)
+            validation_plan = self.validation_plans[config_index]
+            if validation_plan is not None:
+                matchers.update(validation_plan.tag_matchers)
+                matchers.update(
+                    matcher for matcher, _ in validation_plan.string_checks
+                )
+            for matcher in matchers:
+                self.index.add(matcher)
+                self.config_indexes.setdefault(matcher, []).append(
+                    config_index
+                )
+
+    def __len__(self) -> int:
+        return len(self.configs)
+
+    def matching_configs(self, element: Node) -> Set[int]:
+        """Indexes of the configs with a tag definition matching element."""
+        config_indexes: Set[int] = set()
+        for matcher in self.index.match(element):
+            config_indexes.update(self.config_indexes[matcher])
+        return config_indexes
+
+    def run(self, document: Node) -> Dict[int, List[GroupMatch]]:
+        """
+        Validate a document against all configs and collect the group
+        matches of the configs it is valid for.
+
+        Returns the group matches, as ``ExtractionPlan.run`` does, by the
+        index of every applicable config. Configs are dropped from the
+        traversal as soon as the document is known to be invalid for
+        them.
+        """
+        validation_runs = {
+            config_index: validation_plan.start_run()
+            for config_index, validation_plan in enumerate(
+                self.validation_plans
+            )
+            if validation_plan is not None
+        }
+        plan_runs = {
+            config_index: plan.start_run(document)
+            for config_index, plan in enumerate(self.plans)
+        }
+        group_matches: Dict[int, List[GroupMatch]] = {
+            config_index: [] for config_index in plan_runs
+        }
+        # Configs with open group elements, which need END events.
+        grouping: Set[int] = set()
+        for event, element in walk(document):
+            if event is START:
+                for config_index in self.matching_configs(element):
+                    plan_run = plan_runs.get(config_index)
+                    if plan_run is None:
+                        continue
+                    validation_run = validation_runs.get(config_index)
+                    if (
+                        validation_run is not None
+                        and validation_run.start(element) is False
+                    ):
+                        del plan_runs[config_index]
+                        grouping.discard(config_index)
+                        continue
+                    plan_run.start(element)
+                    if plan_run.active:
+                        grouping.add(config_index)
+                if not plan_runs:
+                    break
+            elif grouping:
+                for config_index in list(grouping):
+                    plan_run = plan_runs[config_index]
+                    group_matches[config_index].extend(plan_run.end(element))
+                    if not plan_run.active:
+                        grouping.discard(config_index)
+        results = {}
+        for config_index, plan_run in plan_runs.items():
+            validation_run = validation_runs.get(config_index)
+            if validation_run is not None and not validation_run.finish():
+                continue
+            matches = group_matches[config_index]
+            matches.extend(plan_run.finish())
+            results[config_index] = sort_group_matches(matches)
+        return results
+
+
+class MultiScraper:
+    """
+    Scrape a parsed html document with every config that applies to it.
+
+    Configs are referred to by their index in ``configs``. A MultiPlan
+    can be passed instead of being compiled for every document.
+    """
+
+    def __init__(
+        self,
+        soup: Union[Node, BeautifulSoup],
+        configs: Sequence[Config] = (),
+        plan: Optional[MultiPlan] = None,
+    ) -> None:
+        self.soup = soup
+        self.document = as_node(soup)
+        self.plan = plan or MultiPlan(configs)
+        self.group_matches: Optional[Dict[int, List[GroupMatch]]] = None
+
+    @classmethod
+    def from_html(
+        cls,
+        html: str,
+        configs: Sequence[Config] = (),
+        parser: Optional[str] = None,
+        plan: Optional[MultiPlan] = None,
+    ) -> MultiScraper:
+        document = parse_html(html, parser)
+        return cls(document, configs, plan=plan)
+
+    def applicable_configs(self) -> List[int]:
+        """Indexes of the configs the document passes validation for."""
+        if self.group_matches is None:
+            with stage_timer("match"):
+                self.group_matches = self.plan.run(self.document)
+        return list(self.group_matches)
+
+    def get_scraper(self, config_index: int) -> Scraper:
+        """
+        Scraper of an applicable config, reusing the group matches of the
+        shared traversal.
+        """
+        if config_index not in self.applicable_configs():
+            raise ValueError(
+                f"Config {config_index} does not apply to the document."
+            )
+        scraper = Scraper(
+            self.document,
+            self.plan.configs[config_index],
+            plan=self.plan.plans[config_index],
+        )
+        scraper.group_matches = self.group_matches[config_index]
+        return scraper
+
+    def extract(
+        self, on_error: Union[ErrorPolicy, str] = ErrorPolicy.RAISE
+    ) -> Dict[int, List[Scraper.ScraperGroupData]]:
+        """Extract the records of every applicable config by its index."""
+        return {
+            config_index: self.get_scraper(config_index).extract(on_error)
+            for config_index in self.applicable_configs()
+        }
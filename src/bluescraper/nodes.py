@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, Iterator, List, Optional, Tuple, Union
+
+from bluescraper.instrumentation import stage_timer
+
+if TYPE_CHECKING:
+    from bs4 import Tag
+
+    from bluescraper.utils import TagDefinition
+
+DEFAULT_PARSER = "html.parser"
+BS4_PARSERS = ("html.parser", "lxml", "html5lib")
+LXML_PARSER = "lxml.html"
+PARSERS = BS4_PARSERS + (LXML_PARSER,)
+
+# Attributes holding a space separated list of values, as in bs4.
+MULTI_VALUED_ATTRIBUTES = frozenset(
+    {"class", "rel", "rev", "accept-charset", "headers", "accesskey"}
+)
+# Elements whose content is not part of the text of their ancestors.
+NON_TEXT_TAGS = frozenset({"script", "style", "template"})
+
+START = "start"
+END = "end"
+
+
+class Node(ABC):
+    """
+    Element of a parsed html document, independent of the parser engine.
+
+    Scraping and validation only use this interface, so documents parsed
+    by BeautifulSoup and by lxml can be processed by the same code. Values
+    of multi-valued attributes such as ``class`` are returned as one space
+    separated string.
+    """
+
+    __slots__ = ()
+
+    @property
+    @abstractmethod
+    def name(self) -> str:
+        """Tag name of the element."""
+
+    @property
+    @abstractmethod
+    def element(self) -> Any:
+        """The wrapped element of the parser engine."""
+
+    @abstractmethod
+    def get(self, attribute: str) -> Optional[str]:
+        """Value of an attribute or None, if the attribute is missing."""
+
+    def get_list(self, attribute: str) -> List[str]:
+        """Values of a multi-valued attribute, empty if it is missing."""
+        value = self.get(attribute)
+        if value is None:
+            return []
+        return value.split()
+
+    @abstractmethod
+    def children(self) -> Iterator[Node]:
+        """Child elements in document order, without text nodes."""
+
+    @abstractmethod
+    def iter_strings(self) -> Iterator[str]:
+        """Text pieces of the element and its descendants."""
+
+    def get_text(self, strip: bool = False) -> str:
+        if strip:
+            return "".join(
+                string.strip()
+                for string in self.iter_strings()
+                if string.strip()
+            )
+        return "".join(self.iter_strings())
+
+    def find_all(self, tag_definition: TagDefinition) -> List[Node]:
+        return [
+            node
+            for event, node in walk(self)
+            if event is START and matches_tag_definition(node, tag_definition)
+        ]
+
+    def find(self, tag_definition: TagDefinition) -> Optional[Node]:
+        for event, node in walk(self):
+            if event is START and matches_tag_definition(node, tag_definition):
+                return node
+        return None
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Node):
+            return self.element is other.element
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return id(self.element)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class BeautifulSoupNode(Node):
+    __slots__ = ("tag",)
+
+    def __init__(self, tag: Tag) -> None:
+        self.tag = tag
+
+    @property
+    def name(self) -> str:
+        return self.tag.name
+
+    @property
+    def element(self) -> Tag:
+        return self.tag
+
+    def get(self, attribute: str) -> Optional[str]:
+        value = self.tag.get(attribute)
+        if isinstance(value, list):
+            return " ".join(value)
+        return value
+
+    def get_list(self, attribute: str) -> List[str]:
+        value = self.tag.get(attribute)
+        if isinstance(value, list):
+            return value
+        if value is None:
+            return []
+        return value.split()
+
+    def children(self) -> Iterator[Node]:
+        # bs4 is imported lazily, it is loaded once a BeautifulSoupNode
+        # exists.
+        from bs4 import Tag  # pylint: disable=import-outside-toplevel
+
+        for child in self.tag.children:
+            if isinstance(child, Tag):
+                yield BeautifulSoupNode(child)
+
+    def iter_strings(self) -> Iterator[str]:
+        return iter(self.tag.strings)
+
+    def get_text(self, strip: bool = False) -> str:
+        return self.tag.get_text(strip=strip)
+
+
+class LxmlNode(Node):
+    """
+    Node backed by an ``lxml.html`` element, without any bs4 tree.
+
+    Comments and processing instructions are skipped, and the content of
+    ``script``, ``style`` and ``template`` elements is excluded from the
+    text of their ancestors, matching the output of bs4's ``get_text``.
+    """
+
+    __slots__ = ("_element",)
+
+    def __init__(self, element: Any) -> None:
+        self._element = element
+
+    @property
+    def name(self) -> str:
+        return self._element.tag
+
+    @property
+    def element(self) -> Any:
+        return self._element
+
+    def get(self, attribute: str) -> Optional[str]:
+        value = self._element.get(attribute)
+        if value is not None and attribute in MULTI_VALUED_ATTRIBUTES:
+            return " ".join(value.split())
+        return value
+
+    def children(self) -> Iterator[Node]:
+        for child in self._element:
+            if isinstance(child.tag, str):
+                yield LxmlNode(child)
+
+    def get_text(self, strip: bool = False) -> str:
+        element = self._element
+        if (
+            strip
+            or next(element.iterdescendants(*NON_TEXT_TAGS), None) is not None
+        ):
+            return super().get_text(strip=strip)
+        # Without elements to exclude, the text serializer of lxml
+        # collects the text in C, an order of magnitude faster.
+        from lxml import etree  # pylint: disable=import-outside-toplevel
+
+        return etree.tostring(
+            element, method="text", encoding="unicode", with_tail=False
+        )
+
+    def iter_strings(self) -> Iterator[str]:
+        top = self._element
+        if top.text:
+            yield top.text
+        stack: List[Tuple[Iterator[Any], Optional[str]]] = [(iter(top), None)]
+        while stack:
+            children, tail = stack[-1]
+            for child in children:
+                if (
+                    isinstance(child.tag, str)
+                    and child.tag not in NON_TEXT_TAGS
+                ):
+                    if child.text:
+                        yield child.text
+                    stack.append((iter(child), child.tail))
+                    break
+                if child.tail:
+                    yield child.tail
+            else:
+                stack.pop()
+                if tail:
+                    yield tail
+
+
+class LxmlDocument(LxmlNode):
+    """Root of an ``lxml.html`` document, the parent of the html element."""
+
+    __slots__ = ()
+
+    @property
+    def name(self) -> str:
+        return "[document]"
+
+    def get(self, attribute: str) -> Optional[str]:
+        return None
+
+    def children(self) -> Iterator[Node]:
+        yield LxmlNode(self._element)
+
+    def iter_strings(self) -> Iterator[str]:
+        return LxmlNode(self._element).iter_strings()
+
+
+def as_node(soup: Union[Node, Tag]) -> Node:
+    """Wrap a bs4 tag or soup into a Node, nodes are returned unchanged."""
+    if isinstance(soup, Node):
+        return soup
+    return BeautifulSoupNode(soup)
+
+
+def parse_html(html: str, parser: Optional[str] = None) -> Node:
+    """
+    Parse html with the given parser engine.
+
+    ``html.parser``, ``lxml`` and ``html5lib`` build a BeautifulSoup tree
+    with the respective tree builder. ``lxml.html`` parses with lxml only,
+    which skips building the bs4 tree altogether. The ``lxml`` and
+    ``html5lib`` engines require the respective optional package.
+    """
+    parser = parser or DEFAULT_PARSER
+    if parser in BS4_PARSERS:
+        from bs4 import (  # pylint: disable=import-outside-toplevel
+            BeautifulSoup,
+        )
+
+        with stage_timer("parse"):
+            return BeautifulSoupNode(BeautifulSoup(html, parser))
+    if parser == LXML_PARSER:
+        try:
+            import lxml.html  # pylint: disable=import-outside-toplevel
+        except ImportError as e:
+            raise ImportError(
+                f"The {LXML_PARSER} parser requires the lxml package."
+            ) from e
+        with stage_timer("parse"):
+            return LxmlDocument(lxml.html.document_fromstring(html))
+    raise ValueError(
+        f"Unknown parser {parser}, choose one of {', '.join(PARSERS)}."
+    )
+
+
+def matches_tag_definition(node: Node, tag_definition: TagDefinition) -> bool:
+    """
+    Check a single element against a tag definition.
+
+    Mirrors the matching rules of ``soup.find_all(name=..., attrs=...)``:
+    a multi-valued attribute such as ``class`` matches when one of its
+    values or the whole space separated value equals the expected string.
+    The check is delegated to the matcher compiled with the definition.
+    """
+    return tag_definition.matcher(node)
+
+
+def walk(root: Union[Node, Tag]) -> Iterator[Tuple[str, Node]]:
+    """
+    Traverse all descendant elements of ``root`` once in document order.
+
+    Yields a ``START`` event when an element is entered and an ``END``
+    event after all of its descendants have been visited. The traversal
+    uses an explicit stack, so deeply nested documents do not hit the
+    recursion limit.
+    """
+    root = as_node(root)
+    stack = [(root, root.children())]
+    while stack:
+        node, children = stack[-1]
+        for child in children:
+            yield START, child
+            stack.append((child, child.children()))
+            break
+        else:
+            stack.pop()
+            if node is not root:
+                yield END, node
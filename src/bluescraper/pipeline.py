@@ -0,0 +1,372 @@
+"""
+Fetch, scrape and write pages with all stages running at once.
+
+A Pipeline connects three stages by bounded queues:
+
+1. fetch: an AsyncFetcher on its own event loop thread downloads pages.
+2. scrape: a pool of processes parses, validates and extracts them.
+3. write: a thread passes the results to a sink, e.g. a RecordWriter.
+
+Network I/O, CPU-bound extraction and writing overlap, and a full queue
+blocks the stage feeding it, so a slow stage throttles the stages before
+it instead of buffering pages without bound. The throughput of every
+stage and the depth of every queue are kept in PipelineStats and
+reported to the instrumentation sinks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import (
+    ALL_COMPLETED,
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
+
+from bluescraper import instrumentation
+from bluescraper.batch import init_worker, scrape_chunk
+from bluescraper.config import Config
+from bluescraper.fetch import AsyncFetcher
+from bluescraper.scraper import Scraper
+from bluescraper.writers import RecordWriter
+
+logger = logging.getLogger(__name__)
+
+PIPELINE_ITEMS = "pipeline_items"
+QUEUE_DEPTH = "queue_depth"
+FETCH, SCRAPE, WRITE = "fetch", "scrape", "write"
+# Interval in seconds at which blocked stages check for failures.
+POLL_INTERVAL = 0.1
+
+# Marks the end of the items of a queue.
+_DONE = object()
+
+
+def get_mp_context() -> multiprocessing.context.BaseContext:
+    # Forking a process running the stage threads may deadlock the child.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+class PipelineAborted(Exception):
+    """Raised in a stage when another stage has failed."""
+
+
+@dataclass
+class PageResult:
+    """
+    Outcome of one page of a pipeline.
+
+    ``results`` is None when the page could not be fetched, did not pass
+    validation or scraping it failed with ``error``, the repr of the
+    exception.
+    """
+
+    url: str
+    status_code: Optional[int] = None
+    valid: bool = False
+    results: Optional[List[Scraper.ScraperGroupData]] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class StageStats:
+    items: int = 0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Items per second since the stage started."""
+        elapsed = self.elapsed
+        return self.items / elapsed if elapsed else 0.0
+
+
+@dataclass
+class QueueStats:
+    maxsize: int
+    depth: int = 0
+    max_depth: int = 0
+
+
+@dataclass
+class PipelineStats:
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+    queues: Dict[str, QueueStats] = field(default_factory=dict)
+    unchanged: int = 0
+    failed: int = 0
+
+    def format(self) -> str:
+        parts = [
+            f"{name} {stage.items} ({stage.throughput:.1f}/s)"
+            for name, stage in self.stages.items()
+        ]
+        parts.extend(
+            f"{name} queue {stats.depth}/{stats.maxsize}"
+            f" (max {stats.max_depth})"
+            for name, stats in self.queues.items()
+        )
+        return ", ".join(parts)
+
+
+Sink = Union[RecordWriter, Callable[[PageResult], Any]]
+
+
+class Pipeline:
+    """
+    Fetch URLs, scrape them with a config and pass the results to a sink.
+
+    Parameters
+    ----------
+    config : Config
+        Configuration applied to every page.
+    sink : Union[RecordWriter, Callable[[PageResult], Any]]
+        Receives every PageResult on the writer thread. The records of a
+        RecordWriter sink are written with their group id, pages without
+        records are skipped.
+    fetcher : AsyncFetcher, optional
+        Fetcher of the pages, by default an AsyncFetcher with default
+        limits, which is closed when the pipeline finishes.
+    max_workers : int, optional
+        Number of scraping processes, by default the number of CPUs.
+    queue_size : int, optional
+        Capacity of the queues between the stages, by default twice the
+        number of scraping processes.
+    request_params : dict, optional
+        Query parameters of every request.
+    parser : str, optional
+        Parser engine, by default the parser of the config.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        sink: Sink,
+        fetcher: Optional[AsyncFetcher] = None,
+        max_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        request_params: Optional[dict] = None,
+        parser: Optional[str] = None,
+    ) -> None:
+        self.config = config
+        self.sink = sink
+        self._owns_fetcher = fetcher is None
+        self.fetcher = fetcher
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_size = queue_size or 2 * self.max_workers
+        self.request_params = request_params
+        self.parser = parser
+        self.stats = PipelineStats()
+        self._queues: Dict[str, queue.Queue] = {}
+        self._aborted = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def run(self, urls: Iterable[str]) -> PipelineStats:
+        """
+        Process all URLs and return the statistics once every result has
+        been passed to the sink. Errors of a stage stop the pipeline and
+        are raised here.
+        """
+        self.stats = PipelineStats(
+            stages={name: StageStats() for name in (FETCH, SCRAPE, WRITE)}
+        )
+        self._queues = {
+            name: queue.Queue(maxsize=self.queue_size)
+            for name in (FETCH, SCRAPE)
+        }
+        for name in self._queues:
+            self.stats.queues[name] = QueueStats(maxsize=self.queue_size)
+        self._aborted.clear()
+        self._errors = []
+        threads = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(FETCH, self._fetch_stage, urls),
+                name="bluescraper-pipeline-fetch",
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(SCRAPE, self._scrape_stage),
+                name="bluescraper-pipeline-scrape",
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(WRITE, self._write_stage),
+                name="bluescraper-pipeline-write",
+            ),
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except BaseException:
+            self._aborted.set()
+            for thread in threads:
+                thread.join()
+            raise
+        if self._errors:
+            raise self._errors[0]
+        return self.stats
+
+    def _run_stage(self, name: str, stage: Callable, *args) -> None:
+        stats = self.stats.stages[name]
+        stats.started = time.monotonic()
+        try:
+            stage(*args)
+        except PipelineAborted:
+            pass
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            logger.error("Pipeline stage %s failed: %s", name, e)
+            self._errors.append(e)
+            self._aborted.set()
+        finally:
+            stats.finished = time.monotonic()
+
+    def _count(self, stage: str) -> None:
+        self.stats.stages[stage].items += 1
+        instrumentation.increment(PIPELINE_ITEMS, stage=stage)
+
+    def _put(self, name: str, item: Any) -> None:
+        """Put an item into a queue, blocking while it is full."""
+        items = self._queues[name]
+        while True:
+            if self._aborted.is_set():
+                raise PipelineAborted()
+            try:
+                items.put(item, timeout=POLL_INTERVAL)
+                break
+            except queue.Full:
+                continue
+        depth = items.qsize()
+        stats = self.stats.queues[name]
+        stats.depth = depth
+        stats.max_depth = max(stats.max_depth, depth)
+        instrumentation.observe(QUEUE_DEPTH, depth, queue=name)
+
+    def _get(self, name: str) -> Any:
+        items = self._queues[name]
+        while True:
+            if self._aborted.is_set():
+                raise PipelineAborted()
+            try:
+                item = items.get(timeout=POLL_INTERVAL)
+                break
+            except queue.Empty:
+                continue
+        self.stats.queues[name].depth = items.qsize()
+        return item
+
+    def _fetch_stage(self, urls: Iterable[str]) -> None:
+        asyncio.run(self._fetch(urls))
+        self._put(FETCH, _DONE)
+
+    async def _fetch(self, urls: Iterable[str]) -> None:
+        fetcher = self.fetcher or AsyncFetcher()
+        try:
+            async for result in fetcher.iter_fetch_results(
+                urls, self.request_params
+            ):
+                self._count(FETCH)
+                if result.unchanged:
+                    self.stats.unchanged += 1
+                    continue
+                # Blocks the event loop while the queue is full, which
+                # pauses scheduling new requests.
+                self._put(FETCH, result)
+        finally:
+            if self._owns_fetcher:
+                fetcher.close()
+
+    def _scrape_stage(self) -> None:
+        pending: Dict[Future, Any] = {}
+        with ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=get_mp_context(),
+            initializer=init_worker,
+            initargs=(self.config, self.parser),
+        ) as executor:
+            try:
+                while True:
+                    result = self._get(FETCH)
+                    if result is _DONE:
+                        break
+                    if result.html is None:
+                        self.stats.failed += 1
+                        self._put(
+                            SCRAPE,
+                            PageResult(
+                                url=result.url, status_code=result.status_code
+                            ),
+                        )
+                        continue
+                    if len(pending) >= self.queue_size:
+                        self._complete(pending, FIRST_COMPLETED)
+                    pending[
+                        executor.submit(scrape_chunk, [(0, result.html)])
+                    ] = result
+                self._complete(pending)
+                self._put(SCRAPE, _DONE)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _complete(
+        self, pending: Dict[Future, Any], return_when: str = ALL_COMPLETED
+    ) -> None:
+        done: Set[Future]
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            fetch_result = pending.pop(future)
+            (batch_result,) = future.result()
+            if batch_result.error is not None:
+                self.stats.failed += 1
+            self._count(SCRAPE)
+            self._put(
+                SCRAPE,
+                PageResult(
+                    url=fetch_result.url,
+                    status_code=fetch_result.status_code,
+                    valid=batch_result.valid,
+                    results=batch_result.results,
+                    error=batch_result.error,
+                ),
+            )
+
+    def _write_stage(self) -> None:
+        while True:
+            page_result = self._get(SCRAPE)
+            if page_result is _DONE:
+                return
+            if isinstance(self.sink, RecordWriter):
+                for group_data in page_result.results or []:
+                    self.sink.write_many(
+                        group_data.results, group_id=group_data.group_id
+                    )
+            else:
+                self.sink(page_result)
+            self._count(WRITE)
+
+
+def run_pipeline(
+    urls: Iterable[str], config: Config, sink: Sink, **pipeline_options
+) -> PipelineStats:
+    """Run a Pipeline over URLs, see Pipeline for the options."""
+    return Pipeline(config, sink, **pipeline_options).run(urls)
@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from bluescraper.config import (
+    GroupScrapingConfig,
+    ScrapingConfig,
+    TagScrapingConfig,
+)
+from bluescraper.nodes import (  # noqa: F401
+    END,
+    START,
+    Node,
+    matches_tag_definition,
+    walk,
+)
+from bluescraper.records import RecordSchema
+
+# A group id and a record, as yielded by Scraper.iter_extract.
+GroupRecord = Tuple[Optional[str], Mapping[str, Any]]
+
+
+def get_tag_index(tags: Sequence[TagScrapingConfig]) -> Dict[str, int]:
+    """Position of every tag id in ``tags``."""
+    return {tag.id: position for position, tag in enumerate(tags)}
+
+
+def get_group_tags(
+    contains: List[str],
+    tags: List[TagScrapingConfig],
+    tag_index: Optional[Dict[str, int]] = None,
+) -> List[TagScrapingConfig]:
+    """
+    Tags of a group in the order of ``tags``, ignoring unknown ids.
+
+    Pass the ``tag_index`` of ``tags`` to resolve many groups without
+    scanning the tags for every group.
+    """
+    # TODO error handling
+    if tag_index is None:
+        tag_index = get_tag_index(tags)
+    positions = sorted(
+        {tag_index[tag_id] for tag_id in contains if tag_id in tag_index}
+    )
+    return [tags[position] for position in positions]
+
+
+def flatten_groups(
+    groups: Sequence[GroupScrapingConfig],
+) -> List[Tuple[GroupScrapingConfig, Optional[int]]]:
+    """
+    Nested groups in depth-first order, with the index of their parent
+    group in the returned list, None for top-level groups.
+    """
+    flat: List[Tuple[GroupScrapingConfig, Optional[int]]] = []
+
+    def add(
+        groups: Sequence[GroupScrapingConfig], parent: Optional[int]
+    ) -> None:
+        for group in groups:
+            flat.append((group, parent))
+            add(group.groups or [], len(flat) - 1)
+
+    add(groups, None)
+    return flat
+
+
+def sort_group_matches(group_matches: List[GroupMatch]) -> List[GroupMatch]:
+    """Order group matches by group definition and then document order."""
+    group_matches.sort(
+        key=lambda group_match: (
+            group_match.group_index or 0,
+            group_match.position,
+        )
+    )
+    return group_matches
+
+
+@dataclass
+class GroupMatch:
+    """
+    Elements collected for one group element, keyed by tag id.
+
+    ``group_index`` is None for configurations without groups, where the
+    whole document acts as a single group. The matches of nested groups
+    within the element are kept in ``children`` by their group index.
+    """
+
+    tags: List[TagScrapingConfig]
+    element: Node
+    group_index: Optional[int] = None
+    position: int = 0
+    matches: Dict[str, List[Node]] = field(default_factory=dict)
+    children: Dict[int, List[GroupMatch]] = field(default_factory=dict)
+    parent: Optional[GroupMatch] = field(
+        default=None, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        self.matches = {tag.id: [] for tag in self.tags}
+
+
+class ExtractionPlan:
+    """
+    A ScrapingConfig compiled for extraction in a single traversal.
+
+    Instead of one ``find_all`` per tag and group element, the document is
+    walked once and every element is dispatched to all tag and group
+    definitions it matches. Group membership is resolved when the plan is
+    compiled, so it can be reused for any number of documents.
+
+    Nested groups are flattened into ``groups`` in depth-first order, with
+    the index of their parent in ``group_parents``. A nested group only
+    matches elements within an element of its parent group.
+    """
+
+    def __init__(self, scraping_config: ScrapingConfig) -> None:
+        self.scraping_config = scraping_config
+        self.root_groups = scraping_config.groups or []
+        flat_groups = flatten_groups(self.root_groups)
+        self.groups = [group for group, _ in flat_groups]
+        self.group_parents = [parent for _, parent in flat_groups]
+        self.group_children: List[List[int]] = [[] for _ in self.groups]
+        for index, parent in enumerate(self.group_parents):
+            if parent is not None:
+                self.group_children[parent].append(index)
+        self.tag_index = get_tag_index(scraping_config.tags)
+        self.group_tags = [
+            get_group_tags(
+                group.contains, scraping_config.tags, self.tag_index
+            )
+            for group in self.groups
+        ]
+        if self.groups:
+            tag_ids = {tag.id for tags in self.group_tags for tag in tags}
+            self.tags = [
+                tag for tag in scraping_config.tags if tag.id in tag_ids
+            ]
+        else:
+            self.tags = list(scraping_config.tags)
+        self.tag_matchers = [(tag, tag.tag.matcher) for tag in self.tags]
+        self.group_matchers = [
+            (index, group.tag.matcher)
+            for index, group in enumerate(self.groups)
+        ]
+        # Records of a group share the fields, created once per plan.
+        self.schema = RecordSchema([tag.id for tag in self.tags])
+        self.group_schemas = []
+        for tags, children in zip(self.group_tags, self.group_children):
+            nested = [self.groups[child].id for child in children]
+            self.group_schemas.append(
+                RecordSchema([tag.id for tag in tags] + nested, nested)
+            )
+
+    def matching_tags(self, element: Node) -> List[TagScrapingConfig]:
+        return [tag for tag, matcher in self.tag_matchers if matcher(element)]
+
+    def matching_groups(self, element: Node) -> List[int]:
+        return [
+            index for index, matcher in self.group_matchers if matcher(element)
+        ]
+
+    def group_id(self, group_match: GroupMatch) -> Optional[str]:
+        if group_match.group_index is None:
+            return None
+        return self.groups[group_match.group_index].id
+
+    def record_schema(self, group_match: GroupMatch) -> RecordSchema:
+        """Schema of the records of a group match, in tag order."""
+        if group_match.group_index is None:
+            return self.schema
+        return self.group_schemas[group_match.group_index]
+
+    def start_run(self, document: Node) -> PlanRun:
+        return PlanRun(self, document)
+
+    def run(self, document: Node) -> List[GroupMatch]:
+        """
+        Collect matching elements for all tags and groups of the plan.
+
+        Returns one GroupMatch per top-level group element, ordered by
+        group definition and then by document order. Without groups, a
+        single GroupMatch covering the whole document is returned.
+        """
+        plan_run = self.start_run(document)
+        group_matches: List[GroupMatch] = []
+        for event, element in walk(document):
+            if event is START:
+                plan_run.start(element)
+            else:
+                group_matches.extend(plan_run.end(element))
+        group_matches.extend(plan_run.finish())
+        return sort_group_matches(group_matches)
+
+
+class PlanRun:
+    """
+    State of one traversal of a document with an ExtractionPlan.
+
+    The traversal reports every element with ``start`` when it is entered
+    and with ``end`` after its descendants. A group is complete, and
+    returned by ``end``, once its element is closed. This allows both
+    walking a parsed tree and driving the plan from a streaming parser.
+    Completed nested groups are added to the match of their parent group
+    instead of being returned.
+    """
+
+    def __init__(self, plan: ExtractionPlan, document: Node) -> None:
+        self.plan = plan
+        self.root: Optional[GroupMatch] = None
+        if not plan.groups:
+            self.root = GroupMatch(tags=plan.tags, element=document)
+        self.active: List[GroupMatch] = []
+        self.position = 0
+
+    def get_parent(
+        self, group_index: int, element: Node
+    ) -> Optional[GroupMatch]:
+        """
+        Innermost open match of the parent group of a nested group that
+        contains ``element``. As with ``find_all``, an element is not
+        within itself.
+        """
+        parent_index = self.plan.group_parents[group_index]
+        for group_match in reversed(self.active):
+            if (
+                group_match.group_index == parent_index
+                and group_match.element is not element
+            ):
+                return group_match
+        return None
+
+    def start(self, element: Node) -> bool:
+        """
+        Dispatch an element to the matching tags and groups.
+
+        Returns True when the element was collected for a tag, i.e. its
+        content is needed for extraction.
+        """
+        collected = False
+        if self.root is not None:
+            for tag in self.plan.matching_tags(element):
+                self.root.matches[tag.id].append(element)
+                collected = True
+            return collected
+        if self.active:
+            for tag in self.plan.matching_tags(element):
+                for group_match in self.active:
+                    if tag.id in group_match.matches:
+                        group_match.matches[tag.id].append(element)
+                        collected = True
+        for index in self.plan.matching_groups(element):
+            parent = None
+            if self.plan.group_parents[index] is not None:
+                parent = self.get_parent(index, element)
+                if parent is None:
+                    continue
+            self.active.append(
+                GroupMatch(
+                    tags=self.plan.group_tags[index],
+                    element=element,
+                    group_index=index,
+                    position=self.position,
+                    parent=parent,
+                )
+            )
+            self.position += 1
+        return collected
+
+    def end(self, element: Node) -> List[GroupMatch]:
+        """Close an element and return the groups completed by it."""
+        completed = []
+        while self.active and self.active[-1].element is element:
+            group_match = self.active.pop()
+            if group_match.parent is None:
+                completed.append(group_match)
+            else:
+                group_match.parent.children.setdefault(
+                    group_match.group_index, []
+                ).append(group_match)
+        completed.reverse()
+        return completed
+
+    def finish(self) -> List[GroupMatch]:
+        """Return the match of the whole document for plans without groups."""
+        if self.root is not None:
+            return [self.root]
+        return []
@@ -0,0 +1,270 @@
+"""
+Per-host rate limiting for all fetch paths.
+
+A HostRateLimiter keeps a token bucket per host. Requests wait for a
+token, responses with a status in ``BACKOFF_STATUS_CODES`` lower the rate
+of their host and pause it for the Retry-After duration, and successful
+responses raise the rate back step by step. Optionally, the crawl delay
+and request rate of the hosts' robots.txt cap their rate.
+
+``Fetcher`` instances use the limiter passed to them or the default
+limiter set with ``set_default_rate_limiter``, which also applies to
+``utils.get_html``. Sharing one limiter keeps every host within its
+limit, however many fetchers and threads send requests to it.
+"""
+
+from __future__ import annotations
+
+import datetime
+import email.utils
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from bluescraper.constants import (
+    BACKOFF_STATUS_CODES,
+    DEFAULT_BURST,
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_BACKOFF,
+    DEFAULT_MIN_RATE,
+    DEFAULT_RATE_LIMIT,
+)
+
+logger = logging.getLogger(__name__)
+
+RobotsFetcher = Callable[[str], Optional[str]]
+
+
+def parse_retry_after(
+    value: Optional[str], now: Optional[datetime.datetime] = None
+) -> Optional[float]:
+    """Seconds to wait according to a Retry-After header, if valid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+def get_robots_txt(robots_url: str) -> Optional[str]:
+    import requests  # pylint: disable=import-outside-toplevel
+
+    try:
+        response = requests.get(robots_url, timeout=DEFAULT_CONNECT_TIMEOUT)
+    except requests.RequestException as e:
+        logger.info("Fetching %s failed: %s", robots_url, e)
+        return None
+    if response.ok:
+        return response.text
+    return None
+
+
+class TokenBucket:
+    """
+    Token bucket allowing ``rate`` requests per second on average and
+    bursts of up to ``capacity`` requests.
+
+    Tokens are reserved, not awaited under the lock: ``reserve`` returns
+    how long the caller has to wait for its token, and a negative token
+    count is the debt of callers already waiting.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds until it is available."""
+        with self.lock:
+            self._refill(self.clock())
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for the next ``seconds``."""
+        with self.lock:
+            self._refill(self.clock())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+    def set_rate(self, rate: float) -> None:
+        with self.lock:
+            self._refill(self.clock())
+            self.rate = rate
+
+
+class HostRateLimiter:
+    """
+    Token bucket rate limiter per host with adaptive backoff.
+
+    Every host may send ``rate`` requests per second with bursts of
+    ``burst`` requests. On a response with a status in
+    ``BACKOFF_STATUS_CODES``, the rate of its host is halved, down to
+    ``min_rate``, and the host is paused for the Retry-After duration or,
+    without the header, for an exponentially growing delay of up to
+    ``max_backoff`` seconds. Every successful response raises the rate by
+    a tenth of ``rate`` until it is restored.
+
+    With ``respect_robots``, the robots.txt of every host is fetched once
+    and its crawl delay and request rate for ``user_agent`` lower the rate
+    of the host.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE_LIMIT,
+        burst: int = DEFAULT_BURST,
+        min_rate: float = DEFAULT_MIN_RATE,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        respect_robots: bool = False,
+        user_agent: str = "*",
+        robots_fetcher: RobotsFetcher = get_robots_txt,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0 or min_rate <= 0:
+            raise ValueError("rate and min_rate must be positive.")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min(min_rate, rate)
+        self.max_backoff = max_backoff
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.robots_fetcher = robots_fetcher
+        self.clock = clock
+        self.sleep = sleep
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._max_rates: Dict[str, float] = {}
+        self._failures: Dict[str, int] = {}
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _get_bucket(self, url: str) -> TokenBucket:
+        parts = urlsplit(url)
+        host = parts.netloc.lower()
+        bucket = self._buckets.get(host)
+        if bucket is not None:
+            return bucket
+        with self._lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+        # robots.txt is fetched under the lock of its host only, so it is
+        # read once without blocking requests to other hosts.
+        with host_lock:
+            bucket = self._buckets.get(host)
+            if bucket is not None:
+                return bucket
+            max_rate = self.rate
+            if self.respect_robots:
+                max_rate = min(
+                    max_rate, self.get_robots_rate(parts.scheme, host)
+                )
+            with self._lock:
+                self._max_rates[host] = max_rate
+                self._failures[host] = 0
+                bucket = TokenBucket(max_rate, self.burst, clock=self.clock)
+                self._buckets[host] = bucket
+            return bucket
+
+    def get_robots_rate(self, scheme: str, host: str) -> float:
+        """Request rate allowed by the robots.txt of a host."""
+        robots_txt = self.robots_fetcher(f"{scheme}://{host}/robots.txt")
+        if robots_txt is None:
+            return self.rate
+        parser = RobotFileParser()
+        parser.parse(robots_txt.splitlines())
+        rate = self.rate
+        crawl_delay = parser.crawl_delay(self.user_agent)
+        if crawl_delay:
+            rate = min(rate, 1 / float(crawl_delay))
+        request_rate = parser.request_rate(self.user_agent)
+        if request_rate and request_rate.seconds:
+            rate = min(rate, request_rate.requests / request_rate.seconds)
+        return rate
+
+    def get_rate(self, url: str) -> float:
+        return self._get_bucket(url).rate
+
+    def wait(self, url: str) -> float:
+        """Block until a request to the host of ``url`` is allowed."""
+        delay = self._get_bucket(url).reserve()
+        if delay > 0:
+            self.sleep(delay)
+        return delay
+
+    def record_response(
+        self, url: str, status_code: int, retry_after: Optional[str] = None
+    ) -> None:
+        """Adapt the rate of a host to the status of its response."""
+        if status_code in BACKOFF_STATUS_CODES:
+            self.backoff(url, parse_retry_after(retry_after))
+        else:
+            self.succeeded(url)
+
+    def backoff(self, url: str, retry_after: Optional[float] = None) -> None:
+        bucket = self._get_bucket(url)
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            self._failures[host] += 1
+            failures = self._failures[host]
+        min_rate = min(self.min_rate, self._max_rates[host])
+        bucket.set_rate(max(min_rate, bucket.rate / 2))
+        if retry_after is None:
+            retry_after = (2 ** (failures - 1)) / self.rate
+        pause = min(retry_after, self.max_backoff)
+        bucket.pause(pause)
+        logger.info(
+            "Backing off %s, rate %.2f/s, paused %.2fs",
+            host,
+            bucket.rate,
+            pause,
+        )
+
+    def succeeded(self, url: str) -> None:
+        bucket = self._get_bucket(url)
+        host = urlsplit(url).netloc.lower()
+        self._failures[host] = 0
+        max_rate = self._max_rates[host]
+        if bucket.rate < max_rate:
+            bucket.set_rate(min(max_rate, bucket.rate + self.rate / 10))
+
+
+_default_rate_limiter: Optional[HostRateLimiter] = None
+
+
+def set_default_rate_limiter(
+    rate_limiter: Optional[HostRateLimiter],
+) -> None:
+    """Set the limiter used by fetch paths without their own limiter."""
+    global _default_rate_limiter  # pylint: disable=global-statement
+    _default_rate_limiter = rate_limiter
+
+
+def get_default_rate_limiter() -> Optional[HostRateLimiter]:
+    return _default_rate_limiter
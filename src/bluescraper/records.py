@@ -0,0 +1,98 @@
+"""
+Compact records of extracted values.
+
+The records of a group all have the same fields, the tag ids of the
+group. A RecordSchema holds the fields once and creates a record class
+storing the values of a record in slots, without a per-record dict or
+key strings. Records are read-only mappings comparing equal to dicts
+with the same items, and ``to_dict`` converts them for serialization.
+A record takes about half the memory of the equivalent dict.
+
+Records of nested groups are kept as lists of records under the nested
+fields of a schema, converted into lists of dicts by ``to_dict``.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Iterator, Sequence, Tuple
+
+
+class RecordSchema:
+    """Fields of the records of one group and their record class."""
+
+    def __init__(
+        self, fields: Sequence[str], nested: Sequence[str] = ()
+    ) -> None:
+        self.fields: Tuple[str, ...] = tuple(fields)
+        self.nested = frozenset(nested)
+        slots = tuple(f"_{index}" for index in range(len(self.fields)))
+        self.record_type = type(
+            "Record", (Record,), {"__slots__": slots, "schema": self}
+        )
+        # Slot descriptors, reading and writing values by position.
+        self.members = tuple(self.record_type.__dict__[slot] for slot in slots)
+        self.members_by_field = dict(zip(self.fields, self.members))
+
+    def __call__(self, values: Iterable[Any]) -> Record:
+        """Create a record from its values in the order of the fields."""
+        return self.record_type(values)
+
+    def __repr__(self) -> str:
+        return f"RecordSchema({list(self.fields)!r})"
+
+    def __reduce__(self):
+        return (RecordSchema, (self.fields, tuple(sorted(self.nested))))
+
+
+class Record(Mapping):
+    """
+    Read-only mapping of the fields of a RecordSchema to their values.
+
+    Instances are created by a RecordSchema.
+    """
+
+    __slots__ = ()
+    schema: RecordSchema
+
+    def __init__(self, values: Iterable[Any]) -> None:
+        for member, value in zip(self.schema.members, values, strict=True):
+            member.__set__(self, value)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.schema.members_by_field[key].__get__(self)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.schema.fields)
+
+    def __len__(self) -> int:
+        return len(self.schema.fields)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Record) and other.schema is self.schema:
+            return self.to_tuple() == other.to_tuple()
+        return super().__eq__(other)
+
+    def to_tuple(self) -> Tuple[Any, ...]:
+        return tuple(member.__get__(self) for member in self.schema.members)
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = dict(zip(self.schema.fields, self.to_tuple()))
+        for field in self.schema.nested:
+            record[field] = [to_dict(child) for child in record[field]]
+        return record
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+    def __reduce__(self):
+        return (self.schema, (self.to_tuple(),))
+
+
+def to_dict(record: Mapping) -> dict:
+    """Convert a record, or any mapping, into a dict."""
+    if isinstance(record, dict):
+        return record
+    if isinstance(record, Record):
+        return record.to_dict()
+    return dict(record)
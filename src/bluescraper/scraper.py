@@ -1,13 +1,33 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
-from typing import List, Optional
+from enum import Enum
+from typing import TYPE_CHECKING, Iterator, List, Optional, Union
 
-from bs4 import BeautifulSoup, Tag
+from bluescraper import instrumentation
+from bluescraper.columnar import ColumnarResultBuilder
+from bluescraper.config import Config
+from bluescraper.formatters import Formatter
+from bluescraper.nodes import START, Node, as_node, parse_html, walk
+from bluescraper.plan import (  # noqa: F401
+    ExtractionPlan,
+    GroupMatch,
+    GroupRecord,
+    get_group_tags,
+    sort_group_matches,
+)
+from bluescraper.records import Record
+from bluescraper.utils import (
+    HtmlAttributeNotExists,
+    TagDefinition,
+    clean_string,
+    extract_from_tag,
+)
+from bluescraper.validation import ValidationPlan
 
-from bluescraper.config import Config, TagScrapingConfig
-from bluescraper.utils import TagDefinition, extract_from_tag
-from bluescraper.validation import SoapValidator
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 
 class HtmlTagNotExists(Exception):
@@ -18,38 +38,118 @@ class NotValidHTML(Exception):
     pass
 
 
+class ErrorPolicy(str, Enum):
+    """
+    What to do with a record when one of its tags cannot be extracted.
+
+    RAISE propagates the error, SKIP drops the record and NULL keeps the
+    record with None for the missing values.
+    """
+
+    RAISE = "raise"
+    SKIP = "skip"
+    NULL = "null"
+
+
 class Scraper:
     """
-    A class for extracting information from beautifulsoup.
+    A class for extracting information from a parsed html document.
+
+    The document can be a BeautifulSoup object or a Node of any parser
+    engine, see ``bluescraper.nodes``.
+
+    ``can_scrape`` validates the document in the same traversal that
+    collects the elements to extract, so a following ``extract`` does not
+    traverse the document again.
     """
 
-    def __init__(self, soup: BeautifulSoup, config: Config) -> None:
+    def __init__(
+        self,
+        soup: Union[Node, BeautifulSoup],
+        config: Config,
+        plan: Optional[ExtractionPlan] = None,
+    ) -> None:
         self.soup = soup
+        self.document = as_node(soup)
         self.config = config
+        self.plan = plan or ExtractionPlan(config.scraping)
+        self.group_matches: Optional[List[GroupMatch]] = None
+
+    @classmethod
+    def from_html(
+        cls,
+        html: str,
+        config: Config,
+        parser: Optional[str] = None,
+        plan: Optional[ExtractionPlan] = None,
+    ) -> Scraper:
+        """
+        Parse html with ``parser``, falling back to the parser of the
+        config and then to the default parser.
+        """
+        document = parse_html(html, parser or config.parser)
+        return cls(document, config, plan=plan)
 
     def can_scrape(self) -> bool:
-        if self.config.validation:
-            # TODO is this a case for apply dependency injection?
-            validator = SoapValidator(
-                soup=self.soup,
-                validation_config=self.config.validation,
-            )
-            validator.validate()
-            return validator.valid
+        if not self.config.validation:
+            return True
+        group_matches = self.validate_and_match(
+            ValidationPlan(self.config.validation)
+        )
+        if group_matches is None:
+            return False
+        self.group_matches = group_matches
         return True
 
+    def validate_and_match(
+        self, validation_plan: ValidationPlan
+    ) -> Optional[List[GroupMatch]]:
+        """
+        Validate the document and collect the group matches in one pass.
+
+        Returns None, without finishing the traversal, as soon as the
+        document is known to be invalid.
+        """
+        with instrumentation.stage_timer("match"):
+            validation_run = validation_plan.start_run()
+            plan_run = self.plan.start_run(self.document)
+            group_matches: List[GroupMatch] = []
+            for event, element in walk(self.document):
+                if event is START:
+                    if validation_run.start(element) is False:
+                        return None
+                    plan_run.start(element)
+                else:
+                    group_matches.extend(plan_run.end(element))
+            if not validation_run.finish():
+                return None
+            group_matches.extend(plan_run.finish())
+            return sort_group_matches(group_matches)
+
     def extract_tag(
         self,
-        soup: BeautifulSoup,
+        soup: Union[Node, BeautifulSoup],
+        tag: TagDefinition,
+        content_type: Optional[str],
+    ) -> str:
+        page_elements = as_node(soup).find_all(tag)
+        return self.extract_page_elements(page_elements, tag, content_type)
+
+    def extract_page_elements(
+        self,
+        page_elements: List[Node],
         tag: TagDefinition,
         content_type: Optional[str],
+        formatter: Formatter = clean_string,
     ) -> str:
-        page_elements = soup.find_all(name=tag.name, attrs=tag.attrs)
         if page_elements:
             extracted_content = [
-                extract_from_tag(tag=page_element, attribute=content_type)
+                extract_from_tag(
+                    tag=page_element,
+                    attribute=content_type,
+                    formatter=formatter,
+                )
                 for page_element in page_elements
-                if isinstance(page_element, Tag)
             ]
             return self.concatenate_extracted_content(extracted_content)
         raise HtmlTagNotExists(
@@ -65,51 +165,140 @@ class Scraper:
     # TODO Find a better name as ScraperGroupData
     @dataclass
     class ScraperGroupData:
-        results: List[dict]
+        results: List[Record]
         group_id: Optional[str] = None
 
-    def extract(self) -> List[ScraperGroupData]:
-        # TODO Simplify logic for the extraction
-        if self.config.scraping.groups:
+        def to_dict(self) -> dict:
+            """Convert into a dict of plain dicts, e.g. for json."""
+            return {
+                "results": [record.to_dict() for record in self.results],
+                "group_id": self.group_id,
+            }
+
+    def extract_group_match(
+        self,
+        group_match: GroupMatch,
+        on_error: ErrorPolicy = ErrorPolicy.RAISE,
+    ) -> Optional[Record]:
+        """
+        Build the record of one group match.
+
+        The records of nested groups are added as lists under their group
+        ids. Returns None when a tag cannot be extracted and ``on_error`` is
+        SKIP.
+        """
+        values = []
+        instrumented = instrumentation.is_enabled()
+        for tag in group_match.tags:
+            page_elements = group_match.matches[tag.id]
+            start = time.perf_counter() if instrumented else 0.0
+            try:
+                value = self.extract_page_elements(
+                    page_elements=page_elements,
+                    tag=tag.tag,
+                    content_type=tag.content_type,
+                    formatter=tag.compiled_formatter,
+                )
+            except (HtmlTagNotExists, HtmlAttributeNotExists):
+                if on_error is ErrorPolicy.RAISE:
+                    raise
+                if on_error is ErrorPolicy.SKIP:
+                    return None
+                value = None
+            finally:
+                if instrumented:
+                    instrumentation.observe(
+                        instrumentation.TAG_SECONDS,
+                        time.perf_counter() - start,
+                        tag=tag.id,
+                    )
+                    instrumentation.increment(
+                        instrumentation.TAG_MATCHES,
+                        len(page_elements),
+                        tag=tag.id,
+                    )
+            values.append(value)
+        if group_match.group_index is not None:
+            for child_index in self.plan.group_children[
+                group_match.group_index
+            ]:
+                values.append(
+                    self.extract_children(
+                        group_match.children.get(child_index, []), on_error
+                    )
+                )
+        return self.plan.record_schema(group_match)(values)
+
+    def extract_children(
+        self, group_matches: List[GroupMatch], on_error: ErrorPolicy
+    ) -> List[Record]:
+        """Build the records of the matches of a nested group."""
+        records = []
+        for group_match in group_matches:
+            record = self.extract_group_match(group_match, on_error)
+            if record is not None:
+                records.append(record)
+        return records
+
+    def iter_extract(
+        self, on_error: Union[ErrorPolicy, str] = ErrorPolicy.RAISE
+    ) -> Iterator[GroupRecord]:
+        """
+        Yield ``(group_id, record)`` pairs one at a time.
+
+        The document is traversed once up front, but records are only
+        built when they are consumed, in the same order as ``extract``.
+        ``on_error`` decides per record what happens when a tag is missing,
+        see ErrorPolicy.
+        """
+        on_error = ErrorPolicy(on_error)
+        group_matches = self.group_matches
+        if group_matches is None:
+            with instrumentation.stage_timer("match"):
+                group_matches = self.plan.run(self.document)
+        for group_match in group_matches:
+            record = self.extract_group_match(group_match, on_error)
+            if record is not None:
+                yield self.plan.group_id(group_match), record
+
+    def extract(
+        self, on_error: Union[ErrorPolicy, str] = ErrorPolicy.RAISE
+    ) -> List[ScraperGroupData]:
+        with instrumentation.stage_timer("extract"):
+            return self._extract(on_error)
+
+    def _extract(
+        self, on_error: Union[ErrorPolicy, str]
+    ) -> List[ScraperGroupData]:
+        if not self.plan.groups:
             return [
                 Scraper.ScraperGroupData(
-                    group_id=group.id,
                     results=[
-                        {
-                            tag.id: self.extract_tag(
-                                soup=group_soup,
-                                tag=tag.tag,
-                                content_type=tag.content_type,
-                            )
-                            for tag in get_group_tags(
-                                group.contains, self.config.scraping.tags
-                            )
-                        }
-                        for group_soup in self.soup.find_all(
-                            name=group.tag.name, attrs=group.tag.attrs
-                        )
-                    ],
+                        record for _, record in self.iter_extract(on_error)
+                    ]
                 )
-                for group in self.config.scraping.groups
             ]
-        return [
-            Scraper.ScraperGroupData(
-                results=[
-                    {
-                        tag.id: self.extract_tag(
-                            soup=self.soup,
-                            tag=tag.tag,
-                            content_type=tag.content_type,
-                        )
-                        for tag in self.config.scraping.tags
-                    }
-                ]
-            )
-        ]
-
-
-def get_group_tags(
-    contains: List[str], tags: List[TagScrapingConfig]
-) -> List[TagScrapingConfig]:
-    # TODO error handling
-    return [tag for tag in tags if tag.id in contains]
+        grouped_data = {
+            group.id: Scraper.ScraperGroupData(group_id=group.id, results=[])
+            for group in self.plan.root_groups
+        }
+        for group_id, record in self.iter_extract(on_error):
+            grouped_data[group_id].results.append(record)
+        return list(grouped_data.values())
+
+    def extract_columnar(
+        self,
+        on_error: Union[ErrorPolicy, str] = ErrorPolicy.RAISE,
+        builder: Optional[ColumnarResultBuilder] = None,
+    ) -> ColumnarResultBuilder:
+        """
+        Extract records into column buffers instead of a list of dicts.
+
+        Pass the ``builder`` of previous pages to collect the records of
+        many pages, e.g. to write them as one Parquet file per group.
+        """
+        if builder is None:
+            builder = ColumnarResultBuilder(self.config.scraping)
+        with instrumentation.stage_timer("extract"):
+            builder.extend(self.iter_extract(on_error))
+        return builder
@@ -0,0 +1,195 @@
+"""
+Precompiled config snapshots for fast startup.
+
+Reading a config parses YAML and validates it with pydantic, and
+compiling it builds the matchers and the extraction plan. A snapshot
+stores the result, pickled, next to the config file or in a snapshot
+directory, together with the modification time, size and hash of the
+config file it was compiled from.
+
+``load_snapshot`` only stats the config file while it is unchanged and
+keeps snapshots in memory, so repeated loads in a process, e.g. on every
+scheduled run, are answered without reading any file. When the file was
+touched but its content is the same, the hash keeps the snapshot valid.
+
+Snapshots are pickles and must only be read from trusted directories.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from bluescraper.config import Config, ConfigReader
+from bluescraper.plan import ExtractionPlan
+
+logger = logging.getLogger(__name__)
+
+# Increased whenever the pickled classes change incompatibly.
+SNAPSHOT_VERSION = 2
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+@dataclass
+class ConfigSnapshot:
+    """A validated Config and its ExtractionPlan with their source."""
+
+    config: Config
+    plan: ExtractionPlan
+    source_hash: str
+    mtime_ns: int
+    size: int
+    version: int = SNAPSHOT_VERSION
+
+    def is_current(self, stat: os.stat_result) -> bool:
+        return (
+            self.version == SNAPSHOT_VERSION
+            and self.mtime_ns == stat.st_mtime_ns
+            and self.size == stat.st_size
+        )
+
+
+# Snapshots loaded in this process, by absolute config file path.
+_snapshots: Dict[str, ConfigSnapshot] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_file_hash(file_path: Union[str, os.PathLike]) -> str:
+    with open(file_path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_snapshot_path(
+    config_file: Union[str, os.PathLike],
+    snapshot_dir: Optional[Union[str, os.PathLike]] = None,
+) -> Path:
+    """
+    Path of the snapshot of a config file, a hidden file next to it
+    unless a ``snapshot_dir`` is given.
+    """
+    config_path = Path(config_file).resolve()
+    file_name = f".{config_path.name}{SNAPSHOT_SUFFIX}"
+    if snapshot_dir is None:
+        return config_path.with_name(file_name)
+    # The hash of the directory keeps configs of equal names apart.
+    directory_hash = hashlib.sha256(
+        str(config_path.parent).encode("utf-8")
+    ).hexdigest()[:16]
+    return Path(snapshot_dir).joinpath(f"{directory_hash}{file_name}")
+
+
+def compile_config(config_file: Union[str, os.PathLike]) -> ConfigSnapshot:
+    """Read, validate and compile a config file into a snapshot."""
+    config_path = Path(config_file)
+    stat = os.stat(config_path)
+    source_hash = get_file_hash(config_path)
+    config = ConfigReader(config_path).load()
+    return ConfigSnapshot(
+        config=config,
+        plan=ExtractionPlan(config.scraping),
+        source_hash=source_hash,
+        mtime_ns=stat.st_mtime_ns,
+        size=stat.st_size,
+    )
+
+
+def read_snapshot(
+    snapshot_path: Union[str, os.PathLike]
+) -> Optional[ConfigSnapshot]:
+    """Read a snapshot file, None if it is missing or unreadable."""
+    try:
+        with open(snapshot_path, "rb") as f:
+            snapshot = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logger.info("Ignoring snapshot %s: %s", snapshot_path, e)
+        return None
+    if (
+        not isinstance(snapshot, ConfigSnapshot)
+        or snapshot.version != SNAPSHOT_VERSION
+    ):
+        return None
+    return snapshot
+
+
+def write_snapshot(
+    snapshot: ConfigSnapshot, snapshot_path: Union[str, os.PathLike]
+) -> None:
+    """
+    Write a snapshot file, replacing it atomically. Failures are logged,
+    e.g. for read-only config directories, as snapshots are optional.
+    """
+    directory = os.path.dirname(os.fspath(snapshot_path)) or "."
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=directory, delete=False
+        ) as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, snapshot_path)
+    except OSError as e:
+        logger.info("Writing snapshot %s failed: %s", snapshot_path, e)
+
+
+def load_snapshot(
+    config_file: Union[str, os.PathLike],
+    snapshot_dir: Optional[Union[str, os.PathLike]] = None,
+) -> ConfigSnapshot:
+    """
+    Load the snapshot of a config file, compiling it when the file changed.
+
+    Parameters
+    ----------
+    config_file : Union[str, os.PathLike]
+        YAML or JSON config file, see ConfigReader.
+    snapshot_dir : Union[str, os.PathLike], optional
+        Directory of the snapshot files, by default the directory of the
+        config file.
+
+    Returns
+    -------
+    ConfigSnapshot
+        Snapshot matching the current content of the config file.
+    """
+    config_path = os.path.abspath(config_file)
+    stat = os.stat(config_path)
+    with _snapshots_lock:
+        snapshot = _snapshots.get(config_path)
+    if snapshot is not None and snapshot.is_current(stat):
+        return snapshot
+    snapshot_path = get_snapshot_path(config_path, snapshot_dir)
+    snapshot = read_snapshot(snapshot_path)
+    if snapshot is None or not snapshot.is_current(stat):
+        source_hash = get_file_hash(config_path)
+        if snapshot is not None and snapshot.source_hash == source_hash:
+            # Touched but unchanged, only the file metadata is updated.
+            snapshot.mtime_ns = stat.st_mtime_ns
+            snapshot.size = stat.st_size
+        else:
+            snapshot = compile_config(config_path)
+        write_snapshot(snapshot, snapshot_path)
+    with _snapshots_lock:
+        _snapshots[config_path] = snapshot
+    return snapshot
+
+
+def load_config(
+    config_file: Union[str, os.PathLike],
+    snapshot_dir: Optional[Union[str, os.PathLike]] = None,
+) -> Config:
+    """Load a config file through its snapshot, see load_snapshot."""
+    return load_snapshot(config_file, snapshot_dir).config
+
+
+def clear_snapshots() -> None:
+    """Forget the snapshots kept in memory."""
+    with _snapshots_lock:
+        _snapshots.clear()
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import os
+from html.parser import HTMLParser
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from bluescraper.config import Config, ExistingStringInTag
+from bluescraper.nodes import MULTI_VALUED_ATTRIBUTES, NON_TEXT_TAGS, Node
+from bluescraper.plan import ExtractionPlan, GroupMatch, PlanRun
+from bluescraper.scraper import ErrorPolicy, GroupRecord, Scraper
+from bluescraper.validation import ValidationPlan, ValidationRun
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# Elements without content and without end tag.
+VOID_ELEMENTS = frozenset(
+    {
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "param",
+        "source",
+        "track",
+        "wbr",
+    }
+)
+
+
+class StreamNode(Node):
+    """
+    Element built while streaming a document.
+
+    Only elements whose content is needed for extraction keep their
+    children and text in ``contents``, all others are dropped as soon as
+    the parser leaves them.
+    """
+
+    __slots__ = ("_name", "attrs", "contents", "retained")
+
+    def __init__(self, name: str, attrs: Dict[str, str]) -> None:
+        self._name = name
+        self.attrs = attrs
+        self.contents: List[Union[str, StreamNode]] = []
+        self.retained = False
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def element(self) -> StreamNode:
+        return self
+
+    def get(self, attribute: str) -> Optional[str]:
+        value = self.attrs.get(attribute)
+        if value is not None and attribute in MULTI_VALUED_ATTRIBUTES:
+            return " ".join(value.split())
+        return value
+
+    def children(self) -> Iterator[Node]:
+        for child in self.contents:
+            if isinstance(child, StreamNode):
+                yield child
+
+    def iter_strings(self) -> Iterator[str]:
+        stack = [iter(self.contents)]
+        while stack:
+            for child in stack[-1]:
+                if isinstance(child, str):
+                    yield child
+                elif child.name not in NON_TEXT_TAGS:
+                    stack.append(iter(child.contents))
+                    break
+            else:
+                stack.pop()
+
+
+class _StreamParser(HTMLParser):
+    def __init__(self, scraper: StreamingScraper) -> None:
+        super().__init__(convert_charrefs=True)
+        self.scraper = scraper
+
+    def handle_starttag(self, tag, attrs):
+        self.scraper.handle_starttag(tag, attrs)
+        if tag in VOID_ELEMENTS:
+            self.scraper.handle_endtag(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.scraper.handle_starttag(tag, attrs)
+        self.scraper.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in VOID_ELEMENTS:
+            self.scraper.handle_endtag(tag)
+
+    def handle_data(self, data):
+        self.scraper.handle_data(data)
+
+
+class StreamValidationRun(ValidationRun):
+    """
+    ValidationRun of a streamed document.
+
+    The text of an element is only complete at its end tag, so required
+    strings are checked when the first element matching their tag ends,
+    which has to be retained until then, see ``needs_text``.
+    """
+
+    def __init__(self, plan: ValidationPlan) -> None:
+        super().__init__(plan)
+        self.open_checks: List[Tuple[Node, ExistingStringInTag]] = []
+
+    def start(self, element: Node) -> Optional[bool]:
+        if self.valid is not None:
+            return self.valid
+        if self.pending_tags:
+            self.pending_tags = [
+                matcher
+                for matcher in self.pending_tags
+                if not matcher(element)
+            ]
+        if self.pending_strings:
+            pending_strings = []
+            for matcher, existing_string_in_tag in self.pending_strings:
+                if matcher(element):
+                    self.open_checks.append((element, existing_string_in_tag))
+                else:
+                    pending_strings.append((matcher, existing_string_in_tag))
+            self.pending_strings = pending_strings
+        return self._update()
+
+    def needs_text(self, element: Node) -> bool:
+        return any(node is element for node, _ in self.open_checks)
+
+    def end(self, element: Node) -> Optional[bool]:
+        """Check the required strings of an element once it ends."""
+        if self.valid is not None or not self.open_checks:
+            return self.valid
+        open_checks = []
+        for node, existing_string_in_tag in self.open_checks:
+            if node is not element:
+                open_checks.append((node, existing_string_in_tag))
+            elif existing_string_in_tag.include_string not in (
+                element.get_text(strip=True)
+            ):
+                self.valid = False
+                return self.valid
+        self.open_checks = open_checks
+        return self._update()
+
+    def _update(self) -> Optional[bool]:
+        if not (self.pending_tags or self.pending_strings or self.open_checks):
+            self.valid = True
+        return self.valid
+
+
+class StreamingScraper:
+    """
+    Extract groups from html fed in chunks, without building the tree.
+
+    Elements are matched while the document is parsed incrementally. A
+    group's record is emitted as soon as its closing tag is seen, and only
+    the subtrees of elements collected for extraction are kept until then,
+    so memory stays flat for large documents with many groups. Without
+    groups, the single record is emitted when the stream is closed.
+
+    The validation config is checked in the same pass. Records are held
+    back until the document is known to be valid, and dropped once it is
+    known to be invalid, see ``can_scrape``.
+
+    Records are ``(group_id, record)`` pairs, ``on_error`` decides what
+    happens to records with missing tags, see ErrorPolicy.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        plan: Optional[ExtractionPlan] = None,
+        on_error: Union[ErrorPolicy, str] = ErrorPolicy.RAISE,
+    ) -> None:
+        self.config = config
+        self.document = StreamNode("[document]", {})
+        # Builds the records of completed group matches.
+        self.scraper = Scraper(self.document, config, plan=plan)
+        self.plan = self.scraper.plan
+        self.on_error = ErrorPolicy(on_error)
+        self.plan_run: PlanRun = self.plan.start_run(self.document)
+        self.validation_run: Optional[StreamValidationRun] = None
+        if config.validation:
+            self.validation_run = StreamValidationRun(
+                ValidationPlan(config.validation)
+            )
+        self.stack: List[StreamNode] = [self.document]
+        self.completed: List[GroupMatch] = []
+        self.parser = _StreamParser(self)
+
+    def can_scrape(self) -> bool:
+        """
+        Whether the document passed validation, False while the result
+        depends on html not fed yet.
+        """
+        if self.validation_run is None:
+            return True
+        return self.validation_run.valid is True
+
+    @property
+    def _invalid(self) -> bool:
+        return (
+            self.validation_run is not None
+            and self.validation_run.valid is False
+        )
+
+    def handle_starttag(
+        self, name: str, attrs: List[Tuple[str, Optional[str]]]
+    ) -> None:
+        node = StreamNode(name, {key: value or "" for key, value in attrs})
+        parent = self.stack[-1]
+        self.stack.append(node)
+        if self._invalid:
+            return
+        if parent.retained:
+            node.retained = True
+            parent.contents.append(node)
+        if self.plan_run.start(node):
+            node.retained = True
+        if self.validation_run is not None:
+            self.validation_run.start(node)
+            if self.validation_run.needs_text(node):
+                node.retained = True
+
+    def handle_endtag(self, name: str) -> None:
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].name == name:
+                break
+        else:
+            return
+        while len(self.stack) > depth:
+            node = self.stack.pop()
+            if self.validation_run is not None:
+                self.validation_run.end(node)
+            self.completed.extend(self.plan_run.end(node))
+
+    def handle_data(self, data: str) -> None:
+        node = self.stack[-1]
+        if not node.retained:
+            return
+        # Text split across chunks is joined into one string, as parsed
+        # from the whole document.
+        if node.contents and isinstance(node.contents[-1], str):
+            node.contents[-1] += data
+        else:
+            node.contents.append(data)
+
+    def _emit(self) -> List[GroupRecord]:
+        if self._invalid:
+            self.completed = []
+        if not self.can_scrape():
+            return []
+        records = []
+        for group_match in self.completed:
+            record = self.scraper.extract_group_match(
+                group_match, self.on_error
+            )
+            if record is not None:
+                records.append((self.plan.group_id(group_match), record))
+        self.completed = []
+        return records
+
+    def feed(self, chunk: str) -> List[GroupRecord]:
+        """Parse the next chunk and return the records completed by it."""
+        self.parser.feed(chunk)
+        return self._emit()
+
+    def close(self) -> List[GroupRecord]:
+        """Finish the document and return the remaining records."""
+        self.parser.close()
+        while len(self.stack) > 1:
+            node = self.stack.pop()
+            if self.validation_run is not None:
+                self.validation_run.end(node)
+            self.completed.extend(self.plan_run.end(node))
+        self.completed.extend(self.plan_run.finish())
+        if self.validation_run is not None:
+            self.validation_run.finish()
+        return self._emit()
+
+    def iter_scrape(self, chunks: Iterable[str]) -> Iterator[GroupRecord]:
+        for chunk in chunks:
+            yield from self.feed(chunk)
+        yield from self.close()
+
+
+def iter_file_chunks(
+    file_path: Union[str, os.PathLike], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[str]:
+    with open(file_path, "r", encoding="utf-8") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def stream_file(
+    file_path: Union[str, os.PathLike],
+    config: Config,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_error: Union[ErrorPolicy, str] = ErrorPolicy.RAISE,
+) -> Iterator[GroupRecord]:
+    """Stream group records from an html file read in chunks."""
+    scraper = StreamingScraper(config, on_error=on_error)
+    yield from scraper.iter_scrape(iter_file_chunks(file_path, chunk_size))
@@ -1,12 +1,27 @@
+from __future__ import annotations
+
 import datetime
 import hashlib
-from typing import Callable, Dict, Optional
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+
+from bluescraper.constants import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from bluescraper.instrumentation import stage_timer
+from bluescraper.matchers import TagMatcher, compile_matcher
+from bluescraper.nodes import (
+    BS4_PARSERS,
+    DEFAULT_PARSER,
+    Node,
+    as_node,
+    parse_html,
+)
+from bluescraper.ratelimit import get_default_rate_limiter
 
-import requests
-from bs4 import BeautifulSoup, Tag
-from pydantic import BaseModel
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, Tag
 
-from bluescraper.constants import DEFAULT_TIMEOUT
+    from bluescraper.fetch import Fetcher
 
 
 def get_extraction_timestamp() -> str:
@@ -14,34 +29,55 @@ def get_extraction_timestamp() -> str:
 
 
 class TagDefinition(BaseModel):
+    """
+    Name and attributes of the html elements to select.
+
+    The definition is compiled into a TagMatcher when it is created, so
+    configs reused across many pages interpret it only once. Definitions
+    are immutable to keep the matcher in sync.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
     name: Optional[str] = None
     attrs: Optional[Dict[str, str]] = None
+    _matcher: TagMatcher = PrivateAttr()
+
+    def model_post_init(self, __context) -> None:
+        self._matcher = compile_matcher(self.name, self.attrs)
 
+    @property
+    def matcher(self) -> TagMatcher:
+        return self._matcher
 
-def is_tag_in_soup(soup: BeautifulSoup, tag_definition: TagDefinition) -> bool:
-    if soup.find(name=tag_definition.name, attrs=tag_definition.attrs):
+
+def is_tag_in_soup(
+    soup: Union[Node, Tag], tag_definition: TagDefinition
+) -> bool:
+    if as_node(soup).find(tag_definition):
         return True
     return False
 
 
 def is_text_in_tag(
-    soup: BeautifulSoup,
+    soup: Union[Node, Tag],
     tag_definition: TagDefinition,
     text: str,
 ) -> bool:
-    tag = soup.find(tag_definition.name, tag_definition.attrs)
+    tag = as_node(soup).find(tag_definition)
     if tag:
         return text in tag.get_text(strip=True)
     return False
 
 
 def clean_string(string: str):
-    return " ".join([word.strip() for word in string.split()])
+    # str.split already drops the whitespace around every word.
+    return " ".join(string.split())
 
 
-def extract_text(tag: Tag) -> str:
-    text = tag.get_text()
-    return clean_string(text)
+def extract_text(tag: Union[Node, Tag]) -> str:
+    """Raw text of a tag, normalized by the formatter of its tag config."""
+    return as_node(tag).get_text()
 
 
 class HtmlAttributeNotExists(Exception):
@@ -49,19 +85,20 @@ class HtmlAttributeNotExists(Exception):
 
 
 def extract_from_tag(
-    tag: Tag,
+    tag: Union[Node, Tag],
     attribute: Optional[str] = None,
     formatter: Callable[[str], str] = clean_string,
 ) -> str:
+    node = as_node(tag)
     if attribute:
-        try:
-            text = tag[attribute]
-        except KeyError as e:
+        value = node.get(attribute)
+        if value is None:
             raise HtmlAttributeNotExists(
                 f"Attribute {attribute} not exists in html element"
-            ) from e
+            )
+        text = value
     else:
-        text = extract_text(tag)
+        text = extract_text(node)
     return formatter(text)
 
 
@@ -154,18 +191,70 @@ def get_date_range(
 
 
 def get_html(url: str, request_params: Optional[dict] = None) -> Optional[str]:
-    response = requests.get(
-        url=url, params=request_params, timeout=DEFAULT_TIMEOUT
-    )
-    if response.ok:
-        return response.text
+    import requests  # pylint: disable=import-outside-toplevel
+
+    rate_limiter = get_default_rate_limiter()
+    with stage_timer("fetch"):
+        if rate_limiter is not None:
+            rate_limiter.wait(url)
+        response = requests.get(
+            url=url,
+            params=request_params,
+            timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+        )
+        if rate_limiter is not None:
+            rate_limiter.record_response(
+                url, response.status_code, response.headers.get("Retry-After")
+            )
+        if response.ok:
+            return response.text
     return None
 
 
 def get_soup(
-    url: str, request_params: Optional[dict] = None
+    url: str,
+    request_params: Optional[dict] = None,
+    fetcher: Optional[Fetcher] = None,
+    parser: str = DEFAULT_PARSER,
 ) -> Optional[BeautifulSoup]:
-    html = get_html(url, request_params)
+    """
+    Fetch a page and parse it.
+
+    Pass a ``fetcher`` to reuse its pooled connections across calls,
+    otherwise every call opens a new connection. ``parser`` selects the
+    bs4 tree builder, one of "html.parser", "lxml" or "html5lib".
+    """
+    if parser not in BS4_PARSERS:
+        raise ValueError(
+            f"get_soup requires a bs4 parser, use get_document for {parser}."
+        )
+    if fetcher is not None:
+        html = fetcher.get_html(url, request_params)
+    else:
+        html = get_html(url, request_params)
+    if html:
+        from bs4 import (  # pylint: disable=import-outside-toplevel
+            BeautifulSoup,
+        )
+
+        with stage_timer("parse"):
+            return BeautifulSoup(html, parser)
+    return None
+
+
+def get_document(
+    url: str,
+    request_params: Optional[dict] = None,
+    fetcher: Optional[Fetcher] = None,
+    parser: Optional[str] = None,
+) -> Optional[Node]:
+    """
+    Fetch a page and parse it with any of the supported parser engines.
+    """
+    if fetcher is not None:
+        html = fetcher.get_html(url, request_params)
+    else:
+        html = get_html(url, request_params)
     if html:
-        return BeautifulSoup(html, "html.parser")
+        return parse_html(html, parser)
     return None
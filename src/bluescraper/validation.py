@@ -1,54 +1,122 @@
-from bs4 import BeautifulSoup
+from __future__ import annotations
 
-from bluescraper.config import ValidationConfig
-from bluescraper.utils import is_tag_in_soup, is_text_in_tag
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
+
+from bluescraper.config import ExistingStringInTag, ValidationConfig
+from bluescraper.instrumentation import stage_timer
+from bluescraper.matchers import TagMatcher
+from bluescraper.nodes import START, Node, as_node, walk
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+
+
+class ValidationPlan:
+    """
+    A ValidationConfig compiled for checking in a single traversal.
+
+    Every required tag is satisfied by its first match and every required
+    string is checked in the first element matching its tag, as with
+    ``is_tag_in_soup`` and ``is_text_in_tag``. The plan can be evaluated
+    on its own or alongside an ExtractionPlan in the same traversal.
+    """
+
+    def __init__(self, validation_config: ValidationConfig) -> None:
+        self.validation_config = validation_config
+        self.tag_matchers: List[TagMatcher] = [
+            tag.matcher for tag in validation_config.existing_tags or []
+        ]
+        self.string_checks: List[Tuple[TagMatcher, ExistingStringInTag]] = [
+            (existing_string_in_tag.tag.matcher, existing_string_in_tag)
+            for existing_string_in_tag in (
+                validation_config.existing_strings_in_tags or []
+            )
+        ]
+
+    def start_run(self) -> ValidationRun:
+        return ValidationRun(self)
+
+    def validate(self, document: Node) -> bool:
+        """
+        Check a document, stopping as soon as the result is known.
+
+        The traversal ends at the first required string that is missing
+        in its element, or once all checks have passed.
+        """
+        validation_run = self.start_run()
+        for event, element in walk(document):
+            if event is START and validation_run.start(element) is not None:
+                break
+        return validation_run.finish()
+
+
+class ValidationRun:
+    """
+    State of the checks of a ValidationPlan during one traversal.
+
+    ``valid`` is None while the result depends on elements not seen yet.
+    """
+
+    def __init__(self, plan: ValidationPlan) -> None:
+        self.plan = plan
+        self.pending_tags = list(plan.tag_matchers)
+        self.pending_strings = list(plan.string_checks)
+        self.valid: Optional[bool] = None
+        if not self.pending_tags and not self.pending_strings:
+            self.valid = True
+
+    def start(self, element: Node) -> Optional[bool]:
+        """
+        Check an element in document order and return the result, if known.
+        """
+        if self.valid is not None:
+            return self.valid
+        if self.pending_tags:
+            self.pending_tags = [
+                matcher
+                for matcher in self.pending_tags
+                if not matcher(element)
+            ]
+        if self.pending_strings:
+            pending_strings = []
+            for matcher, existing_string_in_tag in self.pending_strings:
+                if not matcher(element):
+                    pending_strings.append((matcher, existing_string_in_tag))
+                elif existing_string_in_tag.include_string not in (
+                    element.get_text(strip=True)
+                ):
+                    self.valid = False
+                    return self.valid
+            self.pending_strings = pending_strings
+        if not self.pending_tags and not self.pending_strings:
+            self.valid = True
+        return self.valid
+
+    def finish(self) -> bool:
+        """Return the result after all elements have been checked."""
+        if self.valid is None:
+            self.valid = False
+        return self.valid
 
 
 class SoapValidator:
     def __init__(
-        self, soup: BeautifulSoup, validation_config: ValidationConfig
+        self,
+        soup: Union[Node, BeautifulSoup],
+        validation_config: ValidationConfig,
     ):
-        self.soup = soup
+        self.soup = as_node(soup)
         self.validation_config = validation_config
         self.valid = False
 
     def validate(self):
         """
-        Check if scraped information exists for all required attributes.
-
-        Parameters
-        ----------
-        teaser_info : dict
-            Dictionary containing news teaser information.
+        Check if all required tags and strings exist in the document.
 
-        Returns
-        -------
-        bool
-            News teaser information is valid, when the function returns True.
+        The document is traversed once for all checks, see ValidationPlan.
+        The result is stored in ``valid``.
         """
-
-        if self.validation_config.existing_tags:
-            are_all_tags_in_soup = all(
-                (
-                    is_tag_in_soup(soup=self.soup, tag_definition=tag)
-                    for tag in self.validation_config.existing_tags
-                )
-            )
-        else:
-            are_all_tags_in_soup = True
-
-        if self.validation_config.existing_strings_in_tags:
-            are_all_strings_in_tags = all(
-                (
-                    is_text_in_tag(
-                        soup=self.soup,
-                        tag_definition=existing_string_in_tag.tag,
-                        text=existing_string_in_tag.include_string,
-                    )
-                    for existing_string_in_tag in self.validation_config.existing_strings_in_tags
-                )
+        with stage_timer("validate"):
+            self.valid = ValidationPlan(self.validation_config).validate(
+                self.soup
             )
-        else:
-            are_all_strings_in_tags = True
-
-        self.valid = all([are_all_tags_in_soup, are_all_strings_in_tags])
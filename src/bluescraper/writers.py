@@ -0,0 +1,498 @@
+"""
+Buffered writers for extracted records.
+
+Records are buffered in memory and written in batches into a directory
+tree partitioned by date, see ``fileutils.DateDirectoryTreeCreator``.
+Files are written under a temporary name and renamed atomically once
+they are complete, i.e. when they are rotated by size, record count or
+age, or when the writer is closed, so readers never see partial files.
+"""
+
+from __future__ import annotations
+
+import csv
+import datetime
+import gzip
+import importlib
+import io
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
+
+from bluescraper.columnar import import_pyarrow
+from bluescraper.fileutils import (
+    DateDirectoryTreeCreator,
+    create_file_name_from_date,
+)
+from bluescraper.records import to_dict
+
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_QUEUE_SIZE = 8
+FILE_NAME_DATE_PATTERN = "%Y%m%dT%H%M%S"
+TEMPORARY_PREFIX = "."
+TEMPORARY_SUFFIX = ".tmp"
+# Queue item asking the background thread to complete all open files.
+_ROTATE = object()
+# Date and group id of the records of a file.
+Partition = Tuple[datetime.date, Optional[str]]
+
+
+class RecordFile(ABC):
+    """An output file records are appended to in batches."""
+
+    extension = ""
+
+    def __init__(self, file_path: str, **options: Any) -> None:
+        self.file_path = file_path
+        self.record_count = 0
+
+    @abstractmethod
+    def write_batch(self, records: Sequence[dict]) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+    @property
+    def size(self) -> int:
+        """Number of bytes written so far."""
+        return os.path.getsize(self.file_path)
+
+
+class JsonlFile(RecordFile):
+    extension = ".jsonl"
+
+    def __init__(self, file_path: str, **options: Any) -> None:
+        super().__init__(file_path)
+        self.stream = self.open(file_path, **options)
+
+    def open(self, file_path: str, **options: Any) -> io.TextIOBase:
+        return open(file_path, "w", encoding="utf-8")
+
+    def write_batch(self, records: Sequence[dict]) -> None:
+        self.stream.write(
+            "".join(
+                json.dumps(to_dict(record), ensure_ascii=False) + "\n"
+                for record in records
+            )
+        )
+        self.record_count += len(records)
+
+    def close(self) -> None:
+        self.stream.close()
+
+    @property
+    def size(self) -> int:
+        return self.stream.tell()
+
+
+class GzipJsonlFile(JsonlFile):
+    extension = ".jsonl.gz"
+
+    def open(
+        self, file_path: str, compresslevel: int = 6, **options: Any
+    ) -> io.TextIOBase:
+        self.raw = open(file_path, "wb")
+        self.gzip = gzip.GzipFile(
+            fileobj=self.raw, mode="wb", compresslevel=compresslevel
+        )
+        return io.TextIOWrapper(self.gzip, encoding="utf-8")
+
+    def close(self) -> None:
+        super().close()
+        self.raw.close()
+
+    @property
+    def size(self) -> int:
+        # Compressed bytes, the text layer would report uncompressed ones.
+        self.stream.flush()
+        return self.raw.tell()
+
+
+class CsvFile(RecordFile):
+    """
+    CSV file with a header row.
+
+    The columns are ``fieldnames`` or the keys of the first record.
+    """
+
+    extension = ".csv"
+
+    def __init__(
+        self,
+        file_path: str,
+        fieldnames: Optional[Sequence[str]] = None,
+        **options: Any,
+    ) -> None:
+        super().__init__(file_path)
+        self.stream = open(file_path, "w", encoding="utf-8", newline="")
+        self.fieldnames = fieldnames
+        self.writer: Optional[csv.DictWriter] = None
+
+    def write_batch(self, records: Sequence[dict]) -> None:
+        if not records:
+            return
+        if self.writer is None:
+            self.writer = csv.DictWriter(
+                self.stream,
+                fieldnames=list(self.fieldnames or records[0]),
+                extrasaction="ignore",
+            )
+            self.writer.writeheader()
+        self.writer.writerows(records)
+        self.record_count += len(records)
+
+    def close(self) -> None:
+        self.stream.close()
+
+    @property
+    def size(self) -> int:
+        return self.stream.tell()
+
+
+class ParquetFile(RecordFile):
+    """
+    Parquet file with one row group per batch.
+
+    The schema is inferred from the first batch unless ``schema`` is
+    given. Requires the optional pyarrow package.
+    """
+
+    extension = ".parquet"
+
+    def __init__(
+        self, file_path: str, schema: Optional[Any] = None, **options: Any
+    ) -> None:
+        super().__init__(file_path)
+        self.pyarrow = import_pyarrow()
+        self.parquet = importlib.import_module("pyarrow.parquet")
+        self.schema = schema
+        self.options = options
+        self.writer: Optional[Any] = None
+
+    def write_batch(self, records: Sequence[dict]) -> None:
+        if not records:
+            return
+        table = self.pyarrow.Table.from_pylist(
+            [to_dict(record) for record in records], schema=self.schema
+        )
+        if self.writer is None:
+            self.schema = table.schema
+            self.writer = self.parquet.ParquetWriter(
+                self.file_path, self.schema, **self.options
+            )
+        self.writer.write_table(table)
+        self.record_count += len(records)
+
+    def close(self) -> None:
+        if self.writer is None:
+            # Write a valid file even without records.
+            self.writer = self.parquet.ParquetWriter(
+                self.file_path, self.schema or self.pyarrow.schema([])
+            )
+        self.writer.close()
+
+
+@dataclass
+class _OpenFile:
+    record_file: RecordFile
+    final_path: str
+    opened_at: float
+
+
+class RecordWriter:
+    """
+    Buffer records and write them in batches into date partitions.
+
+    Records are grouped by the date passed to ``write``, today by
+    default, and written to ``root_dir`` in directories following
+    ``date_pattern``. Records passed with a ``group_id`` are kept in
+    separate files per group, named with the group id after ``prefix``,
+    so records of different groups never share a file.
+
+    A batch is written when ``batch_size`` records of a partition are
+    buffered, when the oldest buffered record is older than
+    ``flush_interval`` seconds or on ``flush`` and ``close``. There is no
+    timer for ``flush_interval``, it is only checked when ``write`` is
+    called.
+
+    A file is completed and a new one started once it exceeds
+    ``max_file_bytes`` or ``max_file_records``, or ``rotate_interval``
+    seconds after it was opened. Completed files are renamed atomically
+    from a hidden temporary name and listed in ``written_files``. File
+    names include a random id of the writer, so several writers, also in
+    other processes, can write into the same partition.
+
+    With ``background``, files are written on a separate thread and at
+    most ``queue_size`` batches wait for it, and ``rotate_interval`` is
+    checked by that thread. Otherwise it is checked when ``write`` is
+    called. Errors of the thread are
+    raised by the next call to ``write``, ``flush`` or ``close``.
+    """
+
+    file_class: Type[RecordFile] = JsonlFile
+
+    def __init__(
+        self,
+        root_dir: Union[str, os.PathLike],
+        date_pattern: str = "%Y/%m",
+        prefix: str = "records-",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: Optional[float] = None,
+        max_file_bytes: Optional[int] = None,
+        max_file_records: Optional[int] = None,
+        rotate_interval: Optional[float] = None,
+        background: bool = True,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        **file_options: Any,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        self.root_dir = os.fspath(root_dir)
+        self.date_pattern = date_pattern
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.max_file_records = max_file_records
+        self.rotate_interval = rotate_interval
+        self.file_options = file_options
+        self.written_files: List[str] = []
+        self._buffers: Dict[Partition, List[dict]] = {}
+        self._buffered_since: Optional[float] = None
+        self._files: Dict[Partition, _OpenFile] = {}
+        self._writer_id = uuid.uuid4().hex[:12]
+        self._sequence = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        if background:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._thread = threading.Thread(
+                target=self._run, name="bluescraper-writer", daemon=True
+            )
+            self._thread.start()
+
+    def __enter__(self) -> RecordWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def write(
+        self,
+        record: dict,
+        date_: Optional[datetime.date] = None,
+        group_id: Optional[str] = None,
+    ) -> None:
+        self._raise_error()
+        if self._closed:
+            raise ValueError("write to closed writer")
+        if self._queue is None:
+            self._rotate_expired_files()
+        if date_ is None:
+            date_ = datetime.date.today()
+        partition = (date_, group_id)
+        buffer = self._buffers.setdefault(partition, [])
+        buffer.append(record)
+        if self._buffered_since is None:
+            self._buffered_since = time.monotonic()
+        if len(buffer) >= self.batch_size:
+            self._submit(partition, self._buffers.pop(partition))
+        elif (
+            self.flush_interval is not None
+            and time.monotonic() - self._buffered_since >= self.flush_interval
+        ):
+            self._flush_buffers()
+
+    def write_many(
+        self,
+        records: Sequence[dict],
+        date_: Optional[datetime.date] = None,
+        group_id: Optional[str] = None,
+    ) -> None:
+        for record in records:
+            self.write(record, date_, group_id)
+
+    def flush(self) -> None:
+        """Write all buffered records and wait until they are written."""
+        self._flush_buffers()
+        if self._queue is not None:
+            self._queue.join()
+        self._raise_error()
+
+    def rotate(self) -> None:
+        """
+        Write all buffered records and complete all open files.
+
+        Once this returns, every record written so far is in a completed
+        file, new records go to new files.
+        """
+        self._flush_buffers()
+        if self._queue is not None:
+            self._queue.put(_ROTATE)
+            self._queue.join()
+        else:
+            self._close_files()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Write all buffered records and complete all open files."""
+        if self._closed:
+            return
+        self._flush_buffers()
+        self._closed = True
+        if self._queue is not None and self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+        else:
+            self._close_files()
+        self._raise_error()
+
+    def _flush_buffers(self) -> None:
+        buffers, self._buffers = self._buffers, {}
+        self._buffered_since = None
+        for partition, records in buffers.items():
+            self._submit(partition, records)
+
+    def _submit(self, partition: Partition, records: List[dict]) -> None:
+        if not self._buffers:
+            self._buffered_since = None
+        if self._queue is None:
+            self._write_batch(partition, records)
+        else:
+            self._queue.put((partition, records))
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self) -> None:
+        assert self._queue is not None
+        timeout = self.rotate_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._guard(self._rotate_expired_files)
+                continue
+            try:
+                if item is None:
+                    self._guard(self._close_files)
+                    return
+                if item is _ROTATE:
+                    self._guard(self._close_files)
+                    continue
+                self._guard(self._write_batch, *item)
+                self._guard(self._rotate_expired_files)
+            finally:
+                self._queue.task_done()
+
+    def _guard(self, function, *args) -> None:
+        try:
+            function(*args)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            self._error = e
+
+    def _write_batch(self, partition: Partition, records: List[dict]) -> None:
+        open_file = self._files.get(partition)
+        if open_file is not None and self._is_full(open_file):
+            self._complete_file(partition)
+            open_file = None
+        if open_file is None:
+            open_file = self._open_file(partition)
+        open_file.record_file.write_batch(records)
+
+    def _is_full(self, open_file: _OpenFile) -> bool:
+        record_file = open_file.record_file
+        if (
+            self.max_file_records is not None
+            and record_file.record_count >= self.max_file_records
+        ):
+            return True
+        if (
+            self.max_file_bytes is not None
+            and record_file.size >= self.max_file_bytes
+        ):
+            return True
+        return False
+
+    def _rotate_expired_files(self) -> None:
+        if self.rotate_interval is None:
+            return
+        now = time.monotonic()
+        for partition, open_file in list(self._files.items()):
+            if now - open_file.opened_at >= self.rotate_interval:
+                self._complete_file(partition)
+
+    def _open_file(self, partition: Partition) -> _OpenFile:
+        date_, group_id = partition
+        prefix = (
+            self.prefix if group_id is None else f"{self.prefix}{group_id}-"
+        )
+        tree_creator = DateDirectoryTreeCreator(
+            date_=date_, date_pattern=self.date_pattern, root_dir=self.root_dir
+        )
+        tree_creator.make_dir_tree_from_date()
+        self._sequence += 1
+        file_name = create_file_name_from_date(
+            datetime.datetime.now(),
+            date_pattern=FILE_NAME_DATE_PATTERN,
+            prefix=prefix,
+            suffix=f"-{self._writer_id}-{self._sequence:05d}",
+            extension=self.file_class.extension,
+        )
+        directory = tree_creator.create_file_path_from_date()
+        temporary_path = os.path.join(
+            directory, TEMPORARY_PREFIX + file_name + TEMPORARY_SUFFIX
+        )
+        open_file = _OpenFile(
+            record_file=self.file_class(temporary_path, **self.file_options),
+            final_path=os.path.join(directory, file_name),
+            opened_at=time.monotonic(),
+        )
+        self._files[partition] = open_file
+        return open_file
+
+    def _complete_file(self, partition: Partition) -> None:
+        open_file = self._files.pop(partition)
+        open_file.record_file.close()
+        os.replace(open_file.record_file.file_path, open_file.final_path)
+        self.written_files.append(open_file.final_path)
+
+    def _close_files(self) -> None:
+        for partition in list(self._files):
+            self._complete_file(partition)
+
+
+class JsonlWriter(RecordWriter):
+    """Write records as JSON lines."""
+
+    file_class = JsonlFile
+
+
+class GzipJsonlWriter(RecordWriter):
+    """Write records as gzip compressed JSON lines."""
+
+    file_class = GzipJsonlFile
+
+
+class CsvWriter(RecordWriter):
+    """Write records as CSV, pass ``fieldnames`` to fix the columns."""
+
+    file_class = CsvFile
+
+
+class ParquetWriter(RecordWriter):
+    """Write records as Parquet, one row group per batch."""
+
+    file_class = ParquetFile
@@ -0,0 +1,392 @@
+"""
+Benchmarks for the parsing, validation and extraction hot paths.
+
+Synthetic pages are generated by scaling the html test fixtures: pages
+with many teaser groups, deeply nested pages and pages with large text
+nodes. Each case reports documents per second and the peak resident
+memory of the process that ran it. Results are written as JSON and can be
+compared against a baseline of an earlier run from the repository root::
+
+    python tests/benchmarks/benchmark.py --output baseline.json
+    python tests/benchmarks/benchmark.py --baseline baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass
+from itertools import cycle, islice
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from bluescraper import constants
+from bluescraper.config import Config, ConfigReader
+from bluescraper.nodes import DEFAULT_PARSER, parse_html
+from bluescraper.scraper import Scraper
+from bluescraper.validation import SoapValidator
+
+try:
+    import resource
+except ImportError:  # pragma: no cover, not available on Windows
+    resource = None  # type: ignore[assignment]
+
+BENCHMARKS = ("parse", "validate", "extract", "config_load")
+DEFAULT_GROUP_COUNTS = (10, 100, 1_000, 10_000, 100_000)
+DEFAULT_NESTING_DEPTH = 500
+DEFAULT_TEXT_SIZE = 1_000_000
+DEFAULT_MIN_TIME = 0.5
+DEFAULT_TOLERANCE = 0.2
+GROUP_WRAPPER = '<div class="copytext-element-wrapper__vertical-only">'
+
+
+def read_fixture(file_path: Union[str, os.PathLike]) -> str:
+    with open(file_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def generate_groups_page(
+    group_count: int,
+    template_path: Union[str, os.PathLike] = constants.VALID_GROUPS_HTML_PATH,
+) -> str:
+    """
+    Page with ``group_count`` teaser groups.
+
+    The groups of the template are repeated in turn, each copy with a
+    numbered headline, so no two groups have the same content.
+    """
+    template = read_fixture(template_path)
+    groups = [
+        GROUP_WRAPPER + group
+        for group in template.split(GROUP_WRAPPER)
+        if group.strip()
+    ]
+    pages = []
+    for i, group in enumerate(islice(cycle(groups), group_count)):
+        pages.append(
+            re.sub(
+                r"(teaser-right__headline\">)([^<]*)",
+                rf"\g<1>\g<2> {i}",
+                group,
+            )
+        )
+    return "<html><body>\n" + "\n".join(pages) + "</body></html>\n"
+
+
+def generate_nested_page(
+    depth: int,
+    template_path: Union[str, os.PathLike] = constants.VALID_GROUPS_HTML_PATH,
+) -> str:
+    """Template page wrapped in ``depth`` nested elements."""
+    template = read_fixture(template_path)
+    return (
+        "<html><body>"
+        + '<div class="nested">' * depth
+        + template
+        + "</div>" * depth
+        + "</body></html>\n"
+    )
+
+
+def generate_large_text_page(
+    text_size: int,
+    template_path: Union[str, os.PathLike] = constants.VALID_GROUPS_HTML_PATH,
+) -> str:
+    """Template page with short texts of about ``text_size`` characters."""
+    words = "Lorem ipsum dolor sit amet,\n    consectetur adipiscing elit. "
+    text = words * max(1, text_size // len(words))
+    return re.sub(
+        r"(teaser-right__shorttext\">)[^<]*",
+        lambda match: match.group(1) + text,
+        read_fixture(template_path),
+    )
+
+
+@dataclass
+class BenchmarkCase:
+    """
+    A benchmark applied to a synthetic page.
+
+    ``workload`` is one of "groups", "nested", "text" or "config" for the
+    config benchmark, ``size`` is the number of groups, the nesting depth
+    or the text size, respectively.
+    """
+
+    benchmark: str
+    workload: str
+    size: int
+    parser: str = DEFAULT_PARSER
+
+    @property
+    def name(self) -> str:
+        return f"{self.benchmark}[{self.workload}-{self.size}]"
+
+    def generate_page(self) -> str:
+        generators: Dict[str, Callable[[int], str]] = {
+            "groups": generate_groups_page,
+            "nested": generate_nested_page,
+            "text": generate_large_text_page,
+        }
+        return generators[self.workload](self.size)
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    runs: int
+    seconds: float
+    docs_per_sec: float
+    peak_rss_kib: Optional[int] = None
+
+
+@dataclass
+class Regression:
+    name: str
+    baseline_docs_per_sec: float
+    docs_per_sec: float
+
+    @property
+    def slowdown(self) -> float:
+        return 1 - self.docs_per_sec / self.baseline_docs_per_sec
+
+
+def get_peak_rss_kib() -> Optional[int]:
+    """Peak resident memory of the current process in KiB."""
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak_rss // 1024
+    return peak_rss
+
+
+def get_workload(
+    case: BenchmarkCase, config: Config, config_path: Path
+) -> Callable[[], object]:
+    """Return a function running the benchmark once on a prepared page."""
+    if case.benchmark == "config_load":
+        return ConfigReader(config_path).load
+    html = case.generate_page()
+    if case.benchmark == "parse":
+        return lambda: parse_html(html, case.parser)
+    document = parse_html(html, case.parser)
+    if case.benchmark == "validate":
+        if config.validation is None:
+            raise ValueError("The config has no validation.")
+        validation_config = config.validation
+        return SoapValidator(document, validation_config).validate
+    if case.benchmark == "extract":
+        return Scraper(document, config).extract
+    raise ValueError(f"Unknown benchmark {case.benchmark}.")
+
+
+def run_case(
+    case: BenchmarkCase,
+    config_path: Union[str, os.PathLike] = constants.CONFIG_GROUPS_YAML,
+    min_time: float = DEFAULT_MIN_TIME,
+) -> BenchmarkResult:
+    """
+    Run a benchmark case repeatedly for at least ``min_time`` seconds.
+
+    Preparing the page, e.g. parsing it for the extraction benchmark, is
+    not part of the measured time but of the peak memory.
+    """
+    config_path = Path(config_path)
+    workload = get_workload(
+        case, ConfigReader(config_path).load(), config_path
+    )
+    runs = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while runs == 0 or elapsed < min_time:
+        workload()
+        runs += 1
+        elapsed = time.perf_counter() - start
+    return BenchmarkResult(
+        name=case.name,
+        runs=runs,
+        seconds=elapsed,
+        docs_per_sec=runs / elapsed,
+        peak_rss_kib=get_peak_rss_kib(),
+    )
+
+
+def get_cases(
+    group_counts: Sequence[int] = DEFAULT_GROUP_COUNTS,
+    nesting_depth: int = DEFAULT_NESTING_DEPTH,
+    text_size: int = DEFAULT_TEXT_SIZE,
+    benchmarks: Sequence[str] = BENCHMARKS,
+    parser: str = DEFAULT_PARSER,
+) -> List[BenchmarkCase]:
+    workloads: List[Tuple[str, int]] = [
+        ("groups", group_count) for group_count in group_counts
+    ]
+    workloads += [("nested", nesting_depth), ("text", text_size)]
+    cases = []
+    for benchmark in benchmarks:
+        if benchmark == "config_load":
+            cases.append(BenchmarkCase(benchmark, "config", 0, parser))
+            continue
+        cases.extend(
+            BenchmarkCase(benchmark, workload, size, parser)
+            for workload, size in workloads
+        )
+    return cases
+
+
+def run_benchmarks(
+    cases: Sequence[BenchmarkCase],
+    config_path: Union[str, os.PathLike] = constants.CONFIG_GROUPS_YAML,
+    min_time: float = DEFAULT_MIN_TIME,
+    isolated: bool = True,
+) -> List[BenchmarkResult]:
+    """
+    Run benchmark cases one after another.
+
+    With ``isolated``, each case runs in a fresh process, so its peak
+    memory is not inflated by the cases before it.
+    """
+    if not isolated:
+        return [run_case(case, config_path, min_time) for case in cases]
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for case in cases:
+        with context.Pool(processes=1, maxtasksperchild=1) as pool:
+            results.append(
+                pool.apply(run_case, (case, os.fspath(config_path), min_time))
+            )
+    return results
+
+
+def save_results(
+    results: Sequence[BenchmarkResult], file_path: Union[str, os.PathLike]
+) -> None:
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [asdict(result) for result in results],
+    }
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_results(file_path: Union[str, os.PathLike]) -> List[BenchmarkResult]:
+    with open(file_path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return [BenchmarkResult(**result) for result in report["results"]]
+
+
+def compare_results(
+    results: Sequence[BenchmarkResult],
+    baseline: Sequence[BenchmarkResult],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[Regression]:
+    """
+    Cases whose throughput dropped more than ``tolerance`` below baseline.
+
+    Cases missing in the baseline are ignored.
+    """
+    baseline_by_name = {result.name: result for result in baseline}
+    regressions = []
+    for result in results:
+        reference = baseline_by_name.get(result.name)
+        if reference is None:
+            continue
+        if result.docs_per_sec < reference.docs_per_sec * (1 - tolerance):
+            regressions.append(
+                Regression(
+                    name=result.name,
+                    baseline_docs_per_sec=reference.docs_per_sec,
+                    docs_per_sec=result.docs_per_sec,
+                )
+            )
+    return regressions
+
+
+def format_result(result: BenchmarkResult) -> str:
+    peak_rss = (
+        "n/a"
+        if result.peak_rss_kib is None
+        else f"{result.peak_rss_kib / 1024:.1f} MiB"
+    )
+    return (
+        f"{result.name:<32} {result.docs_per_sec:>12.2f} docs/s"
+        f" {peak_rss:>12} peak RSS ({result.runs} runs)"
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark parsing, validation and extraction."
+    )
+    arg_parser.add_argument(
+        "--groups",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_GROUP_COUNTS),
+        help="Numbers of teaser groups of the generated pages.",
+    )
+    arg_parser.add_argument("--depth", type=int, default=DEFAULT_NESTING_DEPTH)
+    arg_parser.add_argument("--text-size", type=int, default=DEFAULT_TEXT_SIZE)
+    arg_parser.add_argument(
+        "--benchmark",
+        choices=BENCHMARKS,
+        nargs="+",
+        default=list(BENCHMARKS),
+    )
+    arg_parser.add_argument("--parser", default=DEFAULT_PARSER)
+    arg_parser.add_argument(
+        "--config", type=Path, default=constants.CONFIG_GROUPS_YAML
+    )
+    arg_parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME)
+    arg_parser.add_argument(
+        "--output", type=Path, help="Write the results to this JSON file."
+    )
+    arg_parser.add_argument(
+        "--baseline",
+        type=Path,
+        help="Compare the results to this JSON file of an earlier run.",
+    )
+    arg_parser.add_argument(
+        "--tolerance", type=float, default=DEFAULT_TOLERANCE
+    )
+    args = arg_parser.parse_args(argv)
+
+    cases = get_cases(
+        group_counts=args.groups,
+        nesting_depth=args.depth,
+        text_size=args.text_size,
+        benchmarks=args.benchmark,
+        parser=args.parser,
+    )
+    results = []
+    for case in cases:
+        (result,) = run_benchmarks([case], args.config, args.min_time)
+        print(format_result(result), flush=True)
+        results.append(result)
+    if args.output:
+        save_results(results, args.output)
+    if args.baseline:
+        regressions = compare_results(
+            results, load_results(args.baseline), args.tolerance
+        )
+        for regression in regressions:
+            print(
+                f"Regression {regression.name}:"
+                f" {regression.baseline_docs_per_sec:.2f} ->"
+                f" {regression.docs_per_sec:.2f} docs/s"
+                f" ({regression.slowdown:.0%} slower)"
+            )
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import pytest
+from benchmark import (
+    BenchmarkCase,
+    BenchmarkResult,
+    compare_results,
+    generate_groups_page,
+    generate_large_text_page,
+    generate_nested_page,
+    get_cases,
+    load_results,
+    main,
+    run_benchmarks,
+    save_results,
+)
+
+from bluescraper import constants
+from bluescraper.config import ConfigReader
+from bluescraper.scraper import Scraper
+
+
+@pytest.mark.parametrize("group_count", [1, 2, 5])
+def test_generate_groups_page(group_count):
+    config = ConfigReader(constants.CONFIG_GROUPS_YAML).load()
+    scraper = Scraper.from_html(generate_groups_page(group_count), config)
+    assert scraper.can_scrape()
+    (group_data,) = scraper.extract()
+    headlines = [record["headline"] for record in group_data.results]
+    assert len(headlines) == len(set(headlines)) == group_count
+
+
+def test_generate_nested_and_large_text_pages():
+    config = ConfigReader(constants.CONFIG_GROUPS_YAML).load()
+    nested_page = generate_nested_page(50)
+    assert nested_page.count('<div class="nested">') == 50
+    (group_data,) = Scraper.from_html(nested_page, config).extract()
+    assert len(group_data.results) == 2
+    (group_data,) = Scraper.from_html(
+        generate_large_text_page(10_000), config
+    ).extract()
+    assert len(group_data.results[0]["shorttext"]) >= 9_000
+
+
+def test_get_cases():
+    cases = get_cases(group_counts=[10], benchmarks=["parse", "config_load"])
+    assert [case.name for case in cases] == [
+        "parse[groups-10]",
+        "parse[nested-500]",
+        "parse[text-1000000]",
+        "config_load[config-0]",
+    ]
+
+
+@pytest.mark.parametrize("benchmark", ["parse", "validate", "extract"])
+def test_run_benchmarks(benchmark):
+    (result,) = run_benchmarks(
+        [BenchmarkCase(benchmark, "groups", 10)], min_time=0, isolated=False
+    )
+    assert result.name == f"{benchmark}[groups-10]"
+    assert result.runs == 1
+    assert result.docs_per_sec > 0
+
+
+def test_compare_results_with_saved_baseline(tmp_path):
+    baseline = [
+        BenchmarkResult("parse[groups-10]", 10, 1.0, 10.0),
+        BenchmarkResult("extract[groups-10]", 10, 1.0, 10.0),
+    ]
+    save_results(baseline, tmp_path / "baseline.json")
+    results = [
+        BenchmarkResult("parse[groups-10]", 9, 1.0, 9.0),
+        BenchmarkResult("extract[groups-10]", 5, 1.0, 5.0),
+        BenchmarkResult("validate[groups-10]", 5, 1.0, 5.0),
+    ]
+    (regression,) = compare_results(
+        results, load_results(tmp_path / "baseline.json"), tolerance=0.2
+    )
+    assert regression.name == "extract[groups-10]"
+    assert regression.slowdown == pytest.approx(0.5)
+
+
+def test_main_reports_regressions(tmp_path, capsys):
+    args = ["--groups", "2", "--benchmark", "config_load", "--min-time", "0"]
+    assert main(args + ["--output", str(tmp_path / "baseline.json")]) == 0
+    (result,) = load_results(tmp_path / "baseline.json")
+    result.docs_per_sec *= 1000
+    save_results([result], tmp_path / "baseline.json")
+    assert main(args + ["--baseline", str(tmp_path / "baseline.json")]) == 1
+    assert "Regression config_load[config-0]" in capsys.readouterr().out
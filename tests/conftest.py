@@ -1,8 +1,14 @@
 import datetime
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 from bs4 import BeautifulSoup
 
+from bluescraper import constants
 from bluescraper.config import ConfigReader
 from bluescraper.scraper import Scraper
 
@@ -38,3 +44,84 @@ def request_params_():
     category = "wirtschaft"
     archive_filter = ArchiveFilter(date_, category)
     return create_request_params(archive_filter)
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serve the html test files and track concurrent requests.
+
+    ``/<file name>`` returns the file from the html test directory,
+    ``/slow/<file name>`` waits ``delay`` seconds before responding,
+    ``/status/<code>`` answers with the given status code and any other
+    path answers with 404. Files are served with ETag and Last-Modified
+    validators and conditional requests matching them answer with 304.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def send_empty_response(self, code):
+        self.send_response(code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.headers.append(self.headers)
+            server.client_ports.add(self.client_address[1])
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            path = self.path.split("?")[0]
+            if path.startswith("/slow/"):
+                time.sleep(server.delay)
+                path = path[len("/slow") :]
+            if path.startswith("/status/"):
+                self.send_empty_response(int(path[len("/status/") :]))
+                return
+            file_path = constants.TEST_HTML_DIR.joinpath(path.lstrip("/"))
+            if path == "/" or not file_path.is_file():
+                self.send_empty_response(404)
+                return
+            body = file_path.read_bytes()
+            etag = f'"{hashlib.md5(body).hexdigest()}"'
+            last_modified = formatdate(file_path.stat().st_mtime, usegmt=True)
+            if self.headers.get("If-None-Match") == etag or (
+                "If-None-Match" not in self.headers
+                and self.headers.get("If-Modified-Since") == last_modified
+            ):
+                self.send_empty_response(304)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(name="http_server")
+def http_server_():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInRequestHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.headers = []
+    server.client_ports = set()
+    server.active = 0
+    server.max_active = 0
+    server.delay = 0.2
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
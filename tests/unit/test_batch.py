@@ -0,0 +1,123 @@
+from pathlib import Path
+
+import pytest
+
+from bluescraper import constants
+from bluescraper.batch import BatchResult, iter_chunks, scrape_batch
+from bluescraper.scraper import HtmlTagNotExists, Scraper
+
+EXPECTED_TEASERS = [
+    {
+        "date": "08.10.2023 • 13:17 Uhr",
+        "shorttext": "Test short text",
+        "headline": "Test headline",
+        "topline": "Test topline",
+        "article_link": "/dummy/article.html",
+    },
+    {
+        "date": "09.02.2024 • 21:28 Uhr",
+        "shorttext": "Test short text 2",
+        "headline": "Test headline 2",
+        "topline": "Test topline 2",
+        "article_link": "/dummy/article2.html",
+    },
+]
+
+
+def test_iter_chunks():
+    chunks = list(iter_chunks("abcde", chunksize=2))
+    assert chunks == [
+        [(0, "a"), (1, "b")],
+        [(2, "c"), (3, "d")],
+        [(4, "e")],
+    ]
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_scrape_batch_rejects_invalid_chunksize(config):
+    with pytest.raises(ValueError):
+        list(scrape_batch([], config, chunksize=0))
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+@pytest.mark.parametrize("chunksize", [1, 3])
+def test_scrape_batch_in_order(html, config, chunksize):
+    documents = [
+        html,
+        constants.INVALID_HTML_PATH,
+        constants.VALID_GROUPS_HTML_PATH,
+    ] * 3
+    results = list(
+        scrape_batch(documents, config, max_workers=2, chunksize=chunksize)
+    )
+    assert [result.index for result in results] == list(range(9))
+    assert [result.valid for result in results] == [True, False, True] * 3
+    assert results[2].source == str(constants.VALID_GROUPS_HTML_PATH)
+    assert results[0].results == [
+        Scraper.ScraperGroupData(results=EXPECTED_TEASERS, group_id="teaser")
+    ]
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_scrape_batch_unordered(html, config):
+    results = list(
+        scrape_batch([html] * 10, config, max_workers=2, ordered=False)
+    )
+    assert sorted(result.index for result in results) == list(range(10))
+    assert all(isinstance(result, BatchResult) for result in results)
+    assert all(result.valid for result in results)
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_NO_VALIDATION_YAML], indirect=True
+)
+def test_scrape_batch_captures_extraction_errors(config):
+    (result,) = scrape_batch([constants.INVALID_HTML_PATH], config)
+    assert result.valid
+    assert result.results is None
+    assert result.error.startswith(f"{HtmlTagNotExists.__name__}(")
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_scrape_batch_captures_read_and_parse_errors(html, config):
+    missing = Path("/nonexistent.html")
+    results = list(scrape_batch([html, missing, html], config, max_workers=2))
+    assert [result.valid for result in results] == [True, False, True]
+    assert results[1].source == str(missing)
+    assert results[1].error.startswith("FileNotFoundError(")
+
+    pytest.importorskip("lxml")
+    (result,) = scrape_batch([""], config, parser="lxml.html")
+    assert not result.valid
+    assert result.results is None
+    assert isinstance(result.error, str)
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_scrape_batch_reads_string_paths(config):
+    path = str(constants.VALID_GROUPS_HTML_PATH)
+    (result,) = scrape_batch([path], config, paths=True)
+    assert result.valid
+    assert result.source == path
+    assert result.results == [
+        Scraper.ScraperGroupData(results=EXPECTED_TEASERS, group_id="teaser")
+    ]
+    (result,) = scrape_batch([path], config)
+    assert not result.valid
+    assert result.source is None
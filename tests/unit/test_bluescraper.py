@@ -12,10 +12,27 @@ from bluescraper.config import (
     TagScrapingConfig,
     ValidationConfig,
 )
-from bluescraper.constants import DEFAULT_TIMEOUT
-from bluescraper.scraper import Scraper, get_group_tags
-from bluescraper.utils import TagDefinition, get_html, get_soup
-from bluescraper.validation import SoapValidator
+from bluescraper.constants import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from bluescraper.plan import (
+    START,
+    ExtractionPlan,
+    matches_tag_definition,
+    walk,
+)
+from bluescraper.scraper import (
+    ErrorPolicy,
+    HtmlTagNotExists,
+    Scraper,
+    get_group_tags,
+)
+from bluescraper.utils import (
+    TagDefinition,
+    get_html,
+    get_soup,
+    is_tag_in_soup,
+    is_text_in_tag,
+)
+from bluescraper.validation import SoapValidator, ValidationPlan
 
 
 def test_loading_config_from_file():
@@ -284,10 +301,103 @@ def test_validate_html(soup, expected):
     assert validator.valid == expected
 
 
+HEADLINE_TAG = TagDefinition(
+    name="span", attrs={"class": "teaser-right__headline"}
+)
+MISSING_TAG = TagDefinition(name="section")
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        constants.VALID_HTML_PATH,
+        constants.VALID_GROUPS_HTML_PATH,
+        constants.INVALID_HTML_PATH,
+    ],
+    indirect=True,
+)
+@pytest.mark.parametrize(
+    "existing_tags, existing_strings_in_tags",
+    [
+        ([HEADLINE_TAG], []),
+        ([HEADLINE_TAG, MISSING_TAG], []),
+        ([], [("Test headline", HEADLINE_TAG)]),
+        ([], [("Test headline 2", HEADLINE_TAG)]),
+        ([HEADLINE_TAG], [("headline", MISSING_TAG)]),
+        ([], []),
+    ],
+)
+def test_validation_plan_matches_checks_per_tag(
+    soup, existing_tags, existing_strings_in_tags
+):
+    expected = all(is_tag_in_soup(soup, tag) for tag in existing_tags) and all(
+        is_text_in_tag(soup, tag, text)
+        for text, tag in existing_strings_in_tags
+    )
+    validation_config = ValidationConfig(
+        existing_tags=existing_tags,
+        existing_strings_in_tags=[
+            ExistingStringInTag(include_string=text, tag=tag)
+            for text, tag in existing_strings_in_tags
+        ],
+    )
+    assert ValidationPlan(validation_config).validate(soup) is expected
+
+
+@pytest.mark.parametrize(
+    "html", [constants.VALID_GROUPS_HTML_PATH], indirect=True
+)
+def test_validation_stops_at_first_failed_check(soup):
+    validation_config = ValidationConfig(
+        existing_tags=[MISSING_TAG],
+        existing_strings_in_tags=[
+            ExistingStringInTag(include_string="missing", tag=HEADLINE_TAG)
+        ],
+    )
+    validation_run = ValidationPlan(validation_config).start_run()
+    visited = []
+    for event, element in walk(soup):
+        if event is START:
+            visited.append(element)
+            if validation_run.start(element) is not None:
+                break
+    assert validation_run.valid is False
+    assert visited[-1].get("class") == "teaser-right__headline"
+    assert len(visited) < sum(event is START for event, _ in walk(soup))
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [
+        (constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML),
+        (constants.VALID_HTML_PATH, constants.CONFIG_YAML),
+    ],
+    indirect=True,
+)
+def test_can_scrape_shares_traversal_with_extract(html, config):
+    expected = Scraper.from_html(html, config).extract()
+    scraper = Scraper.from_html(html, config)
+    assert scraper.can_scrape()
+    with patch.object(ExtractionPlan, "run") as run:
+        assert scraper.extract() == expected
+    run.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.INVALID_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_can_scrape_invalid_page(html, config):
+    scraper = Scraper.from_html(html, config)
+    assert not scraper.can_scrape()
+    assert scraper.group_matches is None
+
+
 @pytest.mark.parametrize(
     "html", [constants.TEST_HTML_DIR.joinpath("valid.html")], indirect=True
 )
-@patch("bluescraper.utils.requests.get")
+@patch("requests.get")
 def test_get_html(mock_requests_get, html):
     mock_requests_get.return_value.ok = True
     mock_requests_get.return_value.text = html
@@ -297,7 +407,7 @@ def test_get_html(mock_requests_get, html):
     mock_requests_get.assert_called_once_with(
         url="https://example.com/",
         params={"parameter": "value"},
-        timeout=DEFAULT_TIMEOUT,
+        timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
     )
     assert html == html_
 
@@ -305,7 +415,7 @@ def test_get_html(mock_requests_get, html):
 @pytest.mark.parametrize(
     "html", [constants.TEST_HTML_DIR.joinpath("valid.html")], indirect=True
 )
-@patch("bluescraper.utils.requests.get")
+@patch("requests.get")
 def test_get_soup(mock_requests_get, soup, html):
     mock_requests_get.return_value.ok = True
     mock_requests_get.return_value.text = html
@@ -315,7 +425,7 @@ def test_get_soup(mock_requests_get, soup, html):
     mock_requests_get.assert_called_once_with(
         url="https://example.com/",
         params={"parameter": "value"},
-        timeout=DEFAULT_TIMEOUT,
+        timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
     )
     assert soup == soup_
 
@@ -450,3 +560,245 @@ def test_get_group_tags():
     contains = ["a", "b"]
     tags_in_group = get_group_tags(contains=contains, tags=tags)
     assert tags_in_group == expected
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        constants.VALID_HTML_PATH,
+        constants.VALID_GROUPS_HTML_PATH,
+        constants.VALID_GROUPS_GROUP_NOT_COMPLETE_HTML_PATH,
+        constants.INVALID_HTML_PATH,
+    ],
+    indirect=True,
+)
+@pytest.mark.parametrize(
+    "tag_definition",
+    [
+        TagDefinition(name="div", attrs={"class": "teaser-right twelve"}),
+        TagDefinition(attrs={"class": "teaser-right"}),
+        TagDefinition(attrs={"class": "twelve teaser-right"}),
+        TagDefinition(name="span"),
+        TagDefinition(attrs={"data-teaserdate": "1696763839"}),
+    ],
+)
+def test_matches_tag_definition_agrees_with_find_all(soup, tag_definition):
+    expected = soup.find_all(
+        name=tag_definition.name, attrs=tag_definition.attrs
+    )
+    matched = [
+        element.element
+        for event, element in walk(soup)
+        if event == START and matches_tag_definition(element, tag_definition)
+    ]
+    assert matched == expected
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [
+        (constants.INVALID_HTML_PATH, constants.CONFIG_YAML),
+    ],
+    indirect=True,
+)
+def test_extract_raises_for_missing_tag(scraper):
+    with pytest.raises(HtmlTagNotExists):
+        scraper.extract()
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_MULTIPLE_GROUPS_YAML], indirect=True
+)
+def test_extraction_plan_resolves_group_tags(config):
+    plan = ExtractionPlan(config.scraping)
+    assert [[tag.id for tag in tags] for tags in plan.group_tags] == [
+        ["article_link", "topline", "headline", "shorttext", "date"],
+        ["topline", "headline"],
+    ]
+
+
+INCOMPLETE_GROUPS_HTML = """
+<div class="teaser-right twelve">
+    <a class="teaser-right__link" href="/a.html">
+        <span class="teaser-right__labeltopline">Topline a</span>
+        <span class="teaser-right__headline">Headline a</span>
+    </a>
+</div>
+<div class="teaser-right twelve">
+    <a class="teaser-right__link">
+        <span class="teaser-right__labeltopline">Topline b</span>
+    </a>
+</div>
+"""
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_MULTIPLE_GROUPS_YAML], indirect=True
+)
+def test_iter_extract_error_policies(config):
+    scraper = Scraper.from_html(INCOMPLETE_GROUPS_HTML, config)
+    with pytest.raises(HtmlTagNotExists):
+        list(scraper.iter_extract())
+    assert list(scraper.iter_extract(on_error="skip")) == [
+        ("line", {"topline": "Topline a", "headline": "Headline a"})
+    ]
+    records = list(scraper.iter_extract(on_error=ErrorPolicy.NULL))
+    assert [group_id for group_id, _ in records] == [
+        "teaser",
+        "teaser",
+        "line",
+        "line",
+    ]
+    assert records[1][1] == {
+        "article_link": None,
+        "topline": "Topline b",
+        "headline": None,
+        "shorttext": None,
+        "date": None,
+    }
+    assert records[2][1] == {"topline": "Topline a", "headline": "Headline a"}
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_MULTIPLE_GROUPS_YAML], indirect=True
+)
+def test_extract_with_skip_policy_keeps_empty_groups(config):
+    scraper = Scraper.from_html(INCOMPLETE_GROUPS_HTML, config)
+    assert scraper.extract(on_error="skip") == [
+        Scraper.ScraperGroupData(results=[], group_id="teaser"),
+        Scraper.ScraperGroupData(
+            results=[{"topline": "Topline a", "headline": "Headline a"}],
+            group_id="line",
+        ),
+    ]
+
+
+NESTED_GROUPS_CONFIG = Config(
+    scraping={
+        "tags": [
+            {"id": "title", "tag": {"name": "h2"}},
+            {"id": "headline", "tag": {"name": "h3"}},
+            {"id": "label", "tag": {"name": "li"}},
+        ],
+        "groups": [
+            {
+                "id": "section",
+                "contains": ["title"],
+                "tag": {"name": "section"},
+                "groups": [
+                    {
+                        "id": "teaser",
+                        "contains": ["headline"],
+                        "tag": {"attrs": {"class": "teaser"}},
+                        "groups": [
+                            {
+                                "id": "labels",
+                                "contains": ["label"],
+                                "tag": {"name": "ul"},
+                            }
+                        ],
+                    }
+                ],
+            }
+        ],
+    }
+)
+
+NESTED_GROUPS_HTML = """
+<div class="teaser"><h3>Outside of sections</h3></div>
+<section>
+    <h2>News</h2>
+    <div class="teaser">
+        <h3>Headline a</h3>
+        <ul><li>one</li><li>two</li></ul>
+    </div>
+    <div class="teaser"><h3>Headline b</h3></div>
+</section>
+<section>
+    <h2>Sports</h2>
+    <div class="teaser">
+        <h3>Headline c</h3>
+        <ul><li>three</li></ul>
+    </div>
+</section>
+"""
+
+
+def test_extraction_plan_flattens_nested_groups():
+    plan = ExtractionPlan(NESTED_GROUPS_CONFIG.scraping)
+    assert [group.id for group in plan.groups] == [
+        "section",
+        "teaser",
+        "labels",
+    ]
+    assert plan.group_parents == [None, 0, 1]
+    assert plan.group_children == [[1], [2], []]
+    assert plan.tag_index == {"title": 0, "headline": 1, "label": 2}
+    assert [[tag.id for tag in tags] for tags in plan.group_tags] == [
+        ["title"],
+        ["headline"],
+        ["label"],
+    ]
+
+
+def test_extract_nested_groups_scoped_to_parent():
+    scraper = Scraper.from_html(NESTED_GROUPS_HTML, NESTED_GROUPS_CONFIG)
+    (group_data,) = scraper.extract()
+    assert group_data.group_id == "section"
+    assert group_data.to_dict()["results"] == [
+        {
+            "title": "News",
+            "teaser": [
+                {
+                    "headline": "Headline a",
+                    "labels": [{"label": "one|two"}],
+                },
+                {"headline": "Headline b", "labels": []},
+            ],
+        },
+        {
+            "title": "Sports",
+            "teaser": [
+                {"headline": "Headline c", "labels": [{"label": "three"}]}
+            ],
+        },
+    ]
+
+
+def test_extract_nested_groups_error_policy():
+    scraper = Scraper.from_html(
+        NESTED_GROUPS_HTML.replace("<h3>Headline b</h3>", ""),
+        NESTED_GROUPS_CONFIG,
+    )
+    with pytest.raises(HtmlTagNotExists):
+        scraper.extract()
+    (group_data,) = scraper.extract(on_error="skip")
+    assert [
+        [teaser["headline"] for teaser in section["teaser"]]
+        for section in group_data.results
+    ] == [["Headline a"], ["Headline c"]]
+
+
+def test_nested_group_does_not_match_parent_element():
+    config = Config(
+        scraping={
+            "tags": [{"id": "t", "tag": {"name": "b"}}],
+            "groups": [
+                {
+                    "id": "g",
+                    "contains": ["t"],
+                    "tag": {"name": "div"},
+                    "groups": [
+                        {"id": "h", "contains": ["t"], "tag": {"name": "div"}}
+                    ],
+                }
+            ],
+        }
+    )
+    scraper = Scraper.from_html("<div><b>x</b></div>", config)
+    assert scraper.extract()[0].to_dict()["results"] == [{"t": "x", "h": []}]
+    scraper = Scraper.from_html("<div><div><b>x</b></div></div>", config)
+    assert scraper.extract()[0].to_dict()["results"] == [
+        {"t": "x", "h": [{"t": "x"}]},
+        {"t": "x", "h": []},
+    ]
@@ -0,0 +1,131 @@
+from unittest.mock import patch
+
+import pytest
+
+from bluescraper import constants
+from bluescraper.cache import (
+    CACHE_FORMAT_VERSION,
+    CacheStats,
+    ResultCache,
+    get_cache_key,
+    get_config_hash,
+)
+from bluescraper.config import ConfigReader
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_scrape_caches_results(html, config, scraper):
+    cache = ResultCache()
+    first = cache.scrape(html, config)
+    with patch("bluescraper.cache.Scraper.from_html") as from_html:
+        second = cache.scrape(html, config)
+    from_html.assert_not_called()
+    assert first == second == (True, scraper.extract())
+    assert cache.stats == CacheStats(hits=1, misses=1)
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.INVALID_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_scrape_caches_invalid_pages(html, config):
+    cache = ResultCache()
+    assert cache.scrape(html, config) == (False, None)
+    assert cache.scrape(html, config) == (False, None)
+    assert cache.stats.hits == 1
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_scrape_caches_results_per_parser(html, config):
+    pytest.importorskip("lxml")
+    cache = ResultCache()
+    cache.scrape(html, config, parser="html.parser")
+    cache.scrape(html, config, parser="lxml.html")
+    assert cache.stats == CacheStats(misses=2)
+    cache.scrape(html, config, parser="lxml.html")
+    assert cache.stats == CacheStats(hits=1, misses=2)
+
+
+def test_cache_key_includes_format_version():
+    key = get_cache_key("<p></p>", "config", "lxml")
+    assert key.startswith(f"v{CACHE_FORMAT_VERSION}-")
+    assert key != get_cache_key("<p></p>", "config")
+
+
+def test_config_hash_distinguishes_configs():
+    config = ConfigReader(constants.CONFIG_GROUPS_YAML).load()
+    same_config = ConfigReader(constants.CONFIG_GROUPS_YAML).load()
+    other_config = ConfigReader(constants.CONFIG_MULTIPLE_GROUPS_YAML).load()
+    assert get_config_hash(config) == get_config_hash(same_config)
+    assert get_config_hash(config) != get_config_hash(other_config)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(maxsize=2)
+    cache.put("a", (True, []))
+    cache.put("b", (True, []))
+    cache.get("a")
+    cache.put("c", (True, []))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert len(cache) == 2
+    assert cache.stats == CacheStats(hits=2, misses=1, evictions=1)
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_HTML_PATH, constants.CONFIG_YAML)],
+    indirect=True,
+)
+def test_disk_tier_survives_restart(tmp_path, html, config):
+    cache = ResultCache(directory=tmp_path)
+    entry = cache.scrape(html, config)
+    cache.close()
+    restarted_cache = ResultCache(maxsize=1, directory=tmp_path)
+    assert restarted_cache.scrape(html, config) == entry
+    assert restarted_cache.stats == CacheStats(hits=1, disk_hits=1)
+    restarted_cache.close()
+
+
+def test_rejects_invalid_size():
+    with pytest.raises(ValueError):
+        ResultCache(maxsize=0)
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_scrape_returns_copies(html, config):
+    cache = ResultCache()
+    _, results = cache.scrape(html, config)
+    expected = [group_data.to_dict() for group_data in results]
+    results[0].results.clear()
+    _, results = cache.scrape(html, config)
+    assert [group_data.to_dict() for group_data in results] == expected
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_config_changed_in_place_is_scraped_again(html, config):
+    cache = ResultCache(plan_cache_size=1)
+    _, results = cache.scrape(html, config)
+    removed_tag = config.scraping.tags.pop()
+    _, changed_results = cache.scrape(html, config)
+    assert cache.stats == CacheStats(misses=2)
+    assert removed_tag.id in results[0].results[0]
+    assert removed_tag.id not in changed_results[0].results[0]
+    assert len(cache._plans) == 1
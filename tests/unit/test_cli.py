@@ -0,0 +1,145 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from bluescraper import constants
+from bluescraper.cli import main
+from bluescraper.config import ConfigReader
+from bluescraper.scraper import Scraper
+
+# Generous budget for importing the CLI, which must not load the
+# scraping dependencies.
+IMPORT_TIME_BUDGET = 0.5
+HEAVY_MODULES = ("bs4", "requests", "yaml", "pydantic", "lxml")
+
+
+def run_python(code: str) -> str:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def test_cli_import_is_lazy():
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import bluescraper.cli\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(*[m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+    )
+    seconds, loaded = run_python(code).split("\n", 1)
+    assert float(seconds) < IMPORT_TIME_BUDGET
+    assert loaded.strip() == ""
+
+
+def test_scraper_import_skips_network_and_yaml():
+    code = (
+        "import sys\n"
+        "import bluescraper.scraper\n"
+        "print(*[m for m in ('bs4', 'requests', 'yaml') if m in sys.modules])"
+    )
+    assert run_python(code).strip() == ""
+
+
+def test_help(capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        main(["--help"])
+    assert exc_info.value.code == 0
+    assert "validate-config" in capsys.readouterr().out
+
+
+def test_validate_config(capsys):
+    assert main(["validate-config", str(constants.CONFIG_GROUPS_YAML)]) == 0
+    assert "is valid" in capsys.readouterr().out
+
+
+def test_validate_invalid_config(tmp_path, capsys):
+    config_file = tmp_path / "config.yml"
+    config_file.write_text("scraping:\n  groups: []\n", encoding="utf-8")
+    assert main(["validate-config", str(config_file)]) == 1
+    assert "is not a valid config" in capsys.readouterr().err
+
+
+def test_validate_config_with_unknown_parser(tmp_path, capsys):
+    config_file = tmp_path / "config.yml"
+    config = constants.CONFIG_GROUPS_YAML.read_text(encoding="utf-8")
+    config_file.write_text(config + "parser: lxm\n", encoding="utf-8")
+    assert main(["validate-config", str(config_file)]) == 1
+    assert "Unknown parser lxm" in capsys.readouterr().err
+
+
+def get_expected_results(html_path):
+    config = ConfigReader(constants.CONFIG_GROUPS_YAML).load()
+    scraper = Scraper.from_html(html_path.read_text(encoding="utf-8"), config)
+    return json.loads(
+        json.dumps([group.to_dict() for group in scraper.extract()])
+    )
+
+
+def test_scrape_file(capsys):
+    source = str(constants.VALID_GROUPS_HTML_PATH)
+    args = ["scrape", source, "--config", str(constants.CONFIG_GROUPS_YAML)]
+    assert main(args) == 0
+    output = json.loads(capsys.readouterr().out)
+    assert output["source"] == source
+    assert output["valid"] is True
+    assert output["results"] == get_expected_results(
+        constants.VALID_GROUPS_HTML_PATH
+    )
+
+
+def test_scrape_invalid_file(capsys):
+    args = [
+        "scrape",
+        str(constants.INVALID_HTML_PATH),
+        "--config",
+        str(constants.CONFIG_GROUPS_YAML),
+    ]
+    assert main(args) == 1
+    assert json.loads(capsys.readouterr().out)["results"] is None
+
+
+def test_scrape_url(http_server, tmp_path):
+    output = tmp_path / "result.json"
+    args = [
+        "scrape",
+        f"{http_server.url}/valid-groups.html",
+        "--config",
+        str(constants.CONFIG_GROUPS_YAML),
+        "--output",
+        str(output),
+    ]
+    assert main(args) == 0
+    result = json.loads(output.read_text(encoding="utf-8"))
+    assert result["results"] == get_expected_results(
+        constants.VALID_GROUPS_HTML_PATH
+    )
+
+
+def test_batch(tmp_path, capsys):
+    shutil.copy(constants.VALID_GROUPS_HTML_PATH, tmp_path / "a.html")
+    shutil.copy(constants.INVALID_HTML_PATH, tmp_path / "b.html")
+    args = [
+        "batch",
+        str(tmp_path),
+        "--config",
+        str(constants.CONFIG_GROUPS_YAML),
+        "--workers",
+        "1",
+    ]
+    assert main(args) == 0
+    lines = capsys.readouterr().out.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record["valid"] for record in records] == [True, False]
+    assert records[0]["results"] == get_expected_results(
+        constants.VALID_GROUPS_HTML_PATH
+    )
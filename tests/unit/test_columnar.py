@@ -0,0 +1,94 @@
+import pytest
+
+from bluescraper import constants
+from bluescraper.columnar import ColumnarResult, StringColumn
+from bluescraper.scraper import ErrorPolicy, Scraper
+
+
+def test_string_column():
+    column = StringColumn()
+    values = ["a", None, "", "Ümlaut", None, "b", "c", "d", "e"]
+    for value in values:
+        column.append(value)
+    assert len(column) == 9
+    assert list(column) == values
+    assert column[-1] == "e"
+    assert column.null_count == 2
+    with pytest.raises(IndexError):
+        column[9]
+
+
+def test_string_column_to_arrow():
+    pa = pytest.importorskip("pyarrow")
+    column = StringColumn()
+    values = ["a", None, "Ümlaut"] * 5
+    for value in values:
+        column.append(value)
+    array = column.to_arrow()
+    array.validate(full=True)
+    assert array.type == pa.large_string()
+    assert array.to_pylist() == values
+    column.append("after export")
+    assert array.to_pylist() == values
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [
+        (constants.VALID_HTML_PATH, constants.CONFIG_YAML),
+        (constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML),
+        (
+            constants.VALID_GROUPS_HTML_PATH,
+            constants.CONFIG_MULTIPLE_GROUPS_YAML,
+        ),
+    ],
+    indirect=True,
+)
+def test_extract_columnar_matches_extract(html, config, scraper):
+    builder = scraper.extract_columnar()
+    for group_data in scraper.extract():
+        result = builder[group_data.group_id]
+        assert result.to_records() == group_data.results
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_builder_collects_many_pages(html, config, scraper):
+    builder = scraper.extract_columnar()
+    scraper.extract_columnar(builder=builder)
+    assert builder.num_rows == 4
+    assert builder["teaser"].column_names == [
+        "article_link",
+        "topline",
+        "headline",
+        "shorttext",
+        "date",
+    ]
+
+
+def test_columnar_result_keeps_nulls():
+    result = ColumnarResult(["headline", "date"])
+    result.extend([{"headline": "a", "date": None}, {"headline": "b"}])
+    assert result.to_pydict() == {"headline": ["a", "b"], "date": [None, None]}
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_record_batches_and_parquet(tmp_path, config):
+    pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    with constants.VALID_GROUPS_HTML_PATH.open(encoding="utf-8") as f:
+        html = f.read().replace("teaser-right__date", "other-date", 1)
+    scraper = Scraper.from_html(html, config)
+    builder = scraper.extract_columnar(on_error=ErrorPolicy.NULL)
+    assert builder["teaser"].to_pydict()["date"][0] is None
+    ((group_id, record_batch),) = builder.to_record_batches()
+    assert group_id == "teaser"
+    assert record_batch.to_pylist() == builder["teaser"].to_records()
+    (file_path,) = builder.write_parquet(tmp_path)
+    assert file_path.endswith("teaser.parquet")
+    assert pq.read_table(file_path).to_batches()[0].equals(record_batch)
@@ -0,0 +1,171 @@
+import csv
+import datetime
+import json
+import os
+
+import pytest
+
+from bluescraper import constants
+from bluescraper.crawler import (
+    CHECKPOINT_FILE_NAME,
+    ArchiveCrawler,
+    CrawlCheckpoint,
+    CrawlStats,
+    DateStatus,
+    crawl_archive,
+)
+from bluescraper.fetch import Fetcher, ValidatorStore
+from bluescraper.writers import CsvWriter, JsonlWriter
+
+START_DATE = datetime.date(2024, 2, 27)
+END_DATE = datetime.date(2024, 3, 2)
+
+
+def read_records(file_paths):
+    records = []
+    for file_path in sorted(file_paths):
+        with open(file_path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_crawl_archive_writes_date_partitions(tmp_path, http_server, config):
+    url_template = (
+        f"{http_server.url}/valid-groups.html?datum={{date:%Y-%m-%d}}"
+    )
+    stats = crawl_archive(
+        url_template, START_DATE, END_DATE, config, tmp_path, max_workers=2
+    )
+    assert stats == CrawlStats(done=4, records=8)
+    assert sorted(http_server.requests) == [
+        f"/valid-groups.html?datum={date_}"
+        for date_ in ["2024-02-27", "2024-02-28", "2024-02-29", "2024-03-01"]
+    ]
+    assert sorted(os.listdir(tmp_path)) == [CHECKPOINT_FILE_NAME, "2024"]
+    february = [
+        os.path.join(tmp_path, "2024/02", file_name)
+        for file_name in os.listdir(tmp_path / "2024/02")
+    ]
+    assert len(read_records(february)) == 6
+    assert read_records(february)[0]["headline"] == "Test headline"
+
+    stats = crawl_archive(url_template, START_DATE, END_DATE, config, tmp_path)
+    assert stats == CrawlStats(skipped=4)
+    assert len(http_server.requests) == 4
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_failed_dates_are_retried(tmp_path, http_server, config):
+    checkpoint = CrawlCheckpoint(tmp_path / "checkpoint")
+    url_template = f"{http_server.url}/{{date:%d}}.html"
+    with JsonlWriter(tmp_path) as writer, ArchiveCrawler(
+        url_template, config, writer, checkpoint=checkpoint
+    ) as crawler:
+        stats = crawler.crawl(START_DATE, END_DATE)
+    assert stats == CrawlStats(failed=4)
+    checkpoint = CrawlCheckpoint(tmp_path / "checkpoint")
+    assert set(checkpoint.statuses.values()) == {DateStatus.FAILED}
+    assert not checkpoint.is_final(START_DATE)
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_invalid_pages_are_final(tmp_path, http_server, config):
+    checkpoint = CrawlCheckpoint(tmp_path / "checkpoint")
+    with JsonlWriter(tmp_path) as writer, ArchiveCrawler(
+        f"{http_server.url}/invalid.html", config, writer, checkpoint
+    ) as crawler:
+        assert crawler.crawl(START_DATE, END_DATE) == CrawlStats(invalid=4)
+    assert not writer.written_files
+    assert CrawlCheckpoint(tmp_path / "checkpoint").is_final(START_DATE)
+
+
+def test_checkpoint_ignores_truncated_lines(tmp_path):
+    checkpoint_path = tmp_path / "checkpoint"
+    checkpoint = CrawlCheckpoint(checkpoint_path)
+    checkpoint.record(
+        {
+            START_DATE: DateStatus.FAILED,
+            END_DATE: DateStatus.DONE,
+        }
+    )
+    checkpoint.record({START_DATE: DateStatus.DONE})
+    with open(checkpoint_path, "a", encoding="utf-8") as f:
+        f.write("2024-03-0")
+    statuses = CrawlCheckpoint(checkpoint_path).statuses
+    assert statuses == {START_DATE: DateStatus.DONE, END_DATE: DateStatus.DONE}
+
+
+def test_crawler_rejects_invalid_workers(tmp_path):
+    with pytest.raises(ValueError):
+        ArchiveCrawler("", None, JsonlWriter(tmp_path), max_workers=0)
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_dates_failing_after_fetch_are_fetched_again(
+    tmp_path, http_server, config
+):
+    checkpoint_path = tmp_path / "checkpoint"
+    url_template = (
+        f"{http_server.url}/valid-groups.html?datum={{date:%Y-%m-%d}}"
+    )
+    end_date = START_DATE + datetime.timedelta(days=1)
+    with Fetcher(validator_store=ValidatorStore()) as fetcher:
+
+        def crawl(**options):
+            with JsonlWriter(tmp_path) as writer, ArchiveCrawler(
+                url_template,
+                config,
+                writer,
+                checkpoint=CrawlCheckpoint(checkpoint_path),
+                fetcher=fetcher,
+                **options,
+            ) as crawler:
+                return crawler.crawl(START_DATE, end_date)
+
+        # Fails after the page and its validators were fetched.
+        assert crawl(parser="unknown") == CrawlStats(failed=1)
+        assert crawl() == CrawlStats(done=1, records=2)
+        assert crawl() == CrawlStats(skipped=1)
+        assert crawl(refresh=True) == CrawlStats(unchanged=1)
+    conditional = [
+        "If-None-Match" in headers for headers in http_server.headers
+    ]
+    assert conditional == [False, False, True]
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_MULTIPLE_GROUPS_YAML], indirect=True
+)
+def test_crawl_writes_groups_to_separate_files(tmp_path, http_server, config):
+    crawl_archive(
+        f"{http_server.url}/valid-groups.html?datum={{date:%Y-%m-%d}}",
+        START_DATE,
+        START_DATE + datetime.timedelta(days=1),
+        config,
+        tmp_path,
+        writer=CsvWriter(tmp_path),
+    )
+    directory = tmp_path / "2024/02"
+    files = {
+        group_id: [
+            directory / file_name
+            for file_name in os.listdir(directory)
+            if file_name.startswith(f"records-{group_id}-")
+        ]
+        for group_id in ["teaser", "line"]
+    }
+    assert len(os.listdir(directory)) == 2
+    with open(*files["line"], encoding="utf-8", newline="") as f:
+        line_rows = list(csv.DictReader(f))
+    assert line_rows and all(
+        set(row) == {"topline", "headline"} for row in line_rows
+    )
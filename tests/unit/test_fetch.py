@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+
+from bluescraper import constants
+from bluescraper.fetch import (
+    AsyncFetcher,
+    Fetcher,
+    ValidatorStore,
+    get_host,
+    get_request_url,
+)
+from bluescraper.scraper import Scraper
+from bluescraper.utils import get_soup
+
+
+async def collect(async_iterator):
+    return [item async for item in async_iterator]
+
+
+def test_get_host():
+    assert (
+        get_host("https://Example.com:8080/archiv?x=1") == "example.com:8080"
+    )
+
+
+def test_async_fetcher_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        AsyncFetcher(max_concurrency=0)
+
+
+def test_iter_fetch_yields_html_for_all_urls(http_server):
+    urls = [
+        f"{http_server.url}/valid.html",
+        f"{http_server.url}/valid-groups.html",
+        f"{http_server.url}/missing.html",
+    ]
+    with constants.VALID_HTML_PATH.open(encoding="utf-8") as f:
+        valid_html = f.read()
+
+    async def main():
+        async with AsyncFetcher() as fetcher:
+            return await collect(fetcher.iter_fetch(urls))
+
+    results = dict(asyncio.run(main()))
+    assert set(results) == set(urls)
+    assert results[urls[0]] == valid_html
+    assert results[urls[1]]
+    assert results[urls[2]] is None
+
+
+def test_iter_fetch_bounds_concurrency_per_host(http_server):
+    http_server.delay = 0.1
+    urls = [f"{http_server.url}/slow/valid.html?page={i}" for i in range(8)]
+
+    async def main():
+        async with AsyncFetcher(max_concurrency=8, max_per_host=2) as fetcher:
+            return await collect(fetcher.iter_fetch(urls))
+
+    results = asyncio.run(main())
+    assert len(results) == len(urls)
+    assert 1 <= http_server.max_active <= 2
+
+
+def test_fetch_returns_none_on_read_timeout(http_server):
+    http_server.delay = 1.0
+    url = f"{http_server.url}/slow/valid.html"
+
+    async def main():
+        with Fetcher(read_timeout=0.1, max_retries=0) as fetcher:
+            async with AsyncFetcher(fetcher=fetcher) as async_fetcher:
+                return await async_fetcher.fetch(url)
+
+    assert asyncio.run(main()) is None
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_iter_scrape_feeds_scraper(http_server, config):
+    urls = [
+        f"{http_server.url}/valid-groups.html",
+        f"{http_server.url}/invalid.html",
+    ]
+
+    async def main():
+        async with AsyncFetcher() as fetcher:
+            return await collect(fetcher.iter_scrape(urls, config))
+
+    results = dict(asyncio.run(main()))
+    assert results[urls[1]] is None
+    (group_data,) = results[urls[0]]
+    assert isinstance(group_data, Scraper.ScraperGroupData)
+    assert group_data.group_id == "teaser"
+    assert len(group_data.results) == 2
+
+
+def test_fetcher_reuses_connections(http_server):
+    urls = [f"{http_server.url}/valid.html?page={i}" for i in range(5)]
+    with Fetcher() as fetcher:
+        pages = [fetcher.get_html(url) for url in urls]
+    assert all(pages)
+    assert len(http_server.requests) == 5
+    assert len(http_server.client_ports) == 1
+
+
+def test_fetcher_negotiates_compression(http_server):
+    with Fetcher() as fetcher:
+        fetcher.get_html(f"{http_server.url}/valid.html")
+    (headers,) = http_server.headers
+    assert "gzip" in headers["Accept-Encoding"]
+
+
+def test_fetcher_configures_pool_and_retries():
+    fetcher = Fetcher(pool_connections=3, pool_maxsize=7, max_retries=2)
+    adapter = fetcher.session.get_adapter("https://example.com/")
+    assert adapter.poolmanager.connection_pool_kw["maxsize"] == 7
+    assert adapter.poolmanager.pools._maxsize == 3
+    assert adapter.max_retries.total == 2
+    fetcher.close()
+
+
+def test_fetcher_retries_server_errors(http_server):
+    with Fetcher(max_retries=2, backoff_factor=0) as fetcher:
+        html = fetcher.get_html(f"{http_server.url}/status/503")
+    assert html is None
+    assert len(http_server.requests) == 3
+
+
+def test_get_soup_with_fetcher(http_server):
+    with Fetcher() as fetcher:
+        soups = [
+            get_soup(f"{http_server.url}/valid.html", fetcher=fetcher)
+            for _ in range(2)
+        ]
+    assert soups[0] == soups[1]
+    assert soups[0].find("span", class_="teaser-right__headline")
+    assert len(http_server.client_ports) == 1
+
+
+def test_get_request_url():
+    assert (
+        get_request_url("https://example.com/archiv", {"datum": "2024-01-01"})
+        == "https://example.com/archiv?datum=2024-01-01"
+    )
+
+
+def test_fetch_sends_conditional_requests(http_server):
+    url = f"{http_server.url}/valid.html"
+    with Fetcher(validator_store=ValidatorStore()) as fetcher:
+        first = fetcher.fetch(url, {"page": 1})
+        second = fetcher.fetch(url, {"page": 1})
+        other_page = fetcher.fetch(url, {"page": 2})
+    assert first.ok and not first.unchanged
+    assert second.unchanged and second.status_code == 304
+    assert second.html is None
+    assert other_page.ok
+    assert "If-None-Match" not in http_server.headers[0]
+    assert http_server.headers[1]["If-None-Match"] == (
+        fetcher.validator_store.get(get_request_url(url, {"page": 1})).etag
+    )
+    assert "If-Modified-Since" in http_server.headers[1]
+
+
+def test_fetch_without_validator_store_is_unconditional(http_server):
+    url = f"{http_server.url}/valid.html"
+    with Fetcher() as fetcher:
+        results = [fetcher.fetch(url) for _ in range(2)]
+    assert all(result.ok for result in results)
+    assert all(
+        "If-None-Match" not in headers for headers in http_server.headers
+    )
+
+
+def test_validator_store_persists(tmp_path, http_server):
+    url = f"{http_server.url}/valid.html"
+    store = ValidatorStore(tmp_path / "validators.sqlite")
+    with Fetcher(validator_store=store) as fetcher:
+        fetcher.fetch(url)
+    store.close()
+    store = ValidatorStore(tmp_path / "validators.sqlite")
+    with Fetcher(validator_store=store) as fetcher:
+        assert fetcher.fetch(url).unchanged
+    store.close()
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_iter_scrape_skips_unchanged_pages(http_server, config):
+    urls = [f"{http_server.url}/valid-groups.html"]
+    fetcher = Fetcher(validator_store=ValidatorStore())
+
+    async def main():
+        async with AsyncFetcher(fetcher=fetcher) as async_fetcher:
+            return await collect(async_fetcher.iter_scrape(urls, config))
+
+    assert len(asyncio.run(main())) == 1
+    assert asyncio.run(main()) == []
+    fetcher.close()
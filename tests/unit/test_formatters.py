@@ -0,0 +1,81 @@
+import pydantic
+import pytest
+
+from bluescraper.config import Config, TagScrapingConfig
+from bluescraper.formatters import compile_formatter
+from bluescraper.scraper import Scraper
+from bluescraper.utils import clean_string
+
+
+@pytest.mark.parametrize(
+    "steps, value, expected",
+    [
+        (None, "  a \n\t b  ", "a b"),
+        ([], "  a  ", "  a  "),
+        (["unescape", "strip"], "a&nbsp;&amp;\n b", "a & b"),
+        (["strip", {"truncate": 3}], " abc def ", "abc"),
+    ],
+)
+def test_compile_formatter(steps, value, expected):
+    assert compile_formatter(steps)(value) == expected
+
+
+@pytest.mark.parametrize(
+    "steps", [["upper"], [{"truncate": -1}], [{"truncate": "3"}], ["truncate"]]
+)
+def test_invalid_formatter_steps(steps):
+    with pytest.raises(pydantic.ValidationError):
+        TagScrapingConfig(id="a", tag={"name": "p"}, formatter=steps)
+
+
+def test_formatter_is_compiled_with_config():
+    tag = TagScrapingConfig(id="a", tag={"name": "p"})
+    assert tag.compiled_formatter is compile_formatter(None)
+    with pytest.raises(pydantic.ValidationError):
+        tag.formatter = ["strip"]
+
+
+@pytest.mark.parametrize(
+    "value", ["  one\n two  ", "", "\xa0non breaking space "]
+)
+def test_clean_string(value):
+    assert clean_string(value) == " ".join(
+        word.strip() for word in value.split()
+    )
+
+
+def test_scraper_applies_tag_formatter():
+    config = Config(
+        scraping={
+            "tags": [
+                {"id": "raw", "tag": {"name": "p"}},
+                {
+                    "id": "short",
+                    "tag": {"name": "p"},
+                    "formatter": ["unescape", "strip", {"truncate": 9}],
+                },
+            ]
+        }
+    )
+    html = "<p>  Tom &amp;amp;   Jerry  </p>"
+    (result,) = Scraper.from_html(html, config).extract()
+    assert result.results == [{"raw": "Tom &amp; Jerry", "short": "Tom & Jer"}]
+
+
+@pytest.mark.parametrize(
+    "steps, expected",
+    [
+        (None, "a b &amp;"),
+        ([], "  a \n  b &amp; "),
+        (["unescape"], "  a \n  b & "),
+    ],
+)
+def test_formatter_is_the_only_text_normalization(steps, expected):
+    config = Config(
+        scraping={
+            "tags": [{"id": "p", "tag": {"name": "p"}, "formatter": steps}]
+        }
+    )
+    html = "<p>  a \n  b &amp;amp; </p>"
+    (result,) = Scraper.from_html(html, config).extract()
+    assert result.results == [{"p": expected}]
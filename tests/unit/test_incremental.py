@@ -0,0 +1,152 @@
+import pytest
+
+from bluescraper import constants
+from bluescraper.incremental import (
+    BloomFilter,
+    BloomFilterSeenStore,
+    NewRecordFilter,
+    SqliteSeenStore,
+    get_record_fingerprint,
+)
+from bluescraper.scraper import Scraper
+
+DAY = 24 * 3600.0
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fingerprint_ignores_whitespace_and_key_order():
+    record = {"headline": "Some  Headline", "topline": "Topline"}
+    near_duplicate = {"topline": "Topline ", "headline": "Some Headline"}
+    changed = {"headline": "Other headline", "topline": "Topline"}
+    fingerprint = get_record_fingerprint("a", "teaser", record)
+    assert get_record_fingerprint("a", "teaser", near_duplicate) == (
+        fingerprint
+    )
+    assert get_record_fingerprint("a", "teaser", changed) != fingerprint
+    assert get_record_fingerprint("b", "teaser", record) != fingerprint
+    assert get_record_fingerprint(
+        "a", "teaser", changed, fields=["topline"]
+    ) == get_record_fingerprint("a", "teaser", record, fields=["topline"])
+
+
+def test_fingerprint_ignores_case_only_with_casefold():
+    record = {"headline": "Some Headline", "topline": "Topline"}
+    recased = {"headline": "some headline", "topline": "TOPLINE"}
+    assert get_record_fingerprint("a", "teaser", recased) != (
+        get_record_fingerprint("a", "teaser", record)
+    )
+    assert get_record_fingerprint("a", "teaser", recased, casefold=True) == (
+        get_record_fingerprint("a", "teaser", record, casefold=True)
+    )
+    new_records = NewRecordFilter(SqliteSeenStore())
+    assert new_records.is_new("a", "teaser", record)
+    assert new_records.is_new("a", "teaser", recased)
+    new_records = NewRecordFilter(SqliteSeenStore(), casefold=True)
+    assert new_records.is_new("a", "teaser", record)
+    assert not new_records.is_new("a", "teaser", recased)
+
+
+def test_bloom_filter():
+    bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+    for item in range(1000):
+        bloom_filter.add(item * 7919)
+    assert all(item * 7919 in bloom_filter for item in range(1000))
+    false_positives = sum(
+        item * 7919 + 1 in bloom_filter for item in range(1000)
+    )
+    assert false_positives < 50
+
+
+@pytest.fixture(name="seen_store", params=["bloom", "sqlite"])
+def seen_store_(request, tmp_path):
+    clock = FakeClock()
+    if request.param == "bloom":
+        store = BloomFilterSeenStore(
+            ttl=4 * DAY,
+            capacity=100,
+            file_path=tmp_path / "seen.bloom",
+            clock=clock,
+        )
+    else:
+        store = SqliteSeenStore(tmp_path, ttl=4 * DAY, clock=clock)
+    store.clock_ = clock
+    with store:
+        yield store
+
+
+def test_seen_store_expires_records(seen_store):
+    clock = seen_store.clock_
+    assert seen_store.add(1)
+    assert not seen_store.add(1)
+    clock.now = 3 * DAY
+    assert seen_store.add(2)
+    clock.now = 6 * DAY
+    # Seeing a record again refreshes its time to live.
+    assert not seen_store.add(2)
+    clock.now = 9 * DAY
+    assert seen_store.add(1)
+    assert not seen_store.add(2)
+    clock.now = 20 * DAY
+    assert seen_store.add(2)
+
+
+def test_bloom_seen_store_is_bounded():
+    clock = FakeClock()
+    store = BloomFilterSeenStore(ttl=4 * DAY, capacity=10, clock=clock)
+    for day in range(100):
+        clock.now = day * DAY
+        store.add(day)
+    assert len(store.filters) <= 5
+
+
+@pytest.mark.parametrize("store_type", ["bloom", "sqlite"])
+def test_seen_store_persists(tmp_path, store_type):
+    def open_store():
+        if store_type == "bloom":
+            return BloomFilterSeenStore(file_path=tmp_path / "seen.bloom")
+        return SqliteSeenStore(tmp_path)
+
+    with open_store() as store:
+        assert store.add(1)
+    with open_store() as store:
+        assert not store.add(1)
+        assert store.add(2)
+
+
+def test_sqlite_seen_store_evicts_on_flush():
+    clock = FakeClock()
+    with SqliteSeenStore(ttl=DAY, clock=clock) as store:
+        store.add(1)
+        clock.now = 2 * DAY
+        store.add(2)
+        store.flush()
+        assert len(store) == 1
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_new_record_filter(html, config):
+    new_records = NewRecordFilter(SqliteSeenStore())
+    records = list(Scraper.from_html(html, config).iter_extract())
+    assert list(new_records.filter("page", records)) == records
+    assert list(new_records.filter("page", records)) == []
+    assert list(new_records.filter("other page", records)) == records
+
+    changed_html = html.replace("Test headline 2", "Changed headline")
+    results = Scraper.from_html(changed_html, config).extract()
+    new_results = new_records.filter_results("page", results)
+    new_count = sum(len(group_data.results) for group_data in new_results)
+    assert 0 < new_count < len(records)
+    assert [group_data.group_id for group_data in new_results] == [
+        group_data.group_id for group_data in results
+    ]
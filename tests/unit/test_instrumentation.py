@@ -0,0 +1,107 @@
+import logging
+
+import pytest
+
+from bluescraper import constants, instrumentation
+from bluescraper.fetch import Fetcher
+from bluescraper.instrumentation import (
+    STAGE_SECONDS,
+    TAG_MATCHES,
+    TAG_SECONDS,
+    Histogram,
+    HistogramSink,
+    LoggingSink,
+    PrometheusSink,
+    instrumented,
+    stage_timer,
+)
+from bluescraper.nodes import parse_html
+from bluescraper.scraper import Scraper
+from bluescraper.validation import SoapValidator
+
+
+def test_timers_are_no_ops_without_sinks():
+    assert not instrumentation.is_enabled()
+    assert stage_timer("parse") is stage_timer("extract")
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(1.0, 2.0, 5.0))
+    for value in [0.5, 1.5, 1.8, 4.0, 7.0]:
+        histogram.observe(value)
+    assert histogram.counts == [1, 2, 1, 1]
+    assert histogram.count == 5
+    assert histogram.mean == pytest.approx(2.96)
+    assert (histogram.min, histogram.max) == (0.5, 7.0)
+    assert histogram.quantile(0.5) == 2.0
+    assert histogram.quantile(1.0) == 7.0
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_scraping_reports_stages_and_tags(html, config):
+    sink = HistogramSink()
+    with instrumented(sink):
+        scraper = Scraper.from_html(html, config)
+        assert scraper.can_scrape()
+        scraper.extract()
+    assert not instrumentation.is_enabled()
+    for stage in ["parse", "match", "extract"]:
+        assert sink.get_histogram(STAGE_SECONDS, stage=stage).count == 1
+    assert sink.get_histogram(TAG_SECONDS, tag="headline").count == 2
+    assert sink.get_counter(TAG_MATCHES, tag="headline") == 2
+    assert sink.get_counter(TAG_MATCHES, tag="topline") == 2
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_validator_reports_stage(html, config):
+    sink = HistogramSink()
+    validator = SoapValidator(parse_html(html), config.validation)
+    with instrumented(sink):
+        validator.validate()
+    assert sink.get_histogram(STAGE_SECONDS, stage="validate").count == 1
+
+
+def test_fetch_is_timed(http_server):
+    sink = HistogramSink()
+    with instrumented(sink), Fetcher() as fetcher:
+        fetcher.get_html(f"{http_server.url}/valid.html")
+        fetcher.fetch(f"{http_server.url}/valid.html")
+    assert sink.get_histogram(STAGE_SECONDS, stage="fetch").count == 2
+
+
+def test_prometheus_sink_renders_text_format(tmp_path):
+    sink = PrometheusSink(buckets=(0.1, 1.0))
+    sink.observe(STAGE_SECONDS, 0.5, (("stage", "parse"),))
+    sink.increment(TAG_MATCHES, 3, (("tag", 'say "hi"'),))
+    expected = "\n".join(
+        [
+            "# TYPE bluescraper_stage_seconds histogram",
+            'bluescraper_stage_seconds_bucket{stage="parse",le="0.1"} 0',
+            'bluescraper_stage_seconds_bucket{stage="parse",le="1.0"} 1',
+            'bluescraper_stage_seconds_bucket{stage="parse",le="+Inf"} 1',
+            'bluescraper_stage_seconds_sum{stage="parse"} 0.5',
+            'bluescraper_stage_seconds_count{stage="parse"} 1',
+            "# TYPE bluescraper_tag_matches_total counter",
+            'bluescraper_tag_matches_total{tag="say \\"hi\\""} 3',
+        ]
+    )
+    assert sink.render() == expected + "\n"
+    sink.write(tmp_path / "bluescraper.prom")
+    assert (tmp_path / "bluescraper.prom").read_text() == expected + "\n"
+
+
+def test_logging_sink(caplog):
+    with caplog.at_level(logging.DEBUG), instrumented(LoggingSink()):
+        with stage_timer("parse"):
+            pass
+        instrumentation.increment(TAG_MATCHES, 2, tag="headline")
+    assert caplog.messages[0].startswith('stage_seconds{stage="parse"} ')
+    assert caplog.messages[1] == 'tag_matches{tag="headline"} +2'
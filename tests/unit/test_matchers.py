@@ -0,0 +1,104 @@
+import pickle
+
+import pydantic
+import pytest
+
+from bluescraper import constants
+from bluescraper.matchers import (
+    AttributeMatcher,
+    ClassMatcher,
+    MatcherIndex,
+    TagMatcher,
+    compile_matcher,
+)
+from bluescraper.nodes import parse_html
+from bluescraper.utils import TagDefinition
+
+
+@pytest.mark.parametrize(
+    "name, attrs, expected",
+    [
+        ("div", None, TagMatcher(name="div")),
+        (None, {"class": "a"}, ClassMatcher(class_name="a")),
+        (
+            "div",
+            {"class": "a b"},
+            AttributeMatcher(name="div", attrs=(("class", "a b", True),)),
+        ),
+        (
+            None,
+            {"class": "a", "id": "x"},
+            AttributeMatcher(attrs=(("class", "a", True), ("id", "x", False))),
+        ),
+    ],
+)
+def test_compile_matcher(name, attrs, expected):
+    assert compile_matcher(name, attrs) == expected
+
+
+@pytest.mark.parametrize(
+    "tag_definition, expected",
+    [
+        (TagDefinition(name="p"), True),
+        (TagDefinition(name="div"), False),
+        (TagDefinition(attrs={"class": "a"}), True),
+        (TagDefinition(name="p", attrs={"class": "b"}), True),
+        (TagDefinition(attrs={"class": "a b"}), True),
+        (TagDefinition(attrs={"class": "b a"}), False),
+        (TagDefinition(attrs={"class": "c"}), False),
+        (TagDefinition(attrs={"class": "a", "id": "x"}), True),
+        (TagDefinition(attrs={"id": "y"}), False),
+        (TagDefinition(attrs={"title": "t"}), False),
+    ],
+)
+def test_matcher_on_node(tag_definition, expected):
+    (node,) = parse_html('<p class="a b" id="x"></p>').find_all(
+        TagDefinition()
+    )
+    assert tag_definition.matcher(node) is expected
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_matchers_are_compiled_with_config(config):
+    (group,) = config.scraping.groups
+    assert group.tag.matcher == AttributeMatcher(
+        name="div", attrs=(("class", "teaser-right twelve", True),)
+    )
+    restored = pickle.loads(pickle.dumps(config))
+    assert restored == config
+    assert restored.scraping.tags[0].tag.matcher == ClassMatcher(
+        class_name="teaser-right__link"
+    )
+
+
+def test_tag_definition_is_immutable():
+    tag_definition = TagDefinition(name="div")
+    with pytest.raises(pydantic.ValidationError):
+        tag_definition.name = "span"
+
+
+def test_matcher_index():
+    document = parse_html(
+        '<div class="a b"><span id="x">text</span><p class="a"></p></div>'
+    )
+    div, span, p = document.find_all(TagDefinition())
+    index = MatcherIndex()
+    for matcher in [
+        ClassMatcher(class_name="a"),
+        ClassMatcher(class_name="a"),
+        TagMatcher(name="span"),
+        AttributeMatcher(attrs=(("id", "x", False),)),
+        AttributeMatcher(name="div", attrs=(("class", "a b", True),)),
+    ]:
+        index.add(matcher)
+    assert index.match(div) == {
+        ClassMatcher(class_name="a"),
+        AttributeMatcher(name="div", attrs=(("class", "a b", True),)),
+    }
+    assert index.match(span) == {
+        TagMatcher(name="span"),
+        AttributeMatcher(attrs=(("id", "x", False),)),
+    }
+    assert index.match(p) == {ClassMatcher(class_name="a")}
@@ -0,0 +1,65 @@
+import pytest
+
+from bluescraper import constants
+from bluescraper.config import ConfigReader
+from bluescraper.multi import MultiPlan, MultiScraper
+from bluescraper.nodes import parse_html
+from bluescraper.scraper import Scraper
+
+CONFIG_PATHS = [
+    constants.CONFIG_YAML,
+    constants.CONFIG_GROUPS_YAML,
+    constants.CONFIG_MULTIPLE_GROUPS_YAML,
+    constants.CONFIG_NO_VALIDATION_YAML,
+]
+
+
+@pytest.fixture(name="configs")
+def configs_():
+    return [ConfigReader(path).load() for path in CONFIG_PATHS]
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        constants.VALID_HTML_PATH,
+        constants.VALID_GROUPS_HTML_PATH,
+        constants.VALID_GROUPS_GROUP_NOT_COMPLETE_HTML_PATH,
+        constants.INVALID_HTML_PATH,
+    ],
+    indirect=True,
+)
+def test_multi_scraper_matches_single_scrapers(html, configs):
+    document = parse_html(html)
+    multi_scraper = MultiScraper(document, configs)
+    expected = {}
+    for config_index, config in enumerate(configs):
+        scraper = Scraper(parse_html(html), config)
+        if scraper.can_scrape():
+            expected[config_index] = scraper.extract(on_error="null")
+    assert multi_scraper.applicable_configs() == list(expected)
+    assert multi_scraper.extract(on_error="null") == expected
+
+
+@pytest.mark.parametrize(
+    "html", [constants.VALID_GROUPS_HTML_PATH], indirect=True
+)
+def test_multi_plan_is_reusable(html, configs):
+    plan = MultiPlan(configs)
+    first = MultiScraper.from_html(html, plan=plan).extract(on_error="null")
+    second = MultiScraper.from_html(html, plan=plan).extract(on_error="null")
+    assert first == second
+
+
+def test_shared_tag_definitions_are_indexed_once(configs):
+    plan = MultiPlan(configs + configs)
+    single_plan = MultiPlan(configs)
+    assert len(plan) == 2 * len(single_plan)
+    assert plan.config_indexes.keys() == single_plan.config_indexes.keys()
+
+
+@pytest.mark.parametrize("html", [constants.INVALID_HTML_PATH], indirect=True)
+def test_get_scraper_of_config_not_applying(html, configs):
+    multi_scraper = MultiScraper.from_html(html, configs)
+    with pytest.raises(ValueError):
+        multi_scraper.get_scraper(1)
@@ -0,0 +1,105 @@
+import importlib.util
+
+import pytest
+
+from bluescraper import constants
+from bluescraper.config import ConfigReader
+from bluescraper.nodes import (
+    DEFAULT_PARSER,
+    PARSERS,
+    LxmlNode,
+    Node,
+    parse_html,
+)
+from bluescraper.scraper import Scraper
+from bluescraper.utils import TagDefinition, extract_from_tag, get_soup
+from bluescraper.validation import SoapValidator
+
+PARSER_MODULES = {
+    "html.parser": None,
+    "lxml": "lxml",
+    "html5lib": "html5lib",
+    "lxml.html": "lxml",
+}
+
+HTML_CONFIG_PAIRS = [
+    (constants.VALID_HTML_PATH, constants.CONFIG_YAML),
+    (constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML),
+    (constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_MULTIPLE_GROUPS_YAML),
+    (
+        constants.VALID_GROUPS_GROUP_NOT_COMPLETE_HTML_PATH,
+        constants.CONFIG_GROUPS_YAML,
+    ),
+    (constants.INVALID_HTML_PATH, constants.CONFIG_GROUPS_YAML),
+]
+
+
+@pytest.fixture(name="parser", params=PARSERS)
+def parser_(request):
+    module = PARSER_MODULES[request.param]
+    if module and importlib.util.find_spec(module) is None:
+        pytest.skip(f"{module} is not installed")
+    return request.param
+
+
+def scrape(html, config, parser):
+    scraper = Scraper.from_html(html, config, parser=parser)
+    if not scraper.can_scrape():
+        return None
+    return scraper.extract()
+
+
+@pytest.mark.parametrize("html, config", HTML_CONFIG_PAIRS, indirect=True)
+def test_parser_parity_on_fixtures(html, config, parser):
+    expected = scrape(html, config, DEFAULT_PARSER)
+    assert scrape(html, config, parser) == expected
+
+
+@pytest.mark.parametrize(
+    "html",
+    [constants.VALID_HTML_PATH, constants.INVALID_HTML_PATH],
+    indirect=True,
+)
+def test_validator_parity(html, parser):
+    config = ConfigReader(constants.CONFIG_YAML).load()
+    expected = SoapValidator(parse_html(html), config.validation)
+    validator = SoapValidator(parse_html(html, parser), config.validation)
+    expected.validate()
+    validator.validate()
+    assert validator.valid == expected.valid
+
+
+def test_scraper_uses_parser_from_config():
+    pytest.importorskip("lxml")
+    config = ConfigReader(constants.CONFIG_GROUPS_YAML).load()
+    config.parser = "lxml.html"
+    with constants.VALID_GROUPS_HTML_PATH.open(encoding="utf-8") as f:
+        scraper = Scraper.from_html(f.read(), config)
+    assert isinstance(scraper.document, LxmlNode)
+    assert len(scraper.extract()[0].results) == 2
+
+
+def test_lxml_node_text_and_attributes():
+    pytest.importorskip("lxml")
+    document = parse_html(
+        '<div class=" a   b " id="x">one <!-- c --><script>s()</script>'
+        "<b>two</b> three</div>",
+        "lxml.html",
+    )
+    node = document.find(TagDefinition(name="div"))
+    assert isinstance(node, Node)
+    assert node.get("class") == "a b"
+    assert node.get("missing") is None
+    assert node.get_text() == "one two three"
+    assert extract_from_tag(node, attribute="id") == "x"
+    assert document.find(TagDefinition(attrs={"class": "b"})) == node
+
+
+def test_parse_html_rejects_unknown_parser():
+    with pytest.raises(ValueError):
+        parse_html("<p></p>", "unknown")
+
+
+def test_get_soup_rejects_non_bs4_parser():
+    with pytest.raises(ValueError):
+        get_soup("https://example.com/", parser="lxml.html")
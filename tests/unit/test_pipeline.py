@@ -0,0 +1,111 @@
+import json
+import os
+import time
+
+import pytest
+
+from bluescraper import constants
+from bluescraper.config import ConfigReader
+from bluescraper.instrumentation import HistogramSink, instrumented
+from bluescraper.pipeline import (
+    FETCH,
+    PIPELINE_ITEMS,
+    QUEUE_DEPTH,
+    SCRAPE,
+    WRITE,
+    Pipeline,
+)
+from bluescraper.scraper import Scraper
+from bluescraper.writers import JsonlWriter
+
+
+@pytest.fixture(name="groups_config")
+def groups_config_():
+    return ConfigReader(constants.CONFIG_GROUPS_YAML).load()
+
+
+def test_pipeline_scrapes_all_pages(http_server, groups_config):
+    urls = [
+        f"{http_server.url}/valid-groups.html",
+        f"{http_server.url}/invalid.html",
+        f"{http_server.url}/status/404",
+    ]
+    page_results = []
+    stats = Pipeline(groups_config, page_results.append, max_workers=1).run(
+        urls
+    )
+    by_url = {page_result.url: page_result for page_result in page_results}
+    assert set(by_url) == set(urls)
+    html = constants.VALID_GROUPS_HTML_PATH.read_text(encoding="utf-8")
+    assert by_url[urls[0]].valid
+    assert by_url[urls[0]].results == (
+        Scraper.from_html(html, groups_config).extract()
+    )
+    assert not by_url[urls[1]].valid and by_url[urls[1]].results is None
+    assert by_url[urls[2]].status_code == 404
+    assert stats.failed == 1
+    assert stats.stages[FETCH].items == 3
+    assert stats.stages[SCRAPE].items == 2
+    assert stats.stages[WRITE].items == 3
+    assert stats.stages[WRITE].throughput > 0
+    assert "write 3" in stats.format()
+
+
+def test_pipeline_writes_records(http_server, groups_config, tmp_path):
+    urls = [f"{http_server.url}/valid-groups.html"] * 3
+    with JsonlWriter(tmp_path) as writer:
+        Pipeline(groups_config, writer, max_workers=2).run(urls)
+    (file_path,) = writer.written_files
+    with open(file_path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert len(records) == 3 * 2
+    assert os.path.basename(file_path).startswith("records-teaser-")
+
+
+def test_pipeline_counts_unparseable_pages_as_failed(
+    http_server, groups_config
+):
+    pytest.importorskip("lxml")
+    # An empty body cannot be parsed by lxml.html.
+    urls = [
+        f"{http_server.url}/status/200",
+        f"{http_server.url}/valid-groups.html",
+    ]
+    page_results = []
+    stats = Pipeline(
+        groups_config, page_results.append, max_workers=1, parser="lxml.html"
+    ).run(urls)
+    by_url = {page_result.url: page_result for page_result in page_results}
+    assert by_url[urls[0]].results is None
+    assert isinstance(by_url[urls[0]].error, str)
+    assert by_url[urls[1]].valid
+    assert stats.failed == 1
+
+
+def test_pipeline_applies_backpressure(http_server, groups_config):
+    urls = [f"{http_server.url}/valid-groups.html"] * 8
+    written = []
+
+    def slow_sink(page_result):
+        time.sleep(0.05)
+        written.append(page_result)
+
+    sink = HistogramSink()
+    with instrumented(sink):
+        stats = Pipeline(
+            groups_config, slow_sink, max_workers=1, queue_size=1
+        ).run(urls)
+    assert len(written) == 8
+    assert all(queue.max_depth <= 1 for queue in stats.queues.values())
+    assert sink.get_counter(PIPELINE_ITEMS, stage=WRITE) == 8
+    assert sink.get_histogram(QUEUE_DEPTH, queue=SCRAPE).max <= 1
+
+
+def test_pipeline_raises_sink_errors(http_server, groups_config):
+    urls = [f"{http_server.url}/valid-groups.html"] * 20
+
+    def failing_sink(page_result):
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError, match="disk full"):
+        Pipeline(groups_config, failing_sink, max_workers=1).run(urls)
@@ -0,0 +1,158 @@
+import datetime
+import threading
+
+import pytest
+
+from bluescraper.fetch import Fetcher
+from bluescraper.ratelimit import (
+    HostRateLimiter,
+    TokenBucket,
+    parse_retry_after,
+    set_default_rate_limiter,
+)
+from bluescraper.utils import get_html
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture(name="clock")
+def clock_():
+    return FakeClock()
+
+
+def test_token_bucket(clock):
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert [bucket.reserve() for _ in range(4)] == [0, 0, 0.5, 1.0]
+    clock.now = 10
+    assert bucket.reserve() == 0
+    bucket.pause(3)
+    assert bucket.reserve() == pytest.approx(3.5)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("120", 120.0),
+        ("Fri, 09 Feb 2024 12:00:30 GMT", 30.0),
+        ("Fri, 09 Feb 2024 11:00:00 GMT", 0.0),
+        ("soon", None),
+        (None, None),
+    ],
+)
+def test_parse_retry_after(value, expected):
+    now = datetime.datetime(2024, 2, 9, 12, tzinfo=datetime.timezone.utc)
+    assert parse_retry_after(value, now=now) == expected
+
+
+def test_rate_limiter_paces_hosts_independently(clock):
+    limiter = HostRateLimiter(rate=1, burst=1, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        limiter.wait("https://a.example/page")
+    limiter.wait("https://b.example/page")
+    assert clock.sleeps == [1.0, 1.0]
+
+
+def test_rate_limiter_backs_off_and_recovers(clock):
+    limiter = HostRateLimiter(
+        rate=4, burst=1, min_rate=1, clock=clock, sleep=clock.sleep
+    )
+    url = "https://a.example/page"
+    limiter.wait(url)
+    limiter.record_response(url, 429, retry_after="10")
+    assert limiter.get_rate(url) == 2
+    assert limiter.wait(url) == pytest.approx(10.5)
+    limiter.record_response(url, 503)
+    limiter.record_response(url, 503)
+    assert limiter.get_rate(url) == 1
+    for _ in range(10):
+        limiter.record_response(url, 200)
+    assert limiter.get_rate(url) == 4
+
+
+def test_rate_limiter_honors_robots_crawl_delay(clock):
+    robots_urls = []
+
+    def robots_fetcher(url):
+        robots_urls.append(url)
+        return "User-agent: *\nCrawl-delay: 2\n"
+
+    limiter = HostRateLimiter(
+        rate=10, respect_robots=True, robots_fetcher=robots_fetcher
+    )
+    assert limiter.get_rate("https://a.example/one") == 0.5
+    assert limiter.get_rate("https://a.example/two") == 0.5
+    assert robots_urls == ["https://a.example/robots.txt"]
+
+
+def test_slow_robots_txt_does_not_block_other_hosts(clock):
+    fetching = threading.Event()
+    release = threading.Event()
+
+    def robots_fetcher(url):
+        if url.startswith("https://slow.example"):
+            fetching.set()
+            release.wait(5)
+        return None
+
+    limiter = HostRateLimiter(
+        rate=10,
+        respect_robots=True,
+        robots_fetcher=robots_fetcher,
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    limiter.wait("https://fast.example/a")
+    thread = threading.Thread(
+        target=limiter.wait, args=("https://slow.example/a",)
+    )
+    thread.start()
+    try:
+        assert fetching.wait(5)
+        finished = threading.Event()
+        other = threading.Thread(
+            target=lambda: (
+                limiter.wait("https://fast.example/b"),
+                limiter.backoff("https://new.example/a", 1),
+                finished.set(),
+            )
+        )
+        other.start()
+        assert finished.wait(5)
+        other.join()
+    finally:
+        release.set()
+        thread.join()
+    assert limiter.get_rate("https://slow.example/b") == 10
+
+
+def test_fetcher_retries_backoff_status_through_limiter(http_server, clock):
+    limiter = HostRateLimiter(rate=100, clock=clock, sleep=clock.sleep)
+    with Fetcher(max_retries=2, rate_limiter=limiter) as fetcher:
+        assert fetcher.get_html(f"{http_server.url}/status/429") is None
+    assert len(http_server.requests) == 3
+    assert limiter.get_rate(http_server.url) == 12.5
+    assert len(clock.sleeps) == 2
+
+
+def test_default_rate_limiter_is_shared(http_server, clock):
+    limiter = HostRateLimiter(rate=1, burst=1, clock=clock, sleep=clock.sleep)
+    set_default_rate_limiter(limiter)
+    try:
+        assert get_html(f"{http_server.url}/valid.html")
+        with Fetcher() as fetcher:
+            assert fetcher.rate_limiter is limiter
+            assert fetcher.get_html(f"{http_server.url}/valid.html")
+    finally:
+        set_default_rate_limiter(None)
+    assert clock.sleeps == [1.0]
@@ -0,0 +1,82 @@
+import copy
+import json
+import pickle
+import tracemalloc
+
+import pytest
+
+from bluescraper import constants
+from bluescraper.records import Record, RecordSchema, to_dict
+
+FIELDS = ["title", "author", "date", "url", "summary"]
+
+
+def test_record_is_a_mapping():
+    schema = RecordSchema(["a", "b"])
+    record = schema(["1", None])
+    assert isinstance(record, Record)
+    assert record == {"a": "1", "b": None}
+    assert record != {"a": "1"}
+    assert record == schema(["1", None])
+    assert list(record) == ["a", "b"]
+    assert len(record) == 2
+    assert record["a"] == "1" and record.get("c") is None and "b" in record
+    with pytest.raises(KeyError):
+        record["c"]  # pylint: disable=pointless-statement
+    with pytest.raises(AttributeError):
+        record.c = "3"
+
+
+def test_record_to_dict():
+    record = RecordSchema(["a", "b"])(["1", "2"])
+    assert to_dict(record) == record.to_dict() == {"a": "1", "b": "2"}
+    assert type(record.to_dict()) is dict
+    assert json.loads(json.dumps(record.to_dict())) == record
+    assert repr(record) == "{'a': '1', 'b': '2'}"
+
+
+def test_record_requires_all_values():
+    with pytest.raises(ValueError):
+        RecordSchema(["a", "b"])(["1"])
+
+
+def test_record_pickle_and_copy():
+    record = RecordSchema(FIELDS)(FIELDS)
+    assert pickle.loads(pickle.dumps(record)) == record
+    assert copy.deepcopy(record) == record
+
+
+def get_allocated_bytes(create):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        objects = create()
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del objects
+    return allocated
+
+
+def test_record_memory_is_at_most_half_of_dict():
+    schema = RecordSchema(FIELDS)
+    values = [[f"{field} {i}" for field in FIELDS] for i in range(10000)]
+    dict_bytes = get_allocated_bytes(
+        lambda: [dict(zip(FIELDS, row)) for row in values]
+    )
+    record_bytes = get_allocated_bytes(lambda: [schema(row) for row in values])
+    assert record_bytes <= dict_bytes / 2
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_scraper_records_share_group_schema(scraper):
+    for group_data in scraper.extract():
+        schemas = {record.schema for record in group_data.results}
+        assert len(schemas) <= 1
+        assert group_data.to_dict()["results"] == [
+            dict(record) for record in group_data.results
+        ]
@@ -0,0 +1,90 @@
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from bluescraper import constants
+from bluescraper.config import ConfigReader
+from bluescraper.scraper import Scraper
+from bluescraper.snapshot import (
+    clear_snapshots,
+    get_snapshot_path,
+    load_config,
+    load_snapshot,
+)
+
+
+@pytest.fixture(name="config_file")
+def config_file_(tmp_path):
+    clear_snapshots()
+    config_file = tmp_path / "config.yml"
+    shutil.copy(constants.CONFIG_GROUPS_YAML, config_file)
+    yield config_file
+    clear_snapshots()
+
+
+def test_snapshot_matches_config_reader(config_file):
+    config = load_config(config_file)
+    assert config == ConfigReader(config_file).load()
+    assert get_snapshot_path(config_file).exists()
+
+
+def test_snapshot_is_reused_across_processes(config_file):
+    snapshot = load_snapshot(config_file)
+    clear_snapshots()
+    with patch("bluescraper.snapshot.ConfigReader") as config_reader:
+        reloaded = load_snapshot(config_file)
+    config_reader.assert_not_called()
+    assert reloaded.config == snapshot.config
+    assert reloaded.config.scraping.tags[0].tag.matcher
+
+
+def test_snapshot_is_kept_in_memory(config_file):
+    snapshot = load_snapshot(config_file)
+    with patch("bluescraper.snapshot.read_snapshot") as read_snapshot:
+        assert load_snapshot(config_file) is snapshot
+    read_snapshot.assert_not_called()
+
+
+def test_touched_config_keeps_snapshot(config_file):
+    load_snapshot(config_file)
+    clear_snapshots()
+    stat = os.stat(config_file)
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    with patch("bluescraper.snapshot.compile_config") as compile_config:
+        snapshot = load_snapshot(config_file)
+    compile_config.assert_not_called()
+    assert snapshot.mtime_ns == stat.st_mtime_ns + 10**9
+
+
+def test_changed_config_is_recompiled(config_file):
+    load_snapshot(config_file)
+    shutil.copy(constants.CONFIG_MULTIPLE_GROUPS_YAML, config_file)
+    stat = os.stat(config_file)
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    config = load_config(config_file)
+    assert config == ConfigReader(constants.CONFIG_MULTIPLE_GROUPS_YAML).load()
+
+
+def test_corrupt_snapshot_is_recompiled(config_file):
+    get_snapshot_path(config_file).write_bytes(b"not a pickle")
+    assert load_config(config_file) == ConfigReader(config_file).load()
+
+
+def test_snapshot_dir(config_file, tmp_path):
+    snapshot_dir = tmp_path / "snapshots"
+    load_snapshot(config_file, snapshot_dir)
+    assert not get_snapshot_path(config_file).exists()
+    assert len(list(snapshot_dir.iterdir())) == 1
+
+
+@pytest.mark.parametrize(
+    "html", [constants.VALID_GROUPS_HTML_PATH], indirect=True
+)
+def test_snapshot_plan_extracts(html, config_file):
+    snapshot = load_snapshot(config_file)
+    scraper = Scraper.from_html(html, snapshot.config, plan=snapshot.plan)
+    expected = Scraper.from_html(html, ConfigReader(config_file).load())
+    assert scraper.can_scrape()
+    assert scraper.extract() == expected.extract()
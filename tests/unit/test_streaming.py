@@ -0,0 +1,151 @@
+import pytest
+
+from bluescraper import constants
+from bluescraper.config import Config
+from bluescraper.scraper import Scraper
+from bluescraper.streaming import StreamingScraper, stream_file
+
+
+def chunked(string, size):
+    return [string[i : i + size] for i in range(0, len(string), size)]
+
+
+def records_of(grouped_data):
+    return [
+        (group_data.group_id, record)
+        for group_data in grouped_data
+        for record in group_data.results
+    ]
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [
+        (constants.VALID_HTML_PATH, constants.CONFIG_YAML),
+        (constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML),
+        (
+            constants.VALID_GROUPS_HTML_PATH,
+            constants.CONFIG_MULTIPLE_GROUPS_YAML,
+        ),
+    ],
+    indirect=True,
+)
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_streaming_matches_extract(html, config, scraper, chunk_size):
+    expected = records_of(scraper.extract())
+    streaming_scraper = StreamingScraper(config)
+    records = list(streaming_scraper.iter_scrape(chunked(html, chunk_size)))
+    assert sorted(records, key=str) == sorted(expected, key=str)
+
+
+@pytest.mark.parametrize(
+    "html, config",
+    [(constants.VALID_GROUPS_HTML_PATH, constants.CONFIG_GROUPS_YAML)],
+    indirect=True,
+)
+def test_streaming_emits_groups_when_closed(html, config):
+    streaming_scraper = StreamingScraper(config)
+    first_group_end = html.index("teaser-right__media") + 100
+    records = streaming_scraper.feed(html[:first_group_end])
+    assert [record["headline"] for _, record in records] == ["Test headline"]
+    records = streaming_scraper.feed(html[first_group_end:])
+    records += streaming_scraper.close()
+    assert [record["headline"] for _, record in records] == ["Test headline 2"]
+    assert streaming_scraper.stack == [streaming_scraper.document]
+    assert not streaming_scraper.document.contents
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_streaming_keeps_only_collected_subtrees(config):
+    streaming_scraper = StreamingScraper(config)
+    streaming_scraper.feed(
+        '<div class="teaser-right twelve"><div class="other">'
+        '<span class="teaser-right__headline">Head<b>line</b>'
+    )
+    (group_node, other_node, headline_node) = streaming_scraper.stack[1:4]
+    assert not group_node.retained and not group_node.contents
+    assert not other_node.retained and not other_node.contents
+    assert headline_node.retained
+    assert headline_node.get_text() == "Headline"
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_stream_file(config):
+    records = list(
+        stream_file(constants.VALID_GROUPS_HTML_PATH, config, chunk_size=64)
+    )
+    assert [group_id for group_id, _ in records] == ["teaser", "teaser"]
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_streaming_validates_in_the_same_pass(config):
+    html = constants.VALID_GROUPS_HTML_PATH.read_text(encoding="utf-8")
+    streaming_scraper = StreamingScraper(config)
+    # The required headline string is only checked once its element ends.
+    head = html[: html.index("teaser-right__headline")]
+    assert streaming_scraper.feed(head) == []
+    assert not streaming_scraper.can_scrape()
+    records = streaming_scraper.feed(html[len(head) :])
+    records += streaming_scraper.close()
+    assert streaming_scraper.can_scrape()
+    assert records == records_of(Scraper.from_html(html, config).extract())
+
+
+@pytest.mark.parametrize(
+    "config", [constants.CONFIG_GROUPS_YAML], indirect=True
+)
+def test_streaming_drops_records_of_invalid_pages(config):
+    html = constants.INVALID_HTML_PATH.read_text(encoding="utf-8")
+    assert not Scraper.from_html(html, config).can_scrape()
+    streaming_scraper = StreamingScraper(config)
+    assert list(streaming_scraper.iter_scrape(chunked(html, 64))) == []
+    assert not streaming_scraper.can_scrape()
+
+
+def test_streaming_nested_groups():
+    config = Config(
+        scraping={
+            "tags": [
+                {"id": "title", "tag": {"name": "h2"}},
+                {"id": "headline", "tag": {"name": "h3"}},
+            ],
+            "groups": [
+                {
+                    "id": "section",
+                    "contains": ["title"],
+                    "tag": {"name": "section"},
+                    "groups": [
+                        {
+                            "id": "teaser",
+                            "contains": ["headline"],
+                            "tag": {"name": "article"},
+                        }
+                    ],
+                }
+            ],
+        }
+    )
+    html = (
+        "<article><h3>Outside</h3></article>"
+        "<section><h2>News</h2>"
+        "<article><h3>a</h3></article><article><h3>b</h3></article>"
+        "</section>"
+    )
+    scraper = StreamingScraper(config)
+    records = list(scraper.iter_scrape(chunked(html, 7)))
+    assert records == records_of(Scraper.from_html(html, config).extract())
+    assert records == [
+        (
+            "section",
+            {
+                "title": "News",
+                "teaser": [{"headline": "a"}, {"headline": "b"}],
+            },
+        )
+    ]
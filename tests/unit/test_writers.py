@@ -0,0 +1,220 @@
+import csv
+import datetime
+import gzip
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from bluescraper.writers import (
+    CsvWriter,
+    GzipJsonlWriter,
+    JsonlWriter,
+    ParquetWriter,
+    RecordFile,
+    RecordWriter,
+)
+
+RECORDS = [{"headline": f"Headline {i}", "date": None} for i in range(10)]
+DATE = datetime.date(2024, 2, 9)
+
+
+def read_jsonl(file_path):
+    with open(file_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def read_gzip_jsonl(file_path):
+    with gzip.open(file_path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def read_csv(file_path):
+    with open(file_path, encoding="utf-8", newline="") as f:
+        return [
+            {key: value or None for key, value in row.items()}
+            for row in csv.DictReader(f)
+        ]
+
+
+def read_parquet(file_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    return pq.read_table(file_path).to_pylist()
+
+
+@pytest.mark.parametrize(
+    "writer_class, reader, extension",
+    [
+        (JsonlWriter, read_jsonl, ".jsonl"),
+        (GzipJsonlWriter, read_gzip_jsonl, ".jsonl.gz"),
+        (CsvWriter, read_csv, ".csv"),
+        (ParquetWriter, read_parquet, ".parquet"),
+    ],
+)
+@pytest.mark.parametrize("background", [True, False])
+def test_writers_round_trip(
+    tmp_path, writer_class, reader, extension, background
+):
+    if writer_class is ParquetWriter:
+        pytest.importorskip("pyarrow")
+    with writer_class(tmp_path, batch_size=3, background=background) as w:
+        w.write_many(RECORDS, DATE)
+    (file_path,) = w.written_files
+    assert os.path.dirname(file_path) == os.path.join(tmp_path, "2024/02")
+    assert os.path.basename(file_path).startswith("records-")
+    assert file_path.endswith(extension)
+    assert reader(file_path) == RECORDS
+    assert os.listdir(tmp_path / "2024/02") == [os.path.basename(file_path)]
+
+
+def test_records_are_partitioned_by_date(tmp_path):
+    with JsonlWriter(tmp_path, date_pattern="%Y/%m/%d") as writer:
+        writer.write({"day": 1}, datetime.date(2024, 2, 1))
+        writer.write({"day": 2}, datetime.date(2024, 2, 2))
+        writer.write({"day": 3}, datetime.date(2024, 2, 1))
+    files = sorted(writer.written_files)
+    assert [os.path.relpath(os.path.dirname(f), tmp_path) for f in files] == [
+        "2024/02/01",
+        "2024/02/02",
+    ]
+    assert [read_jsonl(f) for f in files] == [
+        [{"day": 1}, {"day": 3}],
+        [{"day": 2}],
+    ]
+
+
+def test_files_are_hidden_until_complete(tmp_path):
+    writer = JsonlWriter(tmp_path, batch_size=2, background=False)
+    writer.write_many(RECORDS[:4], DATE)
+    (temporary_name,) = os.listdir(tmp_path / "2024/02")
+    assert temporary_name.startswith(".") and temporary_name.endswith(".tmp")
+    assert not writer.written_files
+    writer.close()
+    assert os.listdir(tmp_path / "2024/02") == [
+        os.path.basename(writer.written_files[0])
+    ]
+
+
+def test_rotation_by_record_count(tmp_path):
+    with JsonlWriter(tmp_path, batch_size=2, max_file_records=4) as writer:
+        writer.write_many(RECORDS, DATE)
+    assert [len(read_jsonl(f)) for f in writer.written_files] == [4, 4, 2]
+    assert len(set(writer.written_files)) == 3
+
+
+def test_rotation_by_size(tmp_path):
+    with GzipJsonlWriter(tmp_path, batch_size=1, max_file_bytes=1) as writer:
+        writer.write_many(RECORDS[:3], DATE)
+    assert [len(read_gzip_jsonl(f)) for f in writer.written_files] == [1] * 3
+
+
+def test_rotation_by_time(tmp_path):
+    writer = JsonlWriter(tmp_path, batch_size=1, rotate_interval=0.05)
+    writer.write(RECORDS[0], DATE)
+    writer.flush()
+    completed = threading.Event()
+    for _ in range(100):
+        if writer.written_files:
+            completed.set()
+            break
+        completed.wait(0.01)
+    assert completed.is_set()
+    writer.close()
+    assert len(writer.written_files) == 1
+
+
+def test_rotation_by_time_without_background(tmp_path):
+    writer = JsonlWriter(
+        tmp_path, batch_size=1, rotate_interval=0.01, background=False
+    )
+    for record in RECORDS[:3]:
+        writer.write(record, DATE)
+        time.sleep(0.05)
+    assert len(writer.written_files) == 2
+    writer.close()
+    assert [read_jsonl(f) for f in writer.written_files] == [
+        [record] for record in RECORDS[:3]
+    ]
+
+
+def test_flush_interval(tmp_path):
+    writer = JsonlWriter(
+        tmp_path, batch_size=100, flush_interval=0, background=False
+    )
+    writer.write(RECORDS[0], DATE)
+    (open_file,) = writer._files.values()
+    assert open_file.record_file.record_count == 1
+    writer.close()
+
+
+def test_background_errors_are_raised(tmp_path):
+    class FailingFile(RecordFile):
+        extension = ".fail"
+
+        def __init__(self, file_path):
+            super().__init__(file_path)
+            open(file_path, "w", encoding="utf-8").close()
+
+        def write_batch(self, records):
+            raise OSError("disk full")
+
+        def close(self):
+            pass
+
+    class FailingWriter(RecordWriter):
+        file_class = FailingFile
+
+    writer = FailingWriter(tmp_path, batch_size=1)
+    writer.write(RECORDS[0], DATE)
+    with pytest.raises(OSError, match="disk full"):
+        writer.flush()
+    writer.close()
+    with pytest.raises(ValueError):
+        writer.write(RECORDS[0], DATE)
+
+
+def test_csv_writer_with_fieldnames(tmp_path):
+    with CsvWriter(tmp_path, fieldnames=["headline"]) as writer:
+        writer.write_many(RECORDS[:2], DATE)
+    assert read_csv(writer.written_files[0]) == [
+        {"headline": "Headline 0"},
+        {"headline": "Headline 1"},
+    ]
+
+
+@pytest.mark.parametrize("background", [True, False])
+def test_rotate_completes_open_files(tmp_path, background):
+    writer = JsonlWriter(tmp_path, background=background)
+    writer.write_many(RECORDS[:2], DATE)
+    writer.rotate()
+    (file_path,) = writer.written_files
+    assert read_jsonl(file_path) == RECORDS[:2]
+    writer.write(RECORDS[2], DATE)
+    writer.close()
+    assert read_jsonl(writer.written_files[1]) == RECORDS[2:3]
+
+
+@pytest.mark.parametrize("background", [True, False])
+def test_groups_are_written_to_separate_files(tmp_path, background):
+    with CsvWriter(tmp_path, background=background) as writer:
+        writer.write_many(RECORDS[:2], DATE, group_id="teaser")
+        writer.write({"topline": "Topline"}, DATE, group_id="line")
+    files = {
+        os.path.basename(file_path).split("-")[1]: file_path
+        for file_path in writer.written_files
+    }
+    assert read_csv(files["teaser"]) == RECORDS[:2]
+    assert read_csv(files["line"]) == [{"topline": "Topline"}]
+
+
+def test_writers_of_the_same_partition_do_not_collide(tmp_path):
+    writers = [JsonlWriter(tmp_path, background=False) for _ in range(2)]
+    for writer, record in zip(writers, RECORDS):
+        writer.write(record, DATE)
+    for writer in writers:
+        writer.close()
+    files = [writer.written_files[0] for writer in writers]
+    assert files[0] != files[1]
+    assert [read_jsonl(f) for f in files] == [[RECORDS[0]], [RECORDS[1]]]